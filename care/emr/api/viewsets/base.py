@@ -113,17 +113,14 @@ class EMRCreateMixin:
 class EMRListMixin:
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
+        read_model = self.get_read_pydantic_model()
+        if read_model.supports_values_serialization():
+            queryset = queryset.values(*read_model.get_values_fields())
         paginator = self.pagination_class()
         page = paginator.paginate_queryset(queryset, request)
         if page is not None:
-            data = [
-                self.get_read_pydantic_model().serialize(obj).to_json() for obj in page
-            ]
-            return paginator.get_paginated_response(data)
-        data = [
-            self.get_read_pydantic_model().serialize(obj).to_json() for obj in queryset
-        ]
-        return Response(data)
+            return paginator.get_paginated_response(read_model.serialize_many(page))
+        return Response(read_model.serialize_many(queryset))
 
 
 class EMRUpdateMixin:
@@ -1,10 +1,10 @@
 from django.db import transaction
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
 from care.emr.api.viewsets.base import emr_exception_handler
-from care.emr.utils.batch_requests import execute_batch_requests
+from care.emr.utils.batch_requests import dependency_waves, execute_batch_requests
 
 
 class Request(BaseModel):
@@ -12,10 +12,23 @@ class Request(BaseModel):
     method: str
     body: dict = {}
     reference_id: str
+    depends_on: list[str] = []
 
 
 class BatchRequest(BaseModel):
     requests: list[Request] = Field(..., min_length=1, max_length=20)
+    parallel: bool = False
+
+    @model_validator(mode="after")
+    def validate_dependencies(self):
+        if not self.parallel and not any(r.depends_on for r in self.requests):
+            return self
+        reference_ids = [request.reference_id for request in self.requests]
+        if len(set(reference_ids)) != len(reference_ids):
+            err = "reference_id must be unique within a batch"
+            raise ValueError(err)
+        dependency_waves(self.requests)
+        return self
 
 
 class HandledError(Exception):
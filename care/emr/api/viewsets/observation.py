@@ -1,5 +1,7 @@
+from datetime import datetime
+
 from django_filters import rest_framework as filters
-from pydantic import BaseModel, Field
+from pydantic import UUID4, BaseModel, Field
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
@@ -10,6 +12,11 @@ from care.emr.models.observation import Observation
 from care.emr.resources.common.coding import Coding
 from care.emr.resources.observation.spec import ObservationReadSpec
 from care.emr.resources.questionnaire.spec import QuestionType
+from care.emr.utils.observation_trends import (
+    ObservationBucket,
+    get_latest_observations,
+    get_observation_buckets,
+)
 from care.security.authorization import AuthorizationController
 
 
@@ -37,6 +44,13 @@ class ObservationFilter(filters.FilterSet):
 class ObservationAnalyseRequest(BaseModel):
     codes: list[Coding] = Field(min_length=1, max_length=20)
     page_size: int = Field(10, le=30)
+    encounter: UUID4 | None = None
+    effective_datetime_after: datetime | None = None
+    effective_datetime_before: datetime | None = None
+    bucket: ObservationBucket | None = Field(
+        None,
+        description="Aggregate the numeric values of each code per bucket of time instead",
+    )
 
 
 class ObservationViewSet(EncounterBasedAuthorizationBase, EMRModelReadOnlyViewSet):
@@ -64,17 +78,43 @@ class ObservationViewSet(EncounterBasedAuthorizationBase, EMRModelReadOnlyViewSe
     def analyse(self, request, **kwargs):
         request_params = ObservationAnalyseRequest(**request.data)
         queryset = self.get_queryset()
-        page_size = request_params.page_size
+        if request_params.encounter:
+            queryset = queryset.filter(encounter__external_id=request_params.encounter)
+        if request_params.effective_datetime_after:
+            queryset = queryset.filter(
+                effective_datetime__gte=request_params.effective_datetime_after
+            )
+        if request_params.effective_datetime_before:
+            queryset = queryset.filter(
+                effective_datetime__lte=request_params.effective_datetime_before
+            )
+
+        if request_params.bucket:
+            buckets = get_observation_buckets(
+                queryset, request_params.codes, request_params.bucket.value
+            )
+            return Response(
+                {
+                    "results": [
+                        {
+                            "code": code.model_dump(exclude_defaults=True),
+                            "buckets": buckets.get((code.system, code.code), []),
+                        }
+                        for code in request_params.codes
+                    ]
+                }
+            )
+
+        observations = get_latest_observations(
+            queryset, request_params.codes, request_params.page_size
+        )
         results = []
         for code in request_params.codes:
-            code_queryset = queryset.filter(
-                main_code__code=code.code, main_code__system=code.system
-            )[:page_size]
             code_results = [
                 self.get_read_pydantic_model()
                 .serialize(obj)
                 .model_dump(exclude=["meta"])
-                for obj in code_queryset
+                for obj in observations.get((code.system, code.code), [])
             ]
             results.append(
                 {
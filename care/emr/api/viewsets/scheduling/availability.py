@@ -1,9 +1,7 @@
 import datetime
-from datetime import time, timedelta
 
-from dateutil.parser import parse
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import F
 from django.utils import timezone
 from pydantic import UUID4, BaseModel, model_validator
 from rest_framework.decorators import action
@@ -11,17 +9,20 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 from care.emr.api.viewsets.base import EMRBaseViewSet, EMRRetrieveMixin
-from care.emr.models import AvailabilityException, Schedule, TokenBooking
+from care.emr.models import TokenBooking
 from care.emr.models.patient import Patient
 from care.emr.models.scheduling.booking import TokenSlot
-from care.emr.models.scheduling.schedule import Availability, SchedulableUserResource
-from care.emr.resources.scheduling.schedule.spec import SlotTypeOptions
+from care.emr.models.scheduling.schedule import SchedulableUserResource
 from care.emr.resources.scheduling.slot.spec import (
     TokenBookingReadSpec,
     TokenSlotBaseSpec,
 )
+from care.emr.utils.availability_stats import get_availability_stats
+from care.emr.utils.slot_materializer import (
+    ensure_slots_materialized,
+    get_slots_for_day,
+)
 from care.users.models import User
-from care.utils.lock import Lock
 
 
 class SlotsForDayRequestSpec(BaseModel):
@@ -44,44 +45,29 @@ class AvailabilityStatsRequestSpec(BaseModel):
         max_period = 32
         if self.from_date > self.to_date:
             raise ValidationError("From Date cannot be greater than To Date")
-        if self.from_date - self.to_date > datetime.timedelta(days=max_period):
+        if self.to_date - self.from_date > datetime.timedelta(days=max_period):
             raise ValidationError("Period cannot be be greater than max days")
+        return self
 
 
-def convert_availability_to_slots(availabilities):
-    slots = {}
-    for availability in availabilities:
-        start_time = parse(availability["availability"]["start_time"])
-        end_time = parse(availability["availability"]["end_time"])
-        slot_size_in_minutes = availability["slot_size_in_minutes"]
-        availability_id = availability["availability_id"]
-        current_time = start_time
-        i = 0
-        while current_time < end_time:
-            i += 1
-            if i == 30:  # noqa PLR2004
-                # Failsafe to prevent infinite loop
-                break
-            slots[
-                f"{current_time.time()}-{(current_time + datetime.timedelta(minutes=slot_size_in_minutes)).time()}"
-            ] = {
-                "start_time": current_time.time(),
-                "end_time": (
-                    current_time + datetime.timedelta(minutes=slot_size_in_minutes)
-                ).time(),
-                "availability_id": availability_id,
-            }
-
-            current_time += datetime.timedelta(minutes=slot_size_in_minutes)
-    return slots
+class BatchAvailabilityStatsRequestSpec(AvailabilityStatsRequestSpec):
+    resource: UUID4 | None = None
+    resources: list[UUID4]
 
 
-def lock_create_appointment(token_slot, patient, created_by, reason_for_visit):
-    with Lock(f"booking:resource:{token_slot.resource.id}"), transaction.atomic():
-        if token_slot.allocated >= token_slot.availability.tokens_per_slot:
+def create_token_booking(token_slot, patient, created_by, reason_for_visit):
+    """
+    Claims a token of the slot with a single conditional update, so bookings of
+    the same slot only wait on that row and never overbook it
+    """
+    with transaction.atomic():
+        claimed = TokenSlot.objects.filter(
+            id=token_slot.id,
+            allocated__lt=token_slot.availability.tokens_per_slot,
+        ).update(allocated=F("allocated") + 1, modified_date=timezone.now())
+        if not claimed:
             raise ValidationError("Slot is already full")
-        token_slot.allocated += 1
-        token_slot.save()
+        token_slot.refresh_from_db(fields=["allocated", "modified_date"])
         return TokenBooking.objects.create(
             token_slot=token_slot,
             patient=patient,
@@ -113,71 +99,17 @@ class SlotViewSet(EMRRetrieveMixin, EMRBaseViewSet):
         ).first()
         if not schedulable_resource_obj:
             raise ValidationError("Resource is not schedulable")
-        # Find all relevant schedules
-        availabilities = Availability.objects.filter(
-            slot_type=SlotTypeOptions.appointment.value,
-            schedule__valid_from__lte=request_data.day,
-            schedule__valid_to__gte=request_data.day,
-            schedule__resource=schedulable_resource_obj,
-        )
-        # Fetch all availabilities for that day of week
-        calculated_dow_availabilities = []
-        for schedule_availability in availabilities:
-            for day_availability in schedule_availability.availability:
-                if day_availability["day_of_week"] == request_data.day.weekday():
-                    calculated_dow_availabilities.append(
-                        {
-                            "availability": day_availability,
-                            "slot_size_in_minutes": schedule_availability.slot_size_in_minutes,
-                            "availability_id": schedule_availability.id,
-                        }
-                    )
-        # Remove anything that has an availability exception
-        # Generate all slots already created for that day
-        slots = convert_availability_to_slots(calculated_dow_availabilities)
-        # Fetch all existing slots in that day
-        created_slots = TokenSlot.objects.filter(
-            start_datetime__date=request_data.day,
-            end_datetime__date=request_data.day,
-            resource=schedulable_resource_obj,
-        )
-        for slot in created_slots:
-            slot_key = f"{slot.start_datetime.time()}-{slot.end_datetime.time()}"
-            if (
-                slot_key in slots
-                and slots[slot_key]["availability_id"] == slot.availability.id
-            ):
-                slots.pop(slot_key)
-
-        # Create everything else
-        for _slot in slots:
-            slot = slots[_slot]
-            TokenSlot.objects.create(
-                resource=schedulable_resource_obj,
-                start_datetime=datetime.datetime.combine(
-                    request_data.day, slot["start_time"], tzinfo=timezone.now().tzinfo
-                ),
-                end_datetime=datetime.datetime.combine(
-                    request_data.day, slot["end_time"], tzinfo=timezone.now().tzinfo
-                ),
-                availability_id=slot["availability_id"],
-            )
-        # Compare and figure out what needs to be created
+        ensure_slots_materialized(schedulable_resource_obj, request_data.day)
         return Response(
             {
                 "results": [
                     TokenSlotBaseSpec.serialize(slot).model_dump(exclude=["meta"])
-                    for slot in TokenSlot.objects.filter(
-                        start_datetime__date=request_data.day,
-                        end_datetime__date=request_data.day,
-                        resource=schedulable_resource_obj,
-                    ).select_related("availability")
+                    for slot in get_slots_for_day(
+                        schedulable_resource_obj, request_data.day
+                    )
                 ]
             }
         )
-        # Find all existing Slot objects for that period
-        # Get list of all slots, create if missed
-        # Return slots
 
     @classmethod
     def create_appointment_handler(cls, obj, request_data, user):
@@ -185,7 +117,7 @@ class SlotViewSet(EMRRetrieveMixin, EMRBaseViewSet):
         patient = Patient.objects.filter(external_id=request_data.patient).first()
         if not patient:
             raise ValidationError({"Patient not found"})
-        appointment = lock_create_appointment(
+        appointment = create_token_booking(
             obj, patient, user, request_data.reason_for_visit
         )
         return Response(
@@ -213,104 +145,31 @@ class SlotViewSet(EMRRetrieveMixin, EMRBaseViewSet):
         if not resource:
             raise ValidationError("Resource is not schedulable")
 
-        schedules = Schedule.objects.filter(
-            valid_from__lte=request_data.to_date,
-            valid_to__gte=request_data.from_date,
-            resource=resource,
-        ).values()
-
-        # Cache availabilities
-        availabilities = {}
-        for schedule in schedules:
-            availabilities[schedule["id"]] = Availability.objects.filter(
-                schedule_id=schedule["id"]
-            ).values()
-
-        availability_exceptions = AvailabilityException.objects.filter(
-            valid_from__lte=request_data.to_date,
-            valid_to__gte=request_data.from_date,
-            resource=resource,
-        ).values()
-
-        # Generate a list of all available days as a dict
-
-        days = {}
-        response_days = {}
-        day = request_data.from_date
-        while day < request_data.to_date:
-            days[day] = {"total_slots": 0, "booked_slots": 0}
-            response_days[str(day)] = {"total_slots": 0, "booked_slots": 0}
-            day += timedelta(days=1)
-
-        for day in days:
-            # Calculate all matching schedules
-            current_schedules = []
-            for schedule in schedules:
-                if schedule["valid_from"].date() <= day <= schedule["valid_to"].date():
-                    current_schedules.append(schedule)
-            # Calculate availability exception for that day
-            exceptions = []
-            for exception in availability_exceptions:
-                if exception["valid_from"] <= day <= exception["valid_to"]:
-                    exceptions.append(exception)
-            # Calculate slots based on these data
-
-            slots_count = calculate_slots(
-                day, availabilities, current_schedules, exceptions
-            )
-            days[day]["total_slots"] = slots_count
-            response_days[str(day)]["total_slots"] = slots_count
-        # Query slots data for these dates, group by date and sum up count
-
-        booked_slots = (
-            TokenSlot.objects.filter(
-                start_datetime__lte=request_data.to_date,
-                end_datetime__gte=request_data.from_date,
-                resource=resource,
-            )
-            .values("start_datetime__date")
-            .annotate(allocated_sum=Sum("allocated"))
-            .values("allocated_sum", "start_datetime__date")
+        return Response(
+            get_availability_stats(
+                [resource.id], request_data.from_date, request_data.to_date
+            )[resource.id]
         )
 
-        for slot in booked_slots:
-            response_days[str(slot["start_datetime__date"])]["booked_slots"] = slot[
-                "allocated_sum"
-            ]
-        # Query all the booked slots for the given days and get the total booked
-
-        return Response(response_days)
-
-
-def calculate_slots(
-    date: datetime.date,
-    availabilities: list[Availability],
-    schedules,
-    exceptions: list[AvailabilityException],
-):
-    # We don't care about duplicate slots because they won't exist because of our validations
-    day_of_week = date.weekday()
-    slots = 0
-    for schedule in schedules:
-        for availability in availabilities[schedule["id"]]:
-            for available_slot in availability["availability"]:
-                if available_slot["day_of_week"] != day_of_week:
-                    continue
-                start_time = time.fromisoformat(available_slot["start_time"])
-                end_time = time.fromisoformat(available_slot["end_time"])
-                while start_time <= end_time:
-                    conflicting = False
-                    for exception in exceptions:
-                        if (
-                            exception["start_time"] <= end_time
-                            and exception["end_time"] >= start_time
-                        ):
-                            conflicting = True
-                    start_time = (
-                        datetime.datetime.combine(date.today(), start_time)
-                        + timedelta(minutes=availability["slot_size_in_minutes"])
-                    ).time()
-                    if conflicting:
-                        continue
-                    slots += availability["tokens_per_slot"]
-    return slots
+    @action(detail=False, methods=["POST"])
+    def batch_availability_stats(self, request, *args, **kwargs):
+        """
+        Availability stats of many resources of the facility at once, keyed by
+        the external id of the user
+        """
+        request_data = BatchAvailabilityStatsRequestSpec(**request.data)
+        resources = dict(
+            SchedulableUserResource.objects.filter(
+                facility__external_id=self.kwargs["facility_external_id"],
+                resource__external_id__in=request_data.resources,
+            ).values_list("id", "resource__external_id")
+        )
+        stats = get_availability_stats(
+            list(resources), request_data.from_date, request_data.to_date
+        )
+        return Response(
+            {
+                str(user_external_id): stats[resource_id]
+                for resource_id, user_external_id in resources.items()
+            }
+        )
@@ -1,16 +1,36 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 class FHIRClient:
     """
     This client will be used for all queries performed over the FHIR protocol
     This class is designed to perform FHIR based queries to some remote server and convert them into python objects
+    Connections are kept alive in a pooled session so that queries do not pay for connection setup
     """
 
-    def __init__(self, server_url):
+    def __init__(self, server_url, pool_size=10, retries=2, timeout=60):
         self.server_url = server_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504),
+                # Terminology operations are read only, POST is only used to send the body
+                allowed_methods=("GET", "POST"),
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
-    def query(self, *, method, resource, operation=None, parameters, detail=None):
+    def query(
+        self, *, method, resource, operation=None, parameters, detail=None, timeout=None
+    ):
         url = f"{self.server_url}/{resource}"
         if detail:
             url += f"/{detail}"
@@ -21,5 +41,7 @@ class FHIRClient:
             request_kwargs["params"] = parameters
         else:
             request_kwargs["json"] = parameters
-        response = requests.request(method, url, **request_kwargs, timeout=60)
+        response = self.session.request(
+            method, url, **request_kwargs, timeout=timeout or self.timeout
+        )
         return response.json()
@@ -4,3 +4,10 @@ class BaseFHIRError(Exception):
 
 class MoreThanOneFHIRResourceFoundError(BaseFHIRError):
     pass
+
+
+class TerminologyIndexMissError(BaseFHIRError):
+    """
+    Raised when the local terminology index cannot answer a query,
+    callers are expected to fall back to the terminology server.
+    """
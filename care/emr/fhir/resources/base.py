@@ -1,25 +1,39 @@
 # ruff : noqa : SLF001
+import hashlib
 from copy import deepcopy
 
-import json_fingerprint
 import simplejson as json
 from django.conf import settings
-from django.core.cache import cache
-from json_fingerprint import hash_functions
 
 from care.emr.fhir.client import FHIRClient
+from care.utils.cache.tiered_cache import TieredCache
 
-default_fhir_client = FHIRClient(server_url=settings.SNOWSTORM_DEPLOYMENT_URL)
+default_fhir_client = FHIRClient(
+    server_url=settings.SNOWSTORM_DEPLOYMENT_URL,
+    pool_size=settings.FHIR_CLIENT_POOL_SIZE,
+    retries=settings.FHIR_CLIENT_RETRIES,
+    timeout=settings.FHIR_CLIENT_TIMEOUT,
+)
+
+# Responses are keyed on the normalized request, hit/miss counts are in fhir_response_cache.stats
+fhir_response_cache = TieredCache(
+    "fhir_resource",
+    maxsize=settings.FHIR_RESPONSE_CACHE_SIZE,
+    local_ttl=settings.FHIR_RESPONSE_CACHE_LOCAL_TTL,
+    shared_ttl=settings.FHIR_RESPONSE_CACHE_TTL,
+    use_shared=settings.FHIR_RESPONSE_CACHE_SHARED,
+)
 
 
 class ResourceManger:
     _fhir_client = default_fhir_client
     resource = ""
     allowed_properties = []
-    cache_prefix_key = "fhir_resource:"
 
-    def __init__(self, fhir_client=None):
+    def __init__(self, fhir_client=None, timeout=None):
         self._filters = {}
+        # Overrides the client timeout for the requests of this resource
+        self._timeout = timeout
         self._meta = {}
         self._executed = False
         if fhir_client:
@@ -27,14 +41,17 @@ class ResourceManger:
 
     def query(self, method, resource, parameters):
         payload = {"method": method, "resource": resource, "parameters": parameters}
-        fingerprint = json_fingerprint.create(
-            input=json.dumps(payload), hash_function=hash_functions.SHA256, version=1
-        )
-        cache_key = f"self.cache_prefix_key{fingerprint}"
-        if cached_data := cache.get(cache_key):
-            return cached_data
-        results = self._fhir_client.query(**payload)
-        cache.set(cache_key, results, 10)
+        if not settings.FHIR_RESPONSE_CACHE_ENABLED:
+            return self._fhir_client.query(**payload, timeout=self._timeout)
+        fingerprint = hashlib.sha256(
+            json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+        ).hexdigest()
+        if (results := fhir_response_cache.get(fingerprint)) is not None:
+            return results
+        results = self._fhir_client.query(**payload, timeout=self._timeout)
+        # Errors from the terminology server should not be served from the cache
+        if results.get("resourceType") != "OperationOutcome":
+            fhir_response_cache.set(fingerprint, results)
         return results
 
     def validate_filter(self):
@@ -54,6 +71,7 @@ class ResourceManger:
         obj._meta = deepcopy(self._meta)
         obj._executed = self._executed
         obj._fhir_client = self._fhir_client
+        obj._timeout = self._timeout
         return obj
 
     def handle_list(self, results):
@@ -0,0 +1,76 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from care.emr.fhir.exceptions import TerminologyIndexMissError
+from care.emr.fhir.resources.local_valueset import LocalValueSetResource
+from care.emr.fhir.resources.valueset import ValueSetResource
+
+logger = logging.getLogger(__name__)
+
+expand_executor = ThreadPoolExecutor(
+    max_workers=settings.TERMINOLOGY_MAX_CONCURRENCY,
+    thread_name_prefix="valueset-expand",
+)
+
+
+def rank_results(results_by_system, search, count):
+    """
+    Merge per system results, prefix matches first and then by each system's own ranking
+    """
+    search = (search or "").lower()
+    ranked = []
+    for system_results in results_by_system:
+        for position, result in enumerate(system_results):
+            is_prefix = bool(search) and result.display.lower().startswith(search)
+            ranked.append((not is_prefix, position, result))
+    ranked.sort(key=lambda item: (item[0], item[1]))
+    return [result for _, _, result in ranked[:count]]
+
+
+def search_remote(filters, deadline):
+    """
+    Requests are given only the time left until the deadline, so that an
+    abandoned expand does not hold a pool worker for the whole client timeout
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError
+    return ValueSetResource(timeout=remaining).filter(**filters).search()
+
+
+def expand_compositions(compositions, search="", count=10):
+    """
+    Expand a composition grouped by system (see create_composition).
+    Systems are answered from the local index where possible, the rest are queried
+    against the terminology server concurrently. Systems that do not respond within
+    TERMINOLOGY_EXPAND_DEADLINE are dropped so that a slow system only costs its results.
+    """
+    results_by_system = []
+    remote_filters = {}
+    for system, composition in compositions.items():
+        filters = {"search": search, "count": count, **composition}
+        try:
+            results_by_system.append(LocalValueSetResource().filter(**filters).search())
+        except TerminologyIndexMissError:
+            remote_filters[system] = filters
+
+    deadline = time.monotonic() + settings.TERMINOLOGY_EXPAND_DEADLINE
+    futures = {
+        expand_executor.submit(search_remote, filters, deadline): system
+        for system, filters in remote_filters.items()
+    }
+    if futures:
+        _, not_done = wait(futures, timeout=settings.TERMINOLOGY_EXPAND_DEADLINE)
+        for future, system in futures.items():
+            if future in not_done:
+                future.cancel()
+                logger.warning("ValueSet expand timed out for system %s", system)
+                continue
+            try:
+                results_by_system.append(future.result())
+            except Exception:
+                logger.exception("ValueSet expand failed for system %s", system)
+    return rank_results(results_by_system, search, count)
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from care.emr.fhir.exceptions import TerminologyIndexMissError
+from care.emr.fhir.resources.code_concept import MinimalCodeConcept
+from care.emr.fhir.resources.valueset import ValueSetResource
+from care.emr.fhir.schema.base import Coding
+from care.emr.models.terminology import TerminologyConcept
+
+SYSTEM_LOADED_CACHE_KEY = "terminology:loaded:{system}"
+SYSTEM_LOADED_CACHE_TTL = 60 * 60  # 1 Hour
+
+# Filters that can be answered from the is-a closure stored in the index
+HIERARCHY_FILTER_OPS = ("is-a", "descendent-of")
+
+
+def is_system_loaded(system):
+    return cache.get_or_set(
+        SYSTEM_LOADED_CACHE_KEY.format(system=system),
+        default=lambda: TerminologyConcept.objects.filter(system=system).exists(),
+        timeout=SYSTEM_LOADED_CACHE_TTL,
+    )
+
+
+def clear_system_loaded_cache(system):
+    cache.delete(SYSTEM_LOADED_CACHE_KEY.format(system=system))
+
+
+class LocalValueSetResource(ValueSetResource):
+    """
+    Answers ValueSet $expand and $validate-code from the local terminology index.
+    Compositions that the index cannot resolve (unloaded systems, nested valuesets,
+    property filters other than the concept hierarchy) raise TerminologyIndexMissError.
+    """
+
+    def include_filter(self, include):
+        if include.get("valueSet"):
+            raise TerminologyIndexMissError
+        system = include.get("system")
+        if not system or not is_system_loaded(system):
+            raise TerminologyIndexMissError
+        query = Q(system=system, active=True)
+        if include.get("concept"):
+            query &= Q(code__in=[concept["code"] for concept in include["concept"]])
+        for concept_filter in include.get("filter", []):
+            if (
+                concept_filter.get("property") != "concept"
+                or concept_filter.get("op") not in HIERARCHY_FILTER_OPS
+            ):
+                raise TerminologyIndexMissError
+            descendants = Q(ancestors__contains=[concept_filter["value"]])
+            if concept_filter["op"] == "is-a":
+                descendants |= Q(code=concept_filter["value"])
+            query &= descendants
+        return query
+
+    def membership_filter(self):
+        includes = self._filters.get("include", [])
+        if not includes:
+            raise TerminologyIndexMissError
+        query = Q()
+        for include in includes:
+            query |= self.include_filter(include)
+        for exclude in self._filters.get("exclude", []):
+            query &= ~self.include_filter(exclude)
+        return query
+
+    def serialize(self, result):
+        return MinimalCodeConcept(
+            system=result.system, code=result.code, display=result.display
+        )
+
+    def lookup_many(self, system, codes):
+        """
+        Returns the membership of every code the index can answer for, codes the
+        index does not know about are left out so that they can be resolved remotely
+        """
+        if not settings.TERMINOLOGY_LOCAL_INDEX_ENABLED:
+            return {}
+        try:
+            membership = self.membership_filter()
+        except TerminologyIndexMissError:
+            return {}
+        queryset = TerminologyConcept.objects.filter(system=system, code__in=codes)
+        known = set(queryset.values_list("code", flat=True))
+        members = set(queryset.filter(membership).values_list("code", flat=True))
+        # A concept known locally but outside the valueset is an authoritative miss
+        return {code: code in members for code in known}
+
+    def lookup(self, code: Coding | dict):
+        if not isinstance(code, dict):
+            code = code.model_dump(exclude_defaults=True)
+        results = self.lookup_many(code.get("system"), [code.get("code")])
+        if code.get("code") not in results:
+            raise TerminologyIndexMissError
+        return results[code.get("code")]
+
+    def search(self):
+        if not settings.TERMINOLOGY_LOCAL_INDEX_ENABLED:
+            raise TerminologyIndexMissError
+        search = self._filters.get("search")
+        count = self._filters.get("count") or 10
+        queryset = TerminologyConcept.objects.filter(self.membership_filter())
+        if search:
+            queryset = (
+                queryset.filter(display__icontains=search)
+                .annotate(
+                    prefix_match=Case(
+                        When(display__istartswith=search, then=Value(1)),
+                        default=Value(0),
+                        output_field=IntegerField(),
+                    ),
+                    similarity=TrigramSimilarity("display", search),
+                )
+                .order_by("-prefix_match", "-similarity", "display")
+            )
+        else:
+            queryset = queryset.order_by("display")
+        results = list(queryset.only("system", "code", "display")[:count])
+        if not results:
+            raise TerminologyIndexMissError
+        return self.handle_list(results)
@@ -24,7 +24,9 @@ class ValueSetResource(ResourceManger):
     def validate_filter(self):
         ValueSetFilterValidation(**self._filters)
 
-    def lookup(self, code: Coding):
+    def lookup(self, code: Coding | dict):
+        if not isinstance(code, dict):
+            code = code.model_dump(exclude_defaults=True)
         parameters = [
             {
                 "name": "valueSet",
@@ -36,7 +38,7 @@ class ValueSetResource(ResourceManger):
                     },
                 },
             },
-            {"name": "coding", "valueCoding": code.model_dump(exclude_defaults=True)},
+            {"name": "coding", "valueCoding": code},
         ]
         request_json = {"resourceType": "Parameters", "parameter": parameters}
         full_result = self.query("POST", "ValueSet/$validate-code", request_json)
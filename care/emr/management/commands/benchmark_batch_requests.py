@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from care.users.models import User
+
+BATCH_URL = "/api/v1/batch_requests/"
+
+
+class Command(BaseCommand):
+    """
+    Compare a batch of GET requests against the same requests made directly.
+    Requests are made in process through the test client, so the numbers exclude
+    network overhead and only reflect the request handling cost.
+    """
+
+    help = "Benchmark batch requests against direct calls"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="/api/v1/users/getcurrentuser/")
+        parser.add_argument("--count", type=int, default=20)
+        parser.add_argument("--iterations", type=int, default=10)
+        parser.add_argument("--username", help="User making the requests")
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        self.stdout.write(
+            f"{label}: mean {sum(timings) / len(timings) * 1000:.2f}ms "
+            f"p50 {timings[len(timings) // 2] * 1000:.2f}ms "
+            f"max {timings[-1] * 1000:.2f}ms"
+        )
+
+    def handle(self, *args, **options):
+        user = (
+            User.objects.filter(username=options["username"]).first()
+            if options["username"]
+            else User.objects.filter(is_superuser=True).first()
+        )
+        if not user:
+            raise CommandError("User not found")
+        token = RefreshToken.for_user(user).access_token
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        url, count = options["url"], options["count"]
+
+        response = client.get(url)
+        if response.status_code != 200:  # noqa PLR2004
+            msg = f"{url} returned {response.status_code}"
+            raise CommandError(msg)
+
+        timings = []
+        for _ in range(options["iterations"]):
+            start = time.perf_counter()
+            for _ in range(count):
+                client.get(url)
+            timings.append(time.perf_counter() - start)
+        self.report(f"{count} direct calls", timings)
+
+        requests = [
+            {"url": url, "method": "GET", "reference_id": str(index)}
+            for index in range(count)
+        ]
+        for parallel in (False, True):
+            timings = []
+            for _ in range(options["iterations"]):
+                start = time.perf_counter()
+                response = client.post(
+                    BATCH_URL,
+                    {"requests": requests, "parallel": parallel},
+                    content_type="application/json",
+                )
+                timings.append(time.perf_counter() - start)
+            if response.status_code != 200:  # noqa PLR2004
+                msg = f"Batch returned {response.status_code}"
+                raise CommandError(msg)
+            self.report(
+                f"batch of {count} ({'parallel' if parallel else 'serial'})", timings
+            )
@@ -0,0 +1,154 @@
+# ruff : noqa : S311
+
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from care.emr.models.encounter import Encounter
+from care.emr.models.questionnaire import Questionnaire
+from care.emr.resources.questionnaire.spec import QuestionType
+from care.emr.resources.questionnaire.utils import (
+    compile_questionnaire,
+    evaluate_questionnaire_plan,
+    handle_response,
+)
+from care.emr.resources.questionnaire_response.spec import QuestionnaireSubmitRequest
+from care.users.models import User
+
+QUESTION_TYPES = [
+    QuestionType.decimal.value,
+    QuestionType.integer.value,
+    QuestionType.string.value,
+]
+
+
+def build_questionnaire(question_count, group_size):
+    """
+    A flowsheet like questionnaire, questions are split into groups of group_size
+    """
+    groups = []
+    for group_index in range(0, question_count, group_size):
+        questions = [
+            {
+                "id": str(uuid.uuid4()),
+                "link_id": f"{group_index + index}",
+                "text": f"Question {group_index + index}",
+                "type": QUESTION_TYPES[index % len(QUESTION_TYPES)],
+                "code": {
+                    "system": "http://loinc.org",
+                    "code": f"{10000 + group_index + index}-0",
+                    "display": f"Question {group_index + index}",
+                },
+            }
+            for index in range(min(group_size, question_count - group_index))
+        ]
+        groups.append(
+            {
+                "id": str(uuid.uuid4()),
+                "link_id": f"group-{group_index}",
+                "text": f"Group {group_index}",
+                "type": QuestionType.group.value,
+                "questions": questions,
+            }
+        )
+    return groups
+
+
+def build_submission(questions, encounter=None):
+    results = []
+    for group in questions:
+        for question in group["questions"]:
+            if question["type"] == QuestionType.string.value:
+                value = "normal"
+            else:
+                value = str(random.randint(1, 200))
+            results.append(
+                {"question_id": question["id"], "values": [{"value": value}]}
+            )
+    return QuestionnaireSubmitRequest(
+        resource_id=encounter.external_id if encounter else uuid.uuid4(),
+        encounter=encounter.external_id if encounter else None,
+        patient=encounter.patient.external_id if encounter else uuid.uuid4(),
+        results=results,
+    )
+
+
+class Command(BaseCommand):
+    """
+    Benchmark questionnaire submission.
+    Without --encounter only validation and observation building is measured,
+    with it the full submission is run against that encounter and rolled back.
+    """
+
+    help = "Benchmark questionnaire submission with a large synthetic response"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=200)
+        parser.add_argument("--group-size", type=int, default=10)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument(
+            "--encounter", help="Encounter external id to submit against"
+        )
+        parser.add_argument("--username", help="User submitting the response")
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        self.stdout.write(
+            f"{label}: mean {sum(timings) / len(timings) * 1000:.2f}ms "
+            f"p50 {timings[len(timings) // 2] * 1000:.2f}ms "
+            f"max {timings[-1] * 1000:.2f}ms"
+        )
+
+    def handle(self, *args, **options):
+        questions = build_questionnaire(options["questions"], options["group_size"])
+        iterations = options["iterations"]
+
+        start = time.perf_counter()
+        plan = compile_questionnaire(questions)
+        self.stdout.write(f"compile: {(time.perf_counter() - start) * 1000:.2f}ms")
+
+        submission = build_submission(questions)
+        responses = {str(result.question_id): result for result in submission.results}
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            errors = []
+            observations = evaluate_questionnaire_plan(plan, responses, errors, [])
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(f"{len(observations)} observations, {len(errors)} errors")
+        self.report("validate + build observations", timings)
+
+        if not options["encounter"]:
+            return
+
+        encounter = (
+            Encounter.objects.filter(external_id=options["encounter"])
+            .select_related("patient")
+            .first()
+        )
+        if not encounter:
+            raise CommandError("Encounter not found")
+        user = (
+            User.objects.get(username=options["username"])
+            if options["username"]
+            else User.objects.filter(is_superuser=True).first()
+        )
+        submission = build_submission(questions, encounter)
+        timings = []
+        with transaction.atomic():
+            questionnaire = Questionnaire.objects.create(
+                version="1.0",
+                title="Benchmark",
+                subject_type="encounter",
+                status="active",
+                questions=questions,
+            )
+            for _ in range(iterations):
+                start = time.perf_counter()
+                handle_response(questionnaire, submission, user)
+                timings.append(time.perf_counter() - start)
+            transaction.set_rollback(True)
+        self.report("full submission", timings)
@@ -0,0 +1,140 @@
+import datetime
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from care.emr.api.viewsets.scheduling.availability import create_token_booking
+from care.emr.models import TokenBooking
+from care.emr.models.patient import Patient
+from care.emr.models.scheduling.booking import TokenSlot
+from care.emr.models.scheduling.schedule import SchedulableUserResource
+from care.emr.utils.slot_materializer import (
+    ensure_slots_materialized,
+    get_slots_for_day,
+)
+
+LOAD_TEST_REASON = "benchmark_token_booking"
+
+
+class Command(BaseCommand):
+    """
+    Book appointments concurrently against the morning slots of one resource
+    and report throughput, failures and whether any slot was overbooked.
+    Bookings made by the run are removed afterwards unless --keep is given.
+    """
+
+    help = "Load test concurrent token bookings of a resource"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--resource", required=True, help="External id of the user")
+        parser.add_argument(
+            "--facility", required=True, help="External id of the facility"
+        )
+        parser.add_argument(
+            "--day",
+            type=datetime.date.fromisoformat,
+            help="Day to book, defaults to tomorrow",
+        )
+        parser.add_argument("--bookings", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=32)
+        parser.add_argument("--patient", help="External id of the patient to book")
+        parser.add_argument("--keep", action="store_true")
+
+    def book(self, slot, patient):
+        close_old_connections()
+        start = time.perf_counter()
+        try:
+            create_token_booking(slot, patient, None, LOAD_TEST_REASON)
+            outcome = "booked"
+        except ValidationError:
+            outcome = "full"
+        except Exception as e:
+            outcome = type(e).__name__
+        finally:
+            connections.close_all()
+        return outcome, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        resource = SchedulableUserResource.objects.filter(
+            facility__external_id=options["facility"],
+            resource__external_id=options["resource"],
+        ).first()
+        if not resource:
+            raise CommandError("Resource is not schedulable")
+        patient = (
+            Patient.objects.filter(external_id=options["patient"]).first()
+            if options["patient"]
+            else Patient.objects.first()
+        )
+        if not patient:
+            raise CommandError("Patient not found")
+
+        day = options["day"] or timezone.localdate() + datetime.timedelta(days=1)
+        ensure_slots_materialized(resource, day)
+        slots = [
+            slot
+            for slot in get_slots_for_day(resource, day)
+            if slot.start_datetime.hour < 12  # noqa PLR2004
+        ]
+        if not slots:
+            msg = f"No morning slots on {day}"
+            raise CommandError(msg)
+        capacity = sum(
+            slot.availability.tokens_per_slot - slot.allocated for slot in slots
+        )
+        bookings = options["bookings"]
+        self.stdout.write(
+            f"Booking {bookings} appointments with {options['workers']} workers "
+            f"into {len(slots)} slots with {capacity} free tokens"
+        )
+
+        targets = [slots[index % len(slots)] for index in range(bookings)]
+        # Bookings that can succeed given how they are spread over the slots
+        expected = sum(
+            min(count, slot.availability.tokens_per_slot - slot.allocated)
+            for slot, count in Counter(targets).items()
+        )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            results = list(executor.map(self.book, targets, [patient] * bookings))
+        elapsed = time.perf_counter() - start
+
+        outcomes = Counter(outcome for outcome, _ in results)
+        latencies = sorted(latency for _, latency in results)
+        self.stdout.write(f"{bookings / elapsed:.1f} bookings/s over {elapsed:.2f}s")
+        self.stdout.write(
+            f"latency p50 {latencies[len(latencies) // 2] * 1000:.1f}ms "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms "
+            f"max {latencies[-1] * 1000:.1f}ms"
+        )
+        for outcome, count in outcomes.most_common():
+            self.stdout.write(f"{outcome}: {count}")
+
+        created = TokenBooking.objects.filter(
+            token_slot__in=slots, reason_for_visit=LOAD_TEST_REASON
+        )
+        overbooked = [
+            slot
+            for slot in get_slots_for_day(resource, day)
+            if slot.allocated > slot.availability.tokens_per_slot
+        ]
+        self.stdout.write(
+            f"{created.count()} bookings recorded, "
+            f"expected {expected}, {len(overbooked)} slots overbooked"
+        )
+
+        if not options["keep"]:
+            for slot_id, count in Counter(
+                created.values_list("token_slot_id", flat=True)
+            ).items():
+                TokenSlot.objects.filter(id=slot_id).update(
+                    allocated=F("allocated") - count
+                )
+            created.delete()
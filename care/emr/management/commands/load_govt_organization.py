@@ -1,6 +1,5 @@
 import json
 import logging
-from collections import defaultdict
 from datetime import UTC, datetime
 from pathlib import Path
 
@@ -23,59 +22,20 @@ local_body_choice_map = {
     "O": "other_local_body",
 }
 
-state_cache = {}
-districts_cache = defaultdict(dict)
-
-
-def get_state(state_name):
-    if state_name not in state_cache:
-        try:
-            state_cache[state_name] = Organization.objects.get(
-                name=state_name, root_org=None
-            )
-        except Organization.DoesNotExist:
-            logger.error("State not found: '%s'", state_name)
-            state_cache[state_name] = None
-            # raise e
-    return state_cache[state_name]
-
-
-def get_district(state_name, district_name):
-    state = get_state(state_name)
-    if not state:
-        return None
-    if district_name not in districts_cache[state_name]:
-        try:
-            districts_cache[state_name][district_name] = Organization.objects.get(
-                name=district_name, parent=state
-            )
-        except Organization.DoesNotExist:
-            logger.error(
-                "District not found: %s, '%s'",
-                state_name,
-                district_name,
-            )
-            districts_cache[state_name][district_name] = None
-            # raise e
-    return districts_cache[state_name][district_name]
-
-
-def get_local_body(state_name, district_name, local_body_name):
-    district = get_district(state_name, district_name)
-    if not district:
-        return None
-    try:
-        return Organization.objects.filter(
-            name=local_body_name, parent=district
-        ).first()
-    except Organization.DoesNotExist:
-        logger.error(
-            "Local Body not found: %s, %s, '%s'",
-            state_name,
-            district_name,
-            local_body_name,
-        )
-        # raise e
+# Fields read from existing organizations while loading
+LOADED_FIELDS = [
+    "id",
+    "external_id",
+    "parent_id",
+    "name",
+    "description",
+    "org_type",
+    "metadata",
+    "has_children",
+    *Organization.ANCESTRY_CACHE_FIELDS,
+]
+# Fields written back to existing organizations when they are out of date
+REFRESHED_FIELDS = ["has_children", *Organization.ANCESTRY_CACHE_FIELDS]
 
 
 def int_or_zero(value):
@@ -102,14 +62,56 @@ def get_local_body_name(local_body):
     return local_body["name"].replace("  ", " ").replace("\n", "")  # noqa: RUF001
 
 
-class Command(BaseCommand):
-    """ """
+def get_node_key(name, metadata):
+    """
+    Identifies an organization among its siblings, local bodies and wards
+    can share names so their codes are part of the key
+    """
+    code = metadata.get("lsg_code") or metadata.get("ward_number") or ""
+    return name.strip().casefold(), str(code)
+
+
+def get_refreshed_values(organization):
+    return [
+        organization.has_children,
+        organization.parent_cache,
+        organization.level_cache,
+        organization.root_org_id,
+        organization.cached_parent_json,
+    ]
+
+
+class OrganizationNode:
+    """
+    An organization in the govt hierarchy as described by the data files,
+    `create` is False for nodes that are only matched against existing
+    organizations to attach the levels below them
+    """
+
+    def __init__(self, name, metadata, create=True):
+        self.name = name.strip()
+        self.metadata = {"country": "india", **metadata}
+        self.create = create
+        self.children = {}
+
+    @property
+    def key(self):
+        return get_node_key(self.name, self.metadata)
+
+    def add_child(self, node):
+        return self.children.setdefault(node.key, node)
 
-    help = ""
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.migration_id = int(datetime.now(tz=UTC).timestamp() * 1000)
+class Command(BaseCommand):
+    """
+    Loads the govt organization hierarchy (state, district, local body and ward)
+    from `data/india`. The hierarchy of a state is assembled in memory with its
+    ancestry caches and written with bulk inserts, one level at a time.
+    Organizations that already exist are matched by name and updated in place,
+    so the command can be rerun for the same migration.
+    """
+
+    help = "Load the govt organization hierarchy of India"
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -135,181 +137,156 @@ class Command(BaseCommand):
             action="store_true",
             help="Load ward data",
         )
+        parser.add_argument(
+            "--migration-id",
+            type=int,
+            default=None,
+            help="Recorded on the created organizations, defaults to the current time",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of organizations written per query",
+        )
 
-    def load_state_and_district_data(self):
-        with self.json_file_path.open() as json_file:
-            data = json.load(json_file)
-
-        state_defaults = {
-            "active": True,
-            "org_type": "govt",
-            "description": "",
-            "has_children": True,
-            "system_generated": True,
-            "level_cache": 0,
-            "metadata": {
-                "country": "india",
-                "govt_org_type": "state",
-            },
-            "meta": {
-                "migration_id": self.migration_id,
-            },
-        }
-
-        if self.state != "all":
-            data = [d for d in data if d["slug"] == self.state]
-
-        for item in data:
-            state_name = item["state"].strip()
-
-            districts = [d.strip() for d in item["districts"].split(",")]
-
-            state, created = Organization.objects.get_or_create(
-                name__iexact=state_name,
-                metadata__govt_org_type="state",
-                defaults={**state_defaults, "name": state_name},
+    def build_state_tree(self, item, state_dir: Path):
+        state = OrganizationNode(item["state"], {"govt_org_type": "state"})
+        districts = {}
+        for district_name in item["districts"].split(","):
+            district = state.add_child(
+                OrganizationNode(
+                    district_name,
+                    {"govt_org_type": "district"},
+                    create=self.load_districts,
+                )
             )
-            state_cache[state_name] = state
-            if not created:
-                logger.debug("State already exists: %s (%s)", state.name, state.id)
-            else:
-                logger.debug("Created state: %s (%s)", state.name, state.id)
-
-            district_defaults = {
-                "root_org": state,
-                "parent": state,
-                "org_type": "govt",
-                "description": "",
-                "has_children": True,
-                "system_generated": True,
-                "level_cache": 1,
-                "metadata": {
-                    "country": "india",
-                    "govt_org_type": "district",
-                },
-                "meta": {
-                    "migration_id": self.migration_id,
-                },
-            }
+            districts[district.name.casefold()] = district
 
-            if not self.load_districts:
-                continue
+        if not self.load_districts or not (self.load_local_bodies or self.load_wards):
+            return state
 
-            for d in districts:
-                district, created = Organization.objects.get_or_create(
-                    parent=state,
-                    name__iexact=d,
-                    defaults={
-                        **district_defaults,
-                        "name": d,
-                    },
+        # Local body files are read one at a time, only the organizations are kept
+        for f in sorted((state_dir / "lsg").glob("*.json")):
+            with f.open() as data_f:
+                data = json.load(data_f)
+            wards = data.pop("wards", None) or []
+            if not data.get("district"):
+                continue
+            district = districts.get(data["district"].strip().casefold())
+            if not district:
+                logger.error(
+                    "District not found: %s, '%s'", item["state"], data["district"]
                 )
-                districts_cache[state_name][d] = district
-                district.get_parent_json()
-                if not created:
-                    logger.debug(
-                        "District already exists: %s (%s)", district.name, district.id
-                    )
-                else:
-                    logger.debug(
-                        "Created district: %s (%s)", district.name, district.id
-                    )
-
-    def load_local_bodies_data(self, state_dirs: list[Path]):
-        def create_local_bodies(local_body_list):
-            local_body_list.sort(
-                key=lambda lb: (
-                    lb["name"],
-                    lb.get("localbody_code", ""),
+                continue
+            body_type = data.get("localbody_code", " ")[0]
+            local_body = district.add_child(
+                OrganizationNode(
+                    get_local_body_name(data),
+                    {
+                        "govt_org_type": local_body_choice_map.get(
+                            body_type, "other_local_body"
+                        ),
+                        "lsg_code": data.get("lsg_code", data.get("localbody_code")),
+                    },
+                    create=self.load_local_bodies,
                 )
             )
-            local_body_objs = []
-            for local_body in local_body_list:
-                if not local_body["district"]:
-                    continue
-                dist_obj: Organization = get_district(
-                    local_body["state"], local_body["district"]
-                )
-                if not dist_obj:
-                    continue
-                body_type = local_body.get("localbody_code", " ")[0]
-                local_body_objs.append(
-                    Organization(
-                        root_org=dist_obj.parent,
-                        name=get_local_body_name(local_body),
-                        parent=dist_obj,
-                        org_type="govt",
-                        level_cache=2,
-                        system_generated=True,
-                        metadata={
-                            "country": "india",
-                            "govt_org_type": local_body_choice_map.get(
-                                body_type, "other_local_body"
-                            ),
-                            "lsg_code": local_body.get(
-                                "lsg_code", local_body.get("localbody_code")
-                            ),
-                        },
-                        meta={
-                            "migration_id": self.migration_id,
+            if not self.load_wards:
+                continue
+            if not wards:
+                logger.info("Ward Data not Found for %s", f)
+            for ward in wards:
+                local_body.add_child(
+                    OrganizationNode(
+                        get_ward_name(ward),
+                        {
+                            "govt_org_type": "ward",
+                            "ward_number": get_ward_number(ward),
                         },
                     )
                 )
-            count = Organization.objects.bulk_create(local_body_objs)
-            logger.debug("Created %s local bodies", len(count))
-
-        for state_dir in state_dirs:
-            local_bodies = []
-            for counter, f in enumerate((state_dir / "lsg").glob("*.json")):
-                with f.open() as data_f:
-                    data = json.load(data_f)
-                    data.pop("wards", None)
-                    local_bodies.append(data)
-                if counter % 3000 == 0:
-                    create_local_bodies(local_bodies)
-                    local_bodies = []
-            create_local_bodies(local_bodies)
-
-    def load_wards_data(self, state_dirs: list[Path]):
-        for state_dir in state_dirs:
-            for f in sorted((state_dir / "lsg").glob("*.json")):
-                with f.open() as data_f:
-                    data = json.load(data_f)
-                    wards = data.pop("wards", None)
-                    if not wards:
-                        logger.info("Ward Data not Found for %s", f)
-                        continue
-                    if data.get("district") is not None:
-                        local_body = get_local_body(
-                            data["state"], data["district"], get_local_body_name(data)
-                        )
-                        if not local_body:
-                            continue
-                        wards.sort(
-                            key=lambda x: get_ward_name(x) + str(get_ward_number(x))
-                        )
-                        ward_objs = []
-                        for ward in wards:
-                            ward_objs.append(
-                                Organization(
-                                    root_org=local_body.root_org,
-                                    parent=local_body,
-                                    name=get_ward_name(ward),
-                                    org_type="govt",
-                                    system_generated=True,
-                                    level_cache=3,
-                                    metadata={
-                                        "country": "india",
-                                        "govt_org_type": "ward",
-                                        "ward_number": get_ward_number(ward),
-                                    },
-                                    meta={
-                                        "migration_id": self.migration_id,
-                                    },
-                                )
-                            )
-                        count = Organization.objects.bulk_create(ward_objs)
-                        logger.debug("Created %s wards", len(count))
+        return state
+
+    def new_organization(self, node, parent):
+        return Organization(
+            parent=parent,
+            name=node.name,
+            org_type="govt",
+            description="",
+            system_generated=True,
+            metadata=node.metadata,
+            meta={"migration_id": self.migration_id},
+        )
+
+    def write_level(self, nodes, existing):
+        """
+        Writes one level of the hierarchy, `nodes` pairs every node with the
+        saved parent organization, returns the organizations written
+        """
+        created = []
+        updated = []
+        written = []
+        for node, parent in nodes:
+            parent_id = parent.id if parent else None
+            organization = existing.get((parent_id, node.key))
+            if organization is None and not node.create:
+                logger.debug("Organization not found: '%s'", node.name)
+                continue
+            if organization is None:
+                organization = self.new_organization(node, parent)
+                organization.compute_ancestry()
+                organization.has_children = bool(node.children)
+                created.append(organization)
+            else:
+                organization.parent = parent
+                before = get_refreshed_values(organization)
+                organization.compute_ancestry()
+                organization.has_children = organization.has_children or bool(
+                    node.children
+                )
+                if get_refreshed_values(organization) != before:
+                    updated.append(organization)
+            written.append((node, organization))
+
+        Organization.objects.bulk_create(created, batch_size=self.batch_size)
+        Organization.objects.bulk_update(
+            updated, REFRESHED_FIELDS, batch_size=self.batch_size
+        )
+        logger.debug(
+            "Created %s and updated %s organizations", len(created), len(updated)
+        )
+        return written
+
+    def load_state(self, state: OrganizationNode):
+        existing = {
+            (None, get_node_key(organization.name, {})): organization
+            for organization in Organization.objects.filter(
+                name__iexact=state.name,
+                parent__isnull=True,
+                metadata__govt_org_type="state",
+            ).only(*LOADED_FIELDS)
+        }
+        written = self.write_level([(state, None)], existing)
+        while written:
+            parents = {organization.id: organization for _, organization in written}
+            existing = {
+                (
+                    organization.parent_id,
+                    get_node_key(organization.name, organization.metadata),
+                ): organization
+                for organization in Organization.objects.filter(
+                    parent_id__in=parents.keys()
+                ).only(*LOADED_FIELDS)
+            }
+            written = self.write_level(
+                [
+                    (child, organization)
+                    for node, organization in written
+                    for child in node.children.values()
+                ],
+                existing,
+            )
 
     def handle(self, *args, **options):
         if options["verbosity"] == 0:
@@ -319,34 +296,28 @@ class Command(BaseCommand):
         else:
             logger.setLevel(logging.DEBUG)
 
-        self.json_file_path: Path = (
-            settings.BASE_DIR / "data/india/states-and-districts.json"
-        )
         self.state = options["state"]
         self.load_districts = options["load_districts"]
         self.load_local_bodies = options["load_local_bodies"]
         self.load_wards = options["load_wards"]
+        self.batch_size = options["batch_size"]
+        self.migration_id = options["migration_id"] or int(
+            datetime.now(tz=UTC).timestamp() * 1000
+        )
 
         logger.info("Loading Govt Organization Data")
         logger.info("Migration ID: %s", self.migration_id)
 
-        logger.info("Loading State and District Data")
-        with transaction.atomic():
-            self.load_state_and_district_data()
-
-            root_dir: Path = settings.BASE_DIR / "data/india"
+        root_dir: Path = settings.BASE_DIR / "data/india"
+        with (root_dir / "states-and-districts.json").open() as json_file:
+            data = json.load(json_file)
+        if self.state != "all":
+            data = [d for d in data if d["slug"] == self.state]
 
-            if self.state != "all":
-                state_dirs = [root_dir / self.state]
-            else:
-                state_dirs = [d for d in root_dir.iterdir() if d.is_dir()]
-
-            if self.load_districts:
-                if self.load_local_bodies:
-                    logger.info("Loading Local Body Data")
-                    self.load_local_bodies_data(state_dirs)
-                if self.load_wards:
-                    logger.info("Loading Ward Data")
-                    self.load_wards_data(state_dirs)
+        for item in data:
+            logger.info("Loading %s", item["state"])
+            state = self.build_state_tree(item, root_dir / item["slug"])
+            with transaction.atomic():
+                self.load_state(state)
 
         logger.info("Data Loaded")
@@ -0,0 +1,218 @@
+import csv
+import json
+import logging
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from care.emr.fhir.resources.local_valueset import clear_system_loaded_cache
+from care.emr.models.terminology import TerminologyConcept
+
+logger = logging.getLogger(__name__)
+
+SNOMED_SYSTEM = "http://snomed.info/sct"
+LOINC_SYSTEM = "http://loinc.org"
+UCUM_SYSTEM = "http://unitsofmeasure.org"
+
+SNOMED_IS_A = "116680003"
+SNOMED_FSN = "900000000000003001"
+SNOMED_SYNONYM = "900000000000013009"
+SNOMED_PREFERRED = "900000000000548007"
+
+BATCH_SIZE = 5000
+
+
+def read_rf2(path: Path):
+    """
+    RF2 release files are tab separated with a header row
+    """
+    with path.open(encoding="utf-8") as rf2_file:
+        yield from csv.DictReader(rf2_file, delimiter="\t", quoting=csv.QUOTE_NONE)
+
+
+def strip_semantic_tag(term):
+    """
+    "Fever (finding)" -> "Fever"
+    """
+    if term.endswith(")") and " (" in term:
+        return term[: term.rindex(" (")]
+    return term
+
+
+def compute_ancestors(parents):
+    ancestors = {}
+
+    def resolve(code):
+        if code in ancestors:
+            return ancestors[code]
+        ancestors[code] = set()  # Guard against cycles in malformed releases
+        resolved = set()
+        for parent in parents.get(code, ()):
+            resolved.add(parent)
+            resolved |= resolve(parent)
+        ancestors[code] = resolved
+        return resolved
+
+    for code in parents:
+        resolve(code)
+    return ancestors
+
+
+class Command(BaseCommand):
+    """
+    Management command to load terminology release files into the local index.
+    Eg: python manage.py load_terminology --snomed-concepts sct2_Concept_Snapshot.txt
+      --snomed-descriptions sct2_Description_Snapshot-en.txt
+      --snomed-relationships sct2_Relationship_Snapshot.txt --loinc Loinc.csv --ucum
+    """
+
+    help = (
+        "Load SNOMED CT / LOINC / UCUM release files into the local terminology index"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--snomed-concepts", type=Path, help="RF2 Concept file")
+        parser.add_argument(
+            "--snomed-descriptions", type=Path, help="RF2 Description file"
+        )
+        parser.add_argument(
+            "--snomed-relationships",
+            type=Path,
+            help="RF2 Relationship file, used to resolve is-a filters",
+        )
+        parser.add_argument(
+            "--snomed-language-refset",
+            type=Path,
+            help="RF2 Language refset, used to pick preferred terms",
+        )
+        parser.add_argument("--loinc", type=Path, help="LOINC table (Loinc.csv)")
+        parser.add_argument(
+            "--ucum",
+            nargs="?",
+            const=settings.BASE_DIR / "care/emr/units/data/units.json",
+            type=Path,
+            help="UCUM units json, defaults to the bundled units file",
+        )
+        parser.add_argument(
+            "--release-version", default="", help="Release version to record"
+        )
+
+    def write_concepts(self, system, concepts):
+        """
+        Upserts the concepts for a system in batches
+        """
+        batch = []
+        total = 0
+        for concept in concepts:
+            batch.append(TerminologyConcept(system=system, **concept))
+            if len(batch) >= BATCH_SIZE:
+                total += self.flush(batch)
+                batch = []
+        total += self.flush(batch)
+        transaction.on_commit(lambda: clear_system_loaded_cache(system))
+        logger.info("Loaded %s concepts for %s", total, system)
+
+    def flush(self, batch):
+        TerminologyConcept.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=["system", "code"],
+            update_fields=["display", "version", "active", "ancestors"],
+        )
+        return len(batch)
+
+    def snomed_concepts(self, options):
+        version = options["release_version"]
+        active = {
+            row["id"]: row["active"] == "1"
+            for row in read_rf2(options["snomed_concepts"])
+        }
+
+        preferred = set()
+        if options["snomed_language_refset"]:
+            preferred = {
+                row["referencedComponentId"]
+                for row in read_rf2(options["snomed_language_refset"])
+                if row["active"] == "1" and row["acceptabilityId"] == SNOMED_PREFERRED
+            }
+
+        fully_specified = {}
+        preferred_terms = {}
+        for row in read_rf2(options["snomed_descriptions"]):
+            if row["active"] != "1" or row["conceptId"] not in active:
+                continue
+            if row["typeId"] == SNOMED_FSN:
+                fully_specified[row["conceptId"]] = row["term"]
+            elif row["typeId"] == SNOMED_SYNONYM and row["id"] in preferred:
+                preferred_terms[row["conceptId"]] = row["term"]
+
+        parents = defaultdict(set)
+        if options["snomed_relationships"]:
+            for row in read_rf2(options["snomed_relationships"]):
+                if row["active"] == "1" and row["typeId"] == SNOMED_IS_A:
+                    parents[row["sourceId"]].add(row["destinationId"])
+        ancestors = compute_ancestors(parents)
+
+        for code, is_active in active.items():
+            display = preferred_terms.get(code) or strip_semantic_tag(
+                fully_specified.get(code, "")
+            )
+            if not display:
+                continue
+            yield {
+                "code": code,
+                "display": display,
+                "version": version,
+                "active": is_active,
+                "ancestors": sorted(ancestors.get(code, ())),
+            }
+
+    def loinc_concepts(self, options):
+        csv.field_size_limit(sys.maxsize)
+        with options["loinc"].open(encoding="utf-8") as loinc_file:
+            for row in csv.DictReader(loinc_file):
+                yield {
+                    "code": row["LOINC_NUM"],
+                    "display": row.get("LONG_COMMON_NAME") or row["COMPONENT"],
+                    "version": options["release_version"],
+                    "active": row.get("STATUS") != "DEPRECATED",
+                    "ancestors": [],
+                }
+
+    def ucum_concepts(self, options):
+        data = json.loads(options["ucum"].read_bytes())
+        for unit in data["units"]:
+            yield {
+                "code": unit["code"],
+                "display": unit["display"],
+                "version": options["release_version"],
+                "active": True,
+                "ancestors": [],
+            }
+
+    def handle(self, *args, **options):
+        if options["verbosity"] == 0:
+            logger.setLevel(logging.ERROR)
+        elif options["verbosity"] == 1:
+            logger.setLevel(logging.INFO)
+        else:
+            logger.setLevel(logging.DEBUG)
+
+        if bool(options["snomed_concepts"]) != bool(options["snomed_descriptions"]):
+            err = "--snomed-concepts and --snomed-descriptions must be used together"
+            raise CommandError(err)
+
+        with transaction.atomic():
+            if options["snomed_concepts"]:
+                logger.info("Loading SNOMED CT")
+                self.write_concepts(SNOMED_SYSTEM, self.snomed_concepts(options))
+            if options["loinc"]:
+                logger.info("Loading LOINC")
+                self.write_concepts(LOINC_SYSTEM, self.loinc_concepts(options))
+            if options["ucum"]:
+                logger.info("Loading UCUM")
+                self.write_concepts(UCUM_SYSTEM, self.ucum_concepts(options))
@@ -0,0 +1,55 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from care.emr.models.organization import FacilityOrganization, Organization
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_organization_cache(roots):
+    """
+    Recomputes the materialized ancestry of the given root organizations and
+    everything below them
+    """
+    for root in roots:
+        with transaction.atomic():
+            root.compute_ancestry()
+            root.save(update_fields=root.ANCESTRY_CACHE_FIELDS)
+            root.update_descendant_ancestry()
+        logger.info("Rebuilt ancestry of %s (%s)", root.name, root.id)
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the materialized ancestry (parent_cache, level_cache, root_org and
+    cached_parent_json) of organizations, by default for the govt hierarchy.
+    Required after loading organizations in bulk or editing them outside the ORM.
+    """
+
+    help = "Rebuild the cached ancestry of organizations"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild every organization type and facility organizations",
+        )
+
+    def handle(self, *args, **options):
+        if options["verbosity"] == 0:
+            logger.setLevel(logging.ERROR)
+        elif options["verbosity"] == 1:
+            logger.setLevel(logging.INFO)
+        else:
+            logger.setLevel(logging.DEBUG)
+
+        roots = Organization.objects.filter(parent__isnull=True)
+        if not options["all"]:
+            roots = roots.filter(org_type="govt")
+        rebuild_organization_cache(roots)
+        if options["all"]:
+            rebuild_organization_cache(
+                FacilityOrganization.objects.filter(parent__isnull=True)
+            )
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.3 on 2025-01-06 10:12
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emr', '0060_alter_medicationrequest_dosage_instruction'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='TerminologyConcept',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('system', models.CharField(max_length=255)),
+                ('code', models.CharField(max_length=255)),
+                ('display', models.TextField()),
+                ('version', models.CharField(blank=True, default='', max_length=255)),
+                ('active', models.BooleanField(default=True)),
+                ('ancestors', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('display'), name='gin_trgm_ops'), name='terminology_display_trgm'), django.contrib.postgres.indexes.GinIndex(fields=['ancestors'], name='terminology_ancestors_gin')],
+                'constraints': [models.UniqueConstraint(fields=('system', 'code'), name='unique_terminology_system_code')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2025-01-08 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emr', '0061_terminologyconcept'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tokenslot',
+            index=models.Index(fields=['resource', 'start_datetime'], name='tokenslot_resource_start'),
+        ),
+    ]
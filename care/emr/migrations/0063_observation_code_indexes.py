@@ -0,0 +1,22 @@
+# Generated by Django 5.1.3 on 2025-01-09 10:00
+
+import django.db.models.fields.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emr', '0062_tokenslot_resource_start_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='observation',
+            index=models.Index(models.F('patient'), django.db.models.fields.json.KeyTextTransform('system', 'main_code'), django.db.models.fields.json.KeyTextTransform('code', 'main_code'), models.OrderBy(models.F('effective_datetime'), descending=True), condition=models.Q(('deleted', False)), name='observation_patient_code'),
+        ),
+        migrations.AddIndex(
+            model_name='observation',
+            index=models.Index(models.F('encounter'), django.db.models.fields.json.KeyTextTransform('system', 'main_code'), django.db.models.fields.json.KeyTextTransform('code', 'main_code'), models.OrderBy(models.F('effective_datetime'), descending=True), condition=models.Q(('deleted', False)), name='observation_encounter_code'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.1.3 on 2025-01-10 10:00
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def rebuild_ancestry(model):
+    """
+    Recomputes the materialized ancestry of every organization top down, one
+    level of the tree at a time. Mirrors OrganizationCommonBase.compute_ancestry,
+    the historical models do not have its methods.
+    """
+    fields = [
+        "id",
+        "external_id",
+        "parent",
+        "name",
+        "description",
+        "org_type",
+        "metadata",
+        "parent_cache",
+        "level_cache",
+        "root_org",
+        "cached_parent_json",
+    ]
+    organizations = list(model.objects.filter(parent__isnull=True).only(*fields))
+    seen = set()
+    parents = {}
+    while organizations:
+        for organization in organizations:
+            parent = parents.get(organization.parent_id)
+            if parent:
+                organization.parent_cache = [*parent.parent_cache, parent.id]
+                organization.level_cache = parent.level_cache + 1
+                organization.root_org_id = parent.root_org_id or parent.id
+                organization.cached_parent_json = {
+                    "id": str(parent.external_id),
+                    "name": parent.name,
+                    "description": parent.description,
+                    "org_type": parent.org_type,
+                    "metadata": parent.metadata,
+                    "parent": parent.cached_parent_json,
+                    "level_cache": parent.level_cache,
+                }
+            else:
+                organization.parent_cache = []
+                organization.level_cache = 0
+                organization.root_org_id = None
+                organization.cached_parent_json = {}
+        model.objects.bulk_update(
+            organizations,
+            ["parent_cache", "level_cache", "root_org", "cached_parent_json"],
+            batch_size=BATCH_SIZE,
+        )
+        seen.update(organization.id for organization in organizations)
+        parents = {organization.id: organization for organization in organizations}
+        parent_ids = list(parents)
+        organizations = []
+        for start in range(0, len(parent_ids), BATCH_SIZE):
+            organizations.extend(
+                organization
+                for organization in model.objects.filter(
+                    parent_id__in=parent_ids[start : start + BATCH_SIZE]
+                ).only(*fields)
+                # Guards against cycles in the hierarchy
+                if organization.id not in seen
+            )
+
+
+def rebuild_organization_ancestry(apps, schema_editor):
+    rebuild_ancestry(apps.get_model("emr", "Organization"))
+    rebuild_ancestry(apps.get_model("emr", "FacilityOrganization"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emr', '0063_observation_code_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rebuild_organization_ancestry, migrations.RunPython.noop
+        ),
+    ]
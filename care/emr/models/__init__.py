@@ -7,3 +7,4 @@ from .scheduling import *  # noqa F403
 from .encounter import *  # noqa F403
 from .patient import *  # noqa F403
 from .file_upload import *  # noqa F403
+from .terminology import *  # noqa F403
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.fields.json import KT
 
 from care.emr.models import EMRBaseModel
 
@@ -30,4 +32,23 @@ class Observation(EMRBaseModel):
         "emr.QuestionnaireResponse", on_delete=models.CASCADE, null=True
     )
 
-    # TODO Add index for patient -> encounter -> system -> code
+    class Meta:
+        indexes = [
+            # Trends of a code are read latest first, for a patient or an encounter
+            models.Index(
+                F("patient"),
+                KT("main_code__system"),
+                KT("main_code__code"),
+                F("effective_datetime").desc(),
+                name="observation_patient_code",
+                condition=Q(deleted=False),
+            ),
+            models.Index(
+                F("encounter"),
+                KT("main_code__system"),
+                KT("main_code__code"),
+                F("effective_datetime").desc(),
+                name="observation_encounter_code",
+                condition=Q(deleted=False),
+            ),
+        ]
@@ -1,8 +1,7 @@
-from datetime import datetime, timedelta
+from copy import deepcopy
 
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
-from django.utils import timezone
 
 from care.emr.models import EMRBaseModel
 
@@ -24,44 +23,116 @@ class OrganizationCommonBase(EMRBaseModel):
     parent_cache = ArrayField(models.IntegerField(), default=list)
     metadata = models.JSONField(default=dict)
     cached_parent_json = models.JSONField(default=dict)
-    cache_expiry_days = 15
     # Storing parent data within the organization to save joins each time
 
-    def set_organization_cache(self):
+    # Fields that are materialized from the ancestors of an organization
+    ANCESTRY_CACHE_FIELDS = [
+        "parent_cache",
+        "level_cache",
+        "root_org",
+        "cached_parent_json",
+    ]
+    # Fields that when changed, need to be propagated to the descendants
+    ANCESTRY_SOURCE_FIELDS = [
+        "parent_id",
+        "name",
+        "description",
+        "org_type",
+        "metadata",
+    ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._ancestry_snapshot = instance.get_ancestry_snapshot()  # noqa SLF001
+        return instance
+
+    def get_ancestry_snapshot(self):
+        # Deferred fields are left out, they cannot have been changed when unloaded
+        return {
+            field: deepcopy(self.__dict__[field])
+            for field in self.ANCESTRY_SOURCE_FIELDS
+            if field in self.__dict__
+        }
+
+    def get_ancestry_changes(self):
+        snapshot = getattr(self, "_ancestry_snapshot", None) or {}
+        return {
+            field
+            for field, value in snapshot.items()
+            if field in self.__dict__ and self.__dict__[field] != value
+        }
+
+    def get_ancestry_json(self):
+        """
+        Representation of this organization when it is the parent of another
+        """
+        return {
+            "id": str(self.external_id),
+            "name": self.name,
+            "description": self.description,
+            "org_type": self.org_type,
+            "metadata": self.metadata,
+            "parent": self.cached_parent_json,
+            "level_cache": self.level_cache,
+        }
+
+    def compute_ancestry(self):
         if self.parent:
             self.parent_cache = [*self.parent.parent_cache, self.parent.id]
             self.level_cache = self.parent.level_cache + 1
-            if self.parent.root_org is None:
-                self.root_org = self.parent
-            else:
-                self.root_org = self.parent.root_org
+            self.root_org_id = self.parent.root_org_id or self.parent.id
+            self.cached_parent_json = self.parent.get_ancestry_json()
+        else:
+            self.parent_cache = []
+            self.level_cache = 0
+            self.root_org = None
+            self.cached_parent_json = {}
+
+    def set_organization_cache(self):
+        self.compute_ancestry()
+        if self.parent:
             self.parent.has_children = True
             self.parent.save(update_fields=["has_children"])
         super().save()
 
+    def update_descendant_ancestry(self):
+        """
+        Propagates the ancestry of this organization to all of its descendants,
+        with one query and a bulk update per level of the tree
+        """
+        model = type(self)
+        parents = {self.id: self}
+        seen = {self.id}
+        while parents:
+            children = list(
+                model.objects.filter(parent_id__in=parents.keys()).only(
+                    "id",
+                    "external_id",
+                    "parent_id",
+                    "name",
+                    "description",
+                    "org_type",
+                    "metadata",
+                    *self.ANCESTRY_CACHE_FIELDS,
+                )
+            )
+            # Guards against cycles in the hierarchy
+            children = [child for child in children if child.id not in seen]
+            seen.update(child.id for child in children)
+            for child in children:
+                child.parent = parents[child.parent_id]
+                child.compute_ancestry()
+            model.objects.bulk_update(
+                children, self.ANCESTRY_CACHE_FIELDS, batch_size=2000
+            )
+            parents = {child.id: child for child in children}
+
     def get_parent_json(self):
-        if self.parent:
-            if self.cached_parent_json and timezone.now() < datetime.fromisoformat(
-                self.cached_parent_json["cache_expiry"]
-            ):
-                return self.cached_parent_json
-            if self.parent:
-                self.parent.get_parent_json()
-            self.cached_parent_json = {
-                "id": str(self.parent.external_id),
-                "name": self.parent.name,
-                "description": self.parent.description,
-                "org_type": self.parent.org_type,
-                "metadata": self.parent.metadata,
-                "parent": self.parent.cached_parent_json,
-                "level_cache": self.parent.level_cache,
-                "cache_expiry": str(
-                    timezone.now() + timedelta(days=self.cache_expiry_days)
-                ),
-            }
-            self.save(update_fields=["cached_parent_json"])
-            return self.cached_parent_json
-        return {}
+        """
+        Ancestry is materialized on save, so this never queries or writes
+        """
+        return self.cached_parent_json if self.parent_id else {}
 
     class Meta:
         abstract = True
@@ -71,7 +142,21 @@ class OrganizationCommonBase(EMRBaseModel):
             super().save(*args, **kwargs)
             self.set_organization_cache()
         else:
+            ancestry_changes = self.get_ancestry_changes()
+            if "parent_id" in ancestry_changes:
+                self.compute_ancestry()
+                if self.parent:
+                    self.parent.has_children = True
+                    self.parent.save(update_fields=["has_children"])
+                if kwargs.get("update_fields") is not None:
+                    kwargs["update_fields"] = {
+                        *kwargs["update_fields"],
+                        *self.ANCESTRY_CACHE_FIELDS,
+                    }
             super().save(*args, **kwargs)
+            if ancestry_changes:
+                self.update_descendant_ancestry()
+        self._ancestry_snapshot = self.get_ancestry_snapshot()
 
 
 class FacilityOrganization(OrganizationCommonBase):
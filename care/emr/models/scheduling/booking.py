@@ -17,6 +17,14 @@ class TokenSlot(EMRBaseModel):
     allocated = models.IntegerField(null=False, blank=False, default=0)
     # TODO propogate facility to this level or at the booking level to avoid joins
 
+    class Meta:
+        indexes = [
+            # Slots of a resource are read one day at a time
+            models.Index(
+                fields=["resource", "start_datetime"], name="tokenslot_resource_start"
+            ),
+        ]
+
 
 class TokenBooking(EMRBaseModel):
     token_slot = models.ForeignKey(
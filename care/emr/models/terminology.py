@@ -0,0 +1,38 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models
+from django.db.models.functions import Upper
+
+
+class TerminologyConcept(models.Model):
+    """
+    Local copy of terminology release files (SNOMED CT, LOINC, UCUM).
+    Used to answer ValueSet expand/validate requests without a round trip to the
+    terminology server, see `load_terminology` to populate this table.
+    """
+
+    system = models.CharField(max_length=255)
+    code = models.CharField(max_length=255)
+    display = models.TextField()
+    version = models.CharField(max_length=255, default="", blank=True)
+    active = models.BooleanField(default=True)
+    # Transitive closure of is-a parents, used to resolve is-a / descendent-of filters
+    ancestors = ArrayField(models.CharField(max_length=255), default=list, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["system", "code"], name="unique_terminology_system_code"
+            )
+        ]
+        indexes = [
+            # Matches the UPPER(display) LIKE generated for icontains lookups
+            GinIndex(
+                OpClass(Upper("display"), name="gin_trgm_ops"),
+                name="terminology_display_trgm",
+            ),
+            GinIndex(fields=["ancestors"], name="terminology_ancestors_gin"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.system}|{self.code}"
@@ -1,9 +1,21 @@
-from django.db import models
+import hashlib
+import json
+from collections import defaultdict
+from functools import partial
 
+from django.core.cache import cache
+from django.db import models, transaction
+
+from care.emr.fhir.resources.expansion import expand_compositions
+from care.emr.fhir.resources.local_valueset import LocalValueSetResource
 from care.emr.fhir.resources.valueset import ValueSetResource
 from care.emr.fhir.schema.valueset.valueset import ValueSetCompose
 from care.emr.models import EMRBaseModel
 
+VALUESET_CACHE_KEY = "valueset:{slug}"
+VALUESET_MEMBERSHIP_CACHE_KEY = "valueset:membership:{slug}:{compose_hash}:{coding}"
+VALUESET_CACHE_TTL = 60 * 60 * 24  # 1 Day
+
 
 class ValueSet(EMRBaseModel):
     slug = models.SlugField(max_length=255, unique=True, db_index=True)
@@ -13,6 +25,41 @@ class ValueSet(EMRBaseModel):
     status = models.CharField(max_length=255)
     is_system_defined = models.BooleanField(default=False)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Cleared once the change is visible, a request reading the valueset before
+        # the commit would otherwise cache the old one again
+        transaction.on_commit(
+            partial(cache.delete, VALUESET_CACHE_KEY.format(slug=self.slug))
+        )
+
+    @classmethod
+    def get_cached(cls, slug):
+        """
+        Fetch a valueset by slug, cached until the valueset is saved again
+        """
+        return cache.get_or_set(
+            VALUESET_CACHE_KEY.format(slug=slug),
+            default=lambda: cls.objects.filter(slug=slug).first(),
+            timeout=VALUESET_CACHE_TTL,
+        )
+
+    @property
+    def compose_hash(self):
+        compose = self.compose
+        if not isinstance(compose, dict):
+            compose = compose.model_dump(exclude_defaults=True)
+        return hashlib.sha256(
+            json.dumps(compose, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+
+    def membership_cache_key(self, coding, compose_hash):
+        return VALUESET_MEMBERSHIP_CACHE_KEY.format(
+            slug=self.slug,
+            compose_hash=compose_hash,
+            coding=f"{coding.get('system')}|{coding.get('code')}",
+        )
+
     def create_composition(self):
         systems = {}
         compose = self.compose
@@ -20,30 +67,80 @@ class ValueSet(EMRBaseModel):
             compose = ValueSetCompose(**self.compose)
         for include in compose.include:
             system = include.system.root
-            if system not in systems:
-                systems[system] = {"include": []}
-            systems[system]["include"].append(include.model_dump(exclude_defaults=True))
-        for exclude in compose.exclude:
+            systems.setdefault(system, {}).setdefault("include", []).append(
+                include.model_dump(exclude_defaults=True)
+            )
+        for exclude in compose.exclude or []:
             system = exclude.system.root
-            if system not in systems:
-                systems[system] = {"exclude": []}
-            systems[system]["exclude"].append(exclude.model_dump(exclude_defaults=True))
+            systems.setdefault(system, {}).setdefault("exclude", []).append(
+                exclude.model_dump(exclude_defaults=True)
+            )
         return systems
 
     def search(self, search="", count=10):
+        return expand_compositions(self.create_composition(), search, count)
+
+    def lookup_system(self, composition, system, codings):
+        """
+        Membership of codings within a single system of the composition,
+        answered from the local index where possible
+        """
+        results = (
+            LocalValueSetResource()
+            .filter(**composition)
+            .lookup_many(system, [coding.get("code") for coding in codings])
+        )
+        remote = ValueSetResource().filter(**composition)
+        return [
+            results[coding.get("code")]
+            if coding.get("code") in results
+            else remote.lookup(coding)
+            for coding in codings
+        ]
+
+    def lookup_many(self, codings):
+        """
+        Validate a batch of codings against the valueset in one pass.
+        Results are cached per coding against the current composition, so any change
+        to the composition invalidates them.
+        Returns a list of booleans in the same order as the codings.
+        """
+        codings = [
+            coding
+            if isinstance(coding, dict)
+            else coding.model_dump(exclude_defaults=True)
+            for coding in codings
+        ]
+        compose_hash = self.compose_hash
+        keys = [self.membership_cache_key(coding, compose_hash) for coding in codings]
+        results = cache.get_many(keys)
+
         systems = self.create_composition()
-        results = []
-        for system in systems:
-            results.extend(
-                ValueSetResource()
-                .filter(search=search, count=count, **systems[system])
-                .search()
+        pending = defaultdict(dict)
+        for key, coding in zip(keys, codings, strict=True):
+            if key in results:
+                continue
+            coding_system = coding.get("system")
+            if coding_system and coding_system not in systems:
+                results[key] = False
+            elif coding_system:
+                pending[coding_system][key] = coding
+            else:
+                # Without a system the coding could belong to any system in the composition
+                for system in systems:
+                    pending[system][key] = coding
+
+        resolved = {}
+        for system, system_codings in pending.items():
+            memberships = self.lookup_system(
+                systems[system], system, list(system_codings.values())
             )
-        return results
+            for key, is_member in zip(system_codings, memberships, strict=True):
+                resolved[key] = resolved.get(key, False) or is_member
+        if resolved:
+            cache.set_many(resolved, timeout=VALUESET_CACHE_TTL)
+        results.update(resolved)
+        return [results[key] for key in keys]
 
     def lookup(self, code):
-        systems = self.create_composition()
-        results = []
-        for system in systems:
-            results.append(ValueSetResource().filter(**systems[system]).lookup(code))
-        return any(results)
+        return self.lookup_many([code])[0]
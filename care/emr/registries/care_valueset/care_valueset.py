@@ -1,4 +1,4 @@
-from care.emr.fhir.resources.valueset import ValueSetResource
+from care.emr.fhir.resources.expansion import expand_compositions
 from care.emr.fhir.schema.valueset.valueset import (
     ValueSet,
     ValueSetCompose,
@@ -52,31 +52,19 @@ class CareValueset:
         systems = {}
         for include in self.composition.include:
             system = include.system.root
-            if system not in systems:
-                systems[system] = {"include": []}
-            systems[system]["include"].append(include.model_dump(exclude_defaults=True))
-        for exclude in self.composition.exclude:
+            systems.setdefault(system, {}).setdefault("include", []).append(
+                include.model_dump(exclude_defaults=True)
+            )
+        for exclude in self.composition.exclude or []:
             system = exclude.system.root
-            if system not in systems:
-                systems[system] = {"exclude": []}
-            systems[system]["exclude"].append(exclude.model_dump(exclude_defaults=True))
+            systems.setdefault(system, {}).setdefault("exclude", []).append(
+                exclude.model_dump(exclude_defaults=True)
+            )
         return systems
 
     def search(self, filter=""):
-        # Create a composition with the same system
-        # Query each system
-        # Combine and return
-        systems = self.create_composition()
-
-        results = []
-
-        for system in systems:
-            results.extend(
-                ValueSetResource()
-                .filter(search=filter, count=10, **systems[system])
-                .search()
-            )
-        return results
+        # Query each system concurrently, combine and return
+        return expand_compositions(self.create_composition(), filter)
 
 
 class SystemValueSet:
@@ -92,7 +80,7 @@ class SystemValueSet:
 
 
 def validate_valueset(field, slug, code):
-    valueset_obj = ValuesetDatabaseModel.objects.filter(slug=slug).first()
+    valueset_obj = ValuesetDatabaseModel.get_cached(slug)
     if not valueset_obj:
         err = "Valueset does not exist in care, Resync valuesets"
         raise ValueError(err)
@@ -101,3 +89,14 @@ def validate_valueset(field, slug, code):
         err = "Code does not exist in the valueset"
         raise ValueError(err)
     return code
+
+
+def validate_valueset_codings(slug, codings):
+    """
+    Bulk variant of validate_valueset, returns the membership of each coding
+    """
+    valueset_obj = ValuesetDatabaseModel.get_cached(slug)
+    if not valueset_obj:
+        err = "Valueset does not exist in care, Resync valuesets"
+        raise ValueError(err)
+    return valueset_obj.lookup_many(codings)
@@ -5,6 +5,7 @@ from types import UnionType
 from typing import get_origin
 
 from pydantic import BaseModel
+from pydantic_core import PydanticUndefined, to_jsonable_python
 
 from care.emr.fhir.schema.base import Coding
 
@@ -18,12 +19,50 @@ class EMRResource(BaseModel):
     @classmethod
     def get_database_mapping(cls):
         """
-        Mapping of database fields to pydantic object
+        Mapping of database fields to pydantic object, computed once per class
         """
-        database_fields = []
-        for field in cls.__model__._meta.fields:  # noqa SLF001
-            database_fields.append(field.name)
-        return database_fields
+        if "__database_mapping__" not in cls.__dict__:
+            cls.__database_mapping__ = frozenset(
+                field.name
+                for field in cls.__model__._meta.fields  # noqa SLF001
+            )
+        return cls.__database_mapping__
+
+    @classmethod
+    def get_serializer_fields(cls):
+        """
+        Database fields that are copied as is into the pydantic object.
+        Relations are left to perform_extra_serialization, reading them here
+        would fetch the related object for every row.
+        """
+        if "__serializer_fields__" not in cls.__dict__:
+            model_meta = cls.__model__._meta  # noqa SLF001
+            cls.__serializer_fields__ = tuple(
+                field
+                for field in cls.get_database_mapping()
+                if field in cls.model_fields
+                and field not in cls.__exclude__
+                and not model_meta.get_field(field).is_relation
+            )
+        return cls.__serializer_fields__
+
+    @classmethod
+    def get_serializer_defaults(cls):
+        """
+        Defaults of every field other than meta, in the order they are dumped
+        """
+        if "__serializer_defaults__" not in cls.__dict__:
+            defaults = {}
+            for name, field in cls.model_fields.items():
+                if name == "meta":
+                    continue
+                default = field.get_default(call_default_factory=True)
+                if isinstance(default, type):
+                    # Fields declared as `= dict` default to an empty object
+                    default = default()
+                defaults[name] = default
+            cls.__serializer_defaults__ = defaults
+        return cls.__serializer_defaults__
 
     @classmethod
     def get_serializer_context(cls, info):
@@ -43,22 +82,86 @@ class EMRResource(BaseModel):
         return getattr("_is_update", False)
 
     @classmethod
-    def serialize(cls, obj: __model__, user=None):
-        """
-        Creates a pydantic object from a database object
-        """
-        mappings = cls.get_database_mapping()
-        constructed = {}
-        for mapping in mappings:
-            if mapping in cls.model_fields and mapping not in cls.__exclude__:
-                constructed[mapping] = getattr(obj, mapping)
+    def get_serialization_mapping(cls, obj, user=None):
+        constructed = {
+            field: getattr(obj, field) for field in cls.get_serializer_fields()
+        }
         for field in getattr(obj, "meta", {}):
             if field in cls.model_fields:
                 constructed[field] = obj.meta[field]
         cls.perform_extra_serialization(constructed, obj)
         if user:
             cls.perform_extra_user_serialization(constructed, obj, user=user)
-        return cls.model_construct(**constructed)
+        return constructed
+
+    @classmethod
+    def serialize(cls, obj: __model__, user=None):
+        """
+        Creates a pydantic object from a database object
+        """
+        return cls.model_construct(**cls.get_serialization_mapping(obj, user))
+
+    @classmethod
+    def mapping_to_json(cls, mapping):
+        """
+        Equivalent of `model_construct(**mapping).to_json()` without building the model,
+        required fields that were not set are left out like model_dump does
+        """
+        data = {}
+        for field, default in cls.get_serializer_defaults().items():
+            value = mapping.get(field, default)
+            if value is not PydanticUndefined:
+                data[field] = value
+        return to_jsonable_python(data)
+
+    @classmethod
+    def serialize_json(cls, obj: __model__, user=None):
+        """
+        JSON ready representation of a database object, same as serialize(obj).to_json()
+        """
+        return cls.mapping_to_json(cls.get_serialization_mapping(obj, user))
+
+    @classmethod
+    def supports_values_serialization(cls):
+        """
+        Resources without custom serialization can be serialized straight
+        from queryset.values() rows
+        """
+        if "__supports_values__" not in cls.__dict__:
+            cls.__supports_values__ = (
+                cls.perform_extra_serialization.__func__
+                is EMRResource.perform_extra_serialization.__func__
+            )
+        return cls.__supports_values__
+
+    @classmethod
+    def get_values_fields(cls):
+        fields = [*cls.get_serializer_fields(), "external_id"]
+        if "meta" in cls.get_database_mapping():
+            fields.append("meta")
+        return fields
+
+    @classmethod
+    def serialize_values(cls, row):
+        constructed = {field: row[field] for field in cls.get_serializer_fields()}
+        for field, value in (row.get("meta") or {}).items():
+            if field in cls.model_fields:
+                constructed[field] = value
+        constructed["id"] = row["external_id"]
+        return cls.mapping_to_json(constructed)
+
+    @classmethod
+    def serialize_many(cls, objects, user=None):
+        """
+        Serialize a page of results to JSON ready dicts, accepts both model objects
+        and rows from `queryset.values(*cls.get_values_fields())`
+        """
+        return [
+            cls.serialize_values(obj)
+            if isinstance(obj, dict)
+            else cls.serialize_json(obj, user)
+            for obj in objects
+        ]
 
     def perform_extra_deserialization(self, is_update, obj):
         pass
@@ -55,6 +55,7 @@ class FileUploadListSpec(FileUploadBaseSpec):
     created_date: datetime.datetime
     extension: str
     uploaded_by: dict
+    read_signed_url: str | None = None
 
     @classmethod
     def perform_extra_serialization(cls, mapping, obj):
@@ -63,6 +64,18 @@ class FileUploadListSpec(FileUploadBaseSpec):
         if obj.created_by:
             mapping["uploaded_by"] = UserSpec.serialize(obj.created_by)
 
+    @classmethod
+    def serialize_many(cls, objects, user=None):
+        """
+        Read urls of the whole page are signed together with a shared client
+        """
+        objects = list(objects)
+        results = super().serialize_many(objects, user)
+        urls = FileUpload.files_manager.read_signed_urls(objects)
+        for result, url in zip(results, urls, strict=True):
+            result["read_signed_url"] = url
+        return results
+
 
 class FileUploadRetrieveSpec(FileUploadListSpec):
     signed_url: str | None = None
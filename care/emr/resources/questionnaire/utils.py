@@ -1,4 +1,5 @@
 import uuid
+from collections import defaultdict
 from datetime import datetime
 
 from dateutil import parser
@@ -9,22 +10,61 @@ from care.emr.models.encounter import Encounter
 from care.emr.models.observation import Observation
 from care.emr.models.patient import Patient
 from care.emr.models.questionnaire import Questionnaire, QuestionnaireResponse
-from care.emr.registries.care_valueset.care_valueset import validate_valueset
-from care.emr.resources.observation.spec import ObservationSpec, ObservationStatus
+from care.emr.registries.care_valueset.care_valueset import validate_valueset_codings
+from care.emr.resources.observation.spec import ObservationStatus
 from care.emr.resources.questionnaire.spec import QuestionType
+from care.utils.cache.tiered_cache import LRUCache
 
+questionnaire_plan_cache = LRUCache(maxsize=256, ttl=60 * 60)
 
-def check_required(questionnaire, questionnaire_ref):
+
+def compile_questionnaire(questions, ancestors=(), required_in_tree=False):
     """
-    Recursively check if the question is marked as required anywhere in its parents
+    Flatten the question tree into a list of questions in document order.
+    Every entry carries the group ids above it and whether it is required
+    anywhere in its parents, so a submission can be handled in a single pass.
     """
-    if questionnaire.get("required", False):
-        return True
-    if questionnaire.get("parent"):
-        return check_required(
-            questionnaire_ref[questionnaire.get("parent")], questionnaire_ref
-        )
-    return False
+    plan = []
+    for question in questions:
+        required = bool(question.get("required", False))
+        entry = {
+            "id": question["id"],
+            "type": question["type"],
+            "required": required,
+            "required_in_tree": required_in_tree or required,
+            "repeats": bool(question.get("repeats", False)),
+            "answer_value_set": question.get("answer_value_set"),
+            "code": question.get("code"),
+            "ancestors": ancestors,
+        }
+        plan.append(entry)
+        if question["type"] == QuestionType.group.value:
+            plan.extend(
+                compile_questionnaire(
+                    question.get("questions") or [],
+                    (*ancestors, question["id"]),
+                    entry["required_in_tree"],
+                )
+            )
+    return plan
+
+
+def get_questionnaire_plan(questionnaire_obj: Questionnaire):
+    """
+    Compiled plans are cached per questionnaire version, any edit to the
+    questionnaire updates modified_date and results in a new plan
+    """
+    modified = questionnaire_obj.modified_date
+    key = (
+        questionnaire_obj.id,
+        questionnaire_obj.version,
+        modified.timestamp() if modified else None,
+    )
+    plan = questionnaire_plan_cache.get(key)
+    if plan is None:
+        plan = compile_questionnaire(questionnaire_obj.questions)
+        questionnaire_plan_cache.set(key, plan)
+    return plan
 
 
 def validate_data(values, value_type, questionnaire_ref):
@@ -64,190 +104,176 @@ def validate_data(values, value_type, questionnaire_ref):
     return errors
 
 
-def validate_question_result(  # noqa : PLR0912
-    questionnaire, responses, errors, parent, questionnaire_mapping
-):
-    questionnaire["parent"] = parent
-    # Validate question responses
-    if questionnaire["type"] == QuestionType.structured.value:
-        return
-    if questionnaire["type"] == QuestionType.group.value:
-        # Iterate and call all child questions
-        questionnaire_mapping[questionnaire["id"]] = questionnaire
-        if questionnaire["questions"]:
-            for question in questionnaire["questions"]:
-                validate_question_result(
-                    question,
-                    responses,
-                    errors,
-                    questionnaire["id"],
-                    questionnaire_mapping,
-                )
-    else:
-        # Case when question is not answered ( Not in response )
-        if questionnaire["id"] not in responses and questionnaire.get(
-            "required", False
-        ):
-            errors.append(
-                {"question_id": questionnaire["id"], "error": "Question not answered"}
-            )
-            return
-        if questionnaire["id"] not in responses:
-            return
-        values = responses[questionnaire["id"]].values
-        # Case when the question is answered but is empty
-        if not values and check_required(questionnaire, questionnaire_mapping):
-            err = "No value provided for question"
+def validate_answer(question, response, errors, valueset_codings):  # noqa PLR0911
+    """
+    Validate the response to a single question, returns False if it has errors.
+    Codings that need to be checked against a valueset are collected into
+    valueset_codings and validated in bulk by validate_valueset_answers
+    """
+    if question["type"] == QuestionType.structured.value:
+        return True
+    # Case when question is not answered ( Not in response )
+    if response is None:
+        if question["required"]:
             errors.append(
-                {
-                    "question_id": questionnaire["id"],
-                    "type": "values_missing",
-                    "msg": err,
-                }
+                {"question_id": question["id"], "error": "Question not answered"}
             )
-            return
-        # Check for type errors
-        value_type = questionnaire["type"]
-        if questionnaire.get("repeats", False):
-            values = responses[questionnaire["id"]].values[0:1]
-        type_errors = validate_data(values, value_type, questionnaire)
-        if type_errors:
-            errors.extend(
-                [
+            return False
+        return True
+    values = response.values
+    # Case when the question is answered but is empty
+    if not values and question["required_in_tree"]:
+        errors.append(
+            {
+                "question_id": question["id"],
+                "type": "values_missing",
+                "msg": "No value provided for question",
+            }
+        )
+        return False
+    # Check for type errors
+    if question["repeats"]:
+        values = values[0:1]
+    type_errors = validate_data(values, question["type"], question)
+    errors.extend(
+        [
+            {"type": "type_error", "question_id": question["id"], "msg": error}
+            for error in type_errors
+        ]
+    )
+    # Validate for code and quantity
+    # TODO : Validate for options created by user as well
+    if question["type"] == QuestionType.choice.value and question["answer_value_set"]:
+        for value in values:
+            if not value.value_code:
+                errors.append(
                     {
                         "type": "type_error",
-                        "question_id": questionnaire["id"],
-                        "msg": error,
+                        "question_id": question["id"],
+                        "msg": "Coding is required",
                     }
-                    for error in type_errors
-                ]
+                )
+                return False
+            valueset_codings.append(
+                (question["answer_value_set"], question["id"], value.value_code)
             )
-        # Validate for code and quantity
-        if questionnaire["type"] == QuestionType.choice.value and questionnaire.get(
-            "answer_value_set"
-        ):
-            for value in values:
-                if not value.value_code:
-                    errors.append(
-                        {
-                            "type": "type_error",
-                            "question_id": questionnaire["id"],
-                            "msg": "Coding is required",
-                        }
-                    )
-                    return
-                # Validate code
-                if "answer_value_set" in questionnaire:
-                    try:
-                        validate_valueset(
-                            "unit", questionnaire["answer_value_set"], value.value_code
-                        )
-                    except ValueError:
-                        errors.append(
-                            {
-                                "type": "valueset_error",
-                                "question_id": questionnaire["id"],
-                                "msg": "Coding does not belong to the valueset",
-                            }
-                        )
-        # TODO : Validate for options created by user as well
-        if questionnaire["type"] == QuestionType.quantity.value:
-            for value in values:
-                if not value.value_quantity:
-                    errors.append(
-                        {
-                            "type": "type_error",
-                            "question_id": questionnaire["id"],
-                            "msg": "Quantity is required",
-                        }
+    if question["type"] == QuestionType.quantity.value:
+        for value in values:
+            if not value.value_quantity:
+                errors.append(
+                    {
+                        "type": "type_error",
+                        "question_id": question["id"],
+                        "msg": "Quantity is required",
+                    }
+                )
+                return False
+            if question["answer_value_set"]:
+                valueset_codings.append(
+                    (
+                        question["answer_value_set"],
+                        question["id"],
+                        value.value_quantity.code,
                     )
-                    return
-                # Validate code
-                # TODO : Validate for options created by user as well
-                if "answer_value_set" in questionnaire:
-                    try:
-                        validate_valueset(
-                            "unit",
-                            questionnaire["answer_value_set"],
-                            value.value_quantity.code,
-                        )
-                    except ValueError:
-                        errors.append(
-                            {
-                                "type": "valueset_error",
-                                "question_id": questionnaire["id"],
-                                "msg": "Coding does not belong to the valueset",
-                            }
-                        )
-        # ( check if the code belongs to the valueset or options list)
+                )
+    return not type_errors
+
 
+def validate_valueset_answers(valueset_codings, errors):
+    """
+    Validate all collected codings, one bulk lookup per valueset
+    """
+    codings_by_valueset = defaultdict(list)
+    for slug, question_id, coding in valueset_codings:
+        codings_by_valueset[slug].append((question_id, coding))
+    for slug, answers in codings_by_valueset.items():
+        try:
+            results = validate_valueset_codings(slug, [coding for _, coding in answers])
+        except ValueError:
+            results = [False] * len(answers)
+        for (question_id, _), is_valid in zip(answers, results, strict=True):
+            if not is_valid:
+                errors.append(
+                    {
+                        "type": "valueset_error",
+                        "question_id": question_id,
+                        "msg": "Coding does not belong to the valueset",
+                    }
+                )
+
+
+def observation_value(question_type, value):
+    if question_type == QuestionType.choice.value and value.value_code:
+        return {"value_code": value.value_code.model_dump(exclude_defaults=True)}
+    if question_type == QuestionType.quantity.value and value.value_quantity:
+        return {
+            "value_quantity": value.value_quantity.model_dump(exclude_defaults=True)
+        }
+    return {"value": value.value}
 
-def create_observation_spec(questionnaire, responses, parent_id=None):
-    spec = {}
-    spec["status"] = ObservationStatus.final.value
-    spec["value_type"] = questionnaire["type"]
-    if "category" in questionnaire:
-        spec["category"] = questionnaire["category"]
-    if "code" in questionnaire:
-        spec["main_code"] = questionnaire["code"]
-    if questionnaire["type"] == QuestionType.group.value:
-        spec["id"] = str(uuid.uuid4())
-        spec["effective_datetime"] = timezone.now()
-        spec["value"] = {}
-        return [spec]
+
+def evaluate_questionnaire_plan(plan, responses, errors, valueset_codings):
+    """
+    Validate the responses and build observation rows in the same pass.
+    Group observations are only emitted once a question under them produces one,
+    and are always placed before their children.
+    """
+    now = timezone.now()
     observations = []
-    if (
-        responses
-        and questionnaire["id"] in responses
-        and responses[questionnaire["id"]].values
-        and responses[questionnaire["id"]].values[0]
-    ):
-        for value in responses[questionnaire["id"]].values:
-            observation = spec.copy()
-            observation["id"] = str(uuid.uuid4())
-            if questionnaire["type"] == QuestionType.choice.value and value.value_code:
-                observation["value"] = {
-                    "value_code": (value.value_code.model_dump(exclude_defaults=True))
-                }
-            elif (
-                questionnaire["type"] == QuestionType.quantity.value
-                and value.value_quantity
-            ):
-                observation["value"] = {
-                    "value_quantity": (
-                        value.value_quantity.model_dump(exclude_defaults=True)
-                    )
-                }
-            elif value:
-                observation["value"] = {"value": value.value}
-            if responses[questionnaire["id"]].note:
-                observation["note"] = responses[questionnaire["id"]].note
-        if parent_id:
-            observation["parent"] = parent_id
-        observation["effective_datetime"] = timezone.now()
-        observations.append(observation)
-    return observations
+    group_observations = {}
+    group_questions = {}
+
+    def observation(question, parent, value=None, note=None):
+        row = {
+            "external_id": uuid.uuid4(),
+            "status": ObservationStatus.final.value,
+            "value_type": question["type"],
+            "main_code": question["code"] or {},
+            "effective_datetime": now,
+            "value": value if value is not None else {},
+            "parent": parent,
+        }
+        if note:
+            row["note"] = note
+        return row
 
+    def emit_groups(ancestors):
+        parent = None
+        for group_id in ancestors:
+            if group_id not in group_observations:
+                row = observation(group_questions[group_id], parent)
+                group_observations[group_id] = row["external_id"]
+                observations.append(row)
+            parent = group_observations[group_id]
+        return parent
 
-def convert_to_observation_spec(
-    questionnaire_obj: Questionnaire, responses, parent_id=None
-):
-    constructed_observation_mapping = []
-    for question in questionnaire_obj.get("questions", []):
+    for question in plan:
         if question["type"] == QuestionType.group.value:
-            observation = create_observation_spec(question, responses, parent_id)
-            sub_mapping = convert_to_observation_spec(
-                question, responses, observation[0]["id"]
-            )
-            if sub_mapping:
-                constructed_observation_mapping.extend(observation)
-                constructed_observation_mapping.extend(sub_mapping)
-        elif question.get("code"):
-            constructed_observation_mapping.extend(
-                create_observation_spec(question, responses, parent_id)
+            group_questions[question["id"]] = question
+            continue
+        response = responses.get(question["id"])
+        is_valid = validate_answer(question, response, errors, valueset_codings)
+        if (
+            errors
+            or not is_valid
+            or not question["code"]
+            or response is None
+            or not response.values
+            or not response.values[0]
+        ):
+            # Observations are discarded once there are errors, stop building them
+            continue
+        parent = emit_groups(question["ancestors"])
+        observations.extend(
+            observation(
+                question,
+                parent,
+                observation_value(question["type"], value),
+                response.note,
             )
-
-    return constructed_observation_mapping
+            for value in response.values
+        )
+    return observations
 
 
 def handle_response(questionnaire_obj: Questionnaire, results, user):
@@ -269,11 +295,7 @@ def handle_response(questionnaire_obj: Questionnaire, results, user):
     if not patient:
         raise ValidationError({"type": "object_not_found", "msg": "Patient not found"})
 
-    questionnaire_mapping = {}
-    responses = {}
-    errors = []
-    for result in results.results:
-        responses[str(result.question_id)] = result
+    responses = {str(result.question_id): result for result in results.results}
     if not responses:
         raise ValidationError(
             {
@@ -281,31 +303,14 @@ def handle_response(questionnaire_obj: Questionnaire, results, user):
                 "msg": "Empty Questionnaire cannot be submitted",
             }
         )
-    for question in questionnaire_obj.questions:
-        validate_question_result(
-            question,
-            responses,
-            errors,
-            parent=None,
-            questionnaire_mapping=questionnaire_mapping,
-        )
+    errors = []
+    valueset_codings = []
+    observations = evaluate_questionnaire_plan(
+        get_questionnaire_plan(questionnaire_obj), responses, errors, valueset_codings
+    )
+    validate_valueset_answers(valueset_codings, errors)
     if errors:
         raise ValidationError({"errors": errors})
-    # Validate and create observation objects
-    observations = convert_to_observation_spec(
-        {"questions": questionnaire_obj.questions}, responses
-    )
-    # Bulk create observations
-    observations_objects = [
-        ObservationSpec(
-            **observation,
-            subject_type=questionnaire_obj.subject_type,
-            data_entered_by_id=user.id,
-            created_by_id=user.id,
-            updated_by_id=user.id,
-        )
-        for observation in observations
-    ]
 
     # Create questionnaire response
     json_results = results.model_dump(mode="json", exclude_defaults=True)
@@ -318,17 +323,23 @@ def handle_response(questionnaire_obj: Questionnaire, results, user):
         created_by=user,
         updated_by=user,
     )
-    # Serialize and return questionnaire response
+    # Bulk create observations
     if encounter:
-        bulk = []
-        for observation in observations_objects:
-            temp = observation.de_serialize()
-            temp.questionnaire_response = questionnaire_response
-            temp.subject_id = results.resource_id
-            temp.patient = patient
-            temp.encounter = encounter
-            bulk.append(temp)
-
-        Observation.objects.bulk_create(bulk)
+        Observation.objects.bulk_create(
+            [
+                Observation(
+                    **observation,
+                    subject_type=questionnaire_obj.subject_type,
+                    subject_id=results.resource_id,
+                    questionnaire_response=questionnaire_response,
+                    patient=patient,
+                    encounter=encounter,
+                    data_entered_by_id=user.id,
+                    created_by_id=user.id,
+                    updated_by_id=user.id,
+                )
+                for observation in observations
+            ]
+        )
 
     return questionnaire_response
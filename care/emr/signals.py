@@ -0,0 +1,34 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from care.emr.models.scheduling.schedule import (
+    Availability,
+    AvailabilityException,
+    Schedule,
+)
+from care.emr.tasks.slot_materializer import materialize_resource_slots
+
+
+def schedule_slot_materialization(resource_id):
+    transaction.on_commit(partial(materialize_resource_slots.delay, resource_id))
+
+
+@receiver([post_save, post_delete], sender=Schedule)
+@receiver([post_save, post_delete], sender=AvailabilityException)
+def rematerialize_resource_slots(sender, instance, **kwargs):
+    schedule_slot_materialization(instance.resource_id)
+
+
+@receiver([post_save, post_delete], sender=Availability)
+def rematerialize_availability_slots(sender, instance, **kwargs):
+    resource_id = (
+        Schedule.objects.filter(id=instance.schedule_id)
+        .values_list("resource_id", flat=True)
+        .first()
+    )
+    # Gone when the availability is deleted along with its schedule
+    if resource_id:
+        schedule_slot_materialization(resource_id)
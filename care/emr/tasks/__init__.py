@@ -0,0 +1,13 @@
+from celery import current_app
+from celery.schedules import crontab
+
+from care.emr.tasks.slot_materializer import materialize_all_slots
+
+
+@current_app.on_after_finalize.connect
+def setup_periodic_tasks(sender, **kwargs):
+    sender.add_periodic_task(
+        crontab(hour="0", minute="30"),
+        materialize_all_slots.s(),
+        name="materialize_all_slots",
+    )
@@ -0,0 +1,27 @@
+import logging
+
+from celery import shared_task
+
+from care.emr.models.scheduling.schedule import SchedulableUserResource
+from care.emr.utils.slot_materializer import materialize_resource_window
+from care.utils.lock import ObjectLocked
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(autoretry_for=(ObjectLocked,), retry_backoff=True, max_retries=5)
+def materialize_resource_slots(resource_id):
+    resource = SchedulableUserResource.objects.filter(id=resource_id).first()
+    if not resource:
+        return
+    materialize_resource_window(resource)
+
+
+@shared_task
+def materialize_all_slots():
+    """
+    Moves the rolling window of every schedulable resource forward by a day
+    """
+    for resource_id in SchedulableUserResource.objects.values_list("id", flat=True):
+        materialize_resource_slots.delay(resource_id)
+    logger.info("Scheduled slot materialization of all resources")
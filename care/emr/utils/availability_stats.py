@@ -0,0 +1,177 @@
+import datetime
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+from care.emr.models.scheduling.booking import TokenSlot
+from care.emr.models.scheduling.schedule import (
+    Availability,
+    AvailabilityException,
+    Schedule,
+)
+from care.emr.utils.slot_materializer import MAX_SLOTS_PER_WINDOW, get_day_range
+
+
+def to_minutes(value):
+    if isinstance(value, str):
+        value = datetime.time.fromisoformat(value)
+    return value.hour * 60 + value.minute
+
+
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def count_slots(start, end, slot_size, exceptions):
+    """
+    Number of slots of `slot_size` minutes from `start` to `end` that do not
+    overlap any of the merged exception intervals, all in minutes of the day.
+    Windows are capped at MAX_SLOTS_PER_WINDOW slots like when they are materialized.
+    """
+    if slot_size <= 0 or end <= start:
+        return 0
+    total = min(-(-(end - start) // slot_size), MAX_SLOTS_PER_WINDOW)
+    # Slot k covers [start + k * size, start + (k + 1) * size)
+    excluded = []
+    for exception_start, exception_end in exceptions:
+        first = max(0, (exception_start - start) // slot_size)
+        last = min(total, -(-(exception_end - start) // slot_size))
+        if first < last:
+            excluded.append((first, last))
+    return total - sum(last - first for first, last in merge_intervals(excluded))
+
+
+def get_days(from_date, to_date):
+    return [from_date + timedelta(days=i) for i in range((to_date - from_date).days)]
+
+
+class ResourceCapacity:
+    """
+    Slot capacity of a resource per day, days that share the day of the week,
+    schedules and exceptions are computed once
+    """
+
+    def __init__(self, schedules, availabilities, exceptions):
+        self.schedules = schedules
+        # day of week -> [(schedule id, start, end, slot size, tokens per slot)]
+        self.windows = defaultdict(list)
+        for availability in availabilities:
+            for window in availability["availability"]:
+                self.windows[window["day_of_week"]].append(
+                    (
+                        availability["schedule_id"],
+                        to_minutes(window["start_time"]),
+                        to_minutes(window["end_time"]),
+                        availability["slot_size_in_minutes"],
+                        availability["tokens_per_slot"],
+                    )
+                )
+        self.exceptions = exceptions
+        self.memo = {}
+
+    def get_day_exceptions(self, day):
+        return tuple(
+            (start, end)
+            for start, end in merge_intervals(
+                (to_minutes(exception["start_time"]), to_minutes(exception["end_time"]))
+                for exception in self.exceptions
+                if exception["valid_from"] <= day <= exception["valid_to"]
+            )
+        )
+
+    def get_capacity(self, day):
+        schedule_ids = frozenset(
+            schedule["id"]
+            for schedule in self.schedules
+            if schedule["valid_from"].date() <= day <= schedule["valid_to"].date()
+        )
+        day_of_week = day.weekday()
+        exceptions = self.get_day_exceptions(day)
+        key = (day_of_week, schedule_ids, exceptions)
+        if key not in self.memo:
+            self.memo[key] = sum(
+                count_slots(start, end, slot_size, exceptions) * tokens_per_slot
+                for schedule_id, start, end, slot_size, tokens_per_slot in self.windows[
+                    day_of_week
+                ]
+                if schedule_id in schedule_ids
+            )
+        return self.memo[key]
+
+
+def get_booked_slots(resource_ids, from_date, to_date):
+    range_start, range_end = get_day_range(from_date, to_date - timedelta(days=1))
+    return (
+        TokenSlot.objects.filter(
+            resource_id__in=resource_ids,
+            start_datetime__gte=range_start,
+            start_datetime__lt=range_end,
+        )
+        .annotate(day=TruncDate("start_datetime", tzinfo=datetime.UTC))
+        .values("resource_id", "day")
+        .annotate(allocated_sum=Sum("allocated"))
+        .values_list("resource_id", "day", "allocated_sum")
+    )
+
+
+def get_availability_stats(resource_ids, from_date, to_date):
+    """
+    Total and booked slots of every resource for each day from from_date until
+    to_date, with a fixed number of queries regardless of the resources or days
+    """
+    schedules = defaultdict(list)
+    for schedule in Schedule.objects.filter(
+        valid_from__lte=to_date,
+        valid_to__gte=from_date,
+        resource_id__in=resource_ids,
+    ).values("id", "resource_id", "valid_from", "valid_to"):
+        schedules[schedule["resource_id"]].append(schedule)
+    schedule_resources = {
+        schedule["id"]: resource_id
+        for resource_id, resource_schedules in schedules.items()
+        for schedule in resource_schedules
+    }
+
+    availabilities = defaultdict(list)
+    for availability in Availability.objects.filter(
+        schedule_id__in=schedule_resources.keys()
+    ).values("schedule_id", "availability", "slot_size_in_minutes", "tokens_per_slot"):
+        availabilities[schedule_resources[availability["schedule_id"]]].append(
+            availability
+        )
+
+    exceptions = defaultdict(list)
+    for exception in AvailabilityException.objects.filter(
+        valid_from__lte=to_date,
+        valid_to__gte=from_date,
+        resource_id__in=resource_ids,
+    ).values("resource_id", "valid_from", "valid_to", "start_time", "end_time"):
+        exceptions[exception["resource_id"]].append(exception)
+
+    days = get_days(from_date, to_date)
+    stats = {}
+    for resource_id in resource_ids:
+        capacity = ResourceCapacity(
+            schedules[resource_id],
+            availabilities[resource_id],
+            exceptions[resource_id],
+        )
+        stats[resource_id] = {
+            str(day): {"total_slots": capacity.get_capacity(day), "booked_slots": 0}
+            for day in days
+        }
+
+    if days:
+        for resource_id, day, allocated_sum in get_booked_slots(
+            resource_ids, from_date, to_date
+        ):
+            stats[resource_id][str(day)]["booked_slots"] = allocated_sum
+    return stats
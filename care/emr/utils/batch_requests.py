@@ -1,19 +1,76 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
-from django.db import transaction
+from django.conf import settings
+from django.db import connections, transaction
 from django.test.client import RequestFactory
 from django.urls import Resolver404, resolve
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.test import force_authenticate
 
 HEADERS_TO_INCLUDE = ["HTTP_USER_AGENT", "HTTP_AUTHORIZATION"]
 DEFAULT_CONTENT_TYPE = "application/json"
+# Content type of sub requests whose body is handed over already parsed
+BATCH_CONTENT_TYPE = "application/vnd.care.batch+json"
+# The body has to be non empty for DRF to call the parser
+BATCH_BODY_PLACEHOLDER = b"{}"
+# Methods that can be served from a separate connection outside the batch transaction
+CONCURRENT_METHODS = {"get"}
+
+batch_executor = ThreadPoolExecutor(
+    max_workers=settings.BATCH_REQUEST_MAX_WORKERS,
+    thread_name_prefix="batch-request",
+)
+request_factory = RequestFactory()
+
+
+class BatchBodyParser(BaseParser):
+    """
+    Returns the body of a batch sub request as it was parsed with the batch itself,
+    requests that were not built by the batch dispatcher have no such body
+    """
+
+    media_type = BATCH_CONTENT_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context["request"]._request  # noqa SLF001
+        if not hasattr(request, "batch_body"):
+            msg = "Batch bodies are only accepted within a batch request"
+            raise ParseError(msg)
+        return request.batch_body
+
+
+def resolve_path(path):
+    match = resolve(path)
+    return match.func, match.args, match.kwargs
+
+
+def accepts_batch_body(url):
+    """
+    Whether the view of the url reads bodies with the batch parser, views that
+    declare their own parsers are sent the encoded JSON body instead
+    """
+    try:
+        view, _, _ = resolve_path(urlsplit(url).path)
+    except Resolver404:
+        return False
+    # Parsers given to an action take precedence over the ones of the viewset
+    parser_classes = getattr(view, "initkwargs", {}).get(
+        "parser_classes", getattr(getattr(view, "cls", None), "parser_classes", ())
+    )
+    return any(
+        isinstance(parser, type) and issubclass(parser, BatchBodyParser)
+        for parser in parser_classes
+    )
 
 
 def get_response(wsgi_request):
     try:
         with transaction.atomic():
-            view, args, kwargs = resolve(wsgi_request.path_info)
-            kwargs.update({"request": wsgi_request})
-            resp = view(*args, **kwargs)
+            view, args, kwargs = resolve_path(wsgi_request.path_info)
+            resp = view(*args, request=wsgi_request, **kwargs)
             data = resp.data
             headers = resp.headers.values()
             status_code = resp.status_code
@@ -29,6 +86,17 @@ def get_response(wsgi_request):
     return {"status_code": status_code, "headers": headers, "data": data}
 
 
+def get_isolated_response(wsgi_request):
+    """
+    Runs a sub request in a worker thread, the thread gets its own database
+    connection which is closed once the response is ready
+    """
+    try:
+        return get_response(wsgi_request)
+    finally:
+        connections.close_all()
+
+
 def pre_process_method_headers(method, headers):
     method = method.lower()
 
@@ -70,18 +138,29 @@ def get_wsgi_request_object(curr_request, method, url, headers, body):
     x_headers.update(t_headers)
     content_type = x_headers.get("CONTENT_TYPE", DEFAULT_CONTENT_TYPE)
 
-    request_factory = RequestFactory()
     request_provider = getattr(request_factory, method)
 
     secure = False
 
-    return request_provider(
-        url, data=body, secure=secure, content_type=content_type, **x_headers
+    if (
+        method == "get"
+        or content_type != DEFAULT_CONTENT_TYPE
+        or not accepts_batch_body(url)
+    ):
+        return request_provider(
+            url, data=body, secure=secure, content_type=content_type, **x_headers
+        )
+    # JSON bodies are passed through as is instead of being encoded and parsed again
+    x_headers["CONTENT_TYPE"] = BATCH_CONTENT_TYPE
+    wsgi_request = request_provider(
+        url,
+        data=BATCH_BODY_PLACEHOLDER,
+        secure=secure,
+        content_type=BATCH_CONTENT_TYPE,
+        **x_headers,
     )
-
-
-def execute_serially(requests, resp_generator):
-    return [resp_generator(request) for request in requests]
+    wsgi_request.batch_body = body
+    return wsgi_request
 
 
 def construct_wsgi_from_data(request, data):
@@ -89,7 +168,11 @@ def construct_wsgi_from_data(request, data):
     body = data.body
     method = data.method
     headers = {}  # data.get("headers", {})
-    return get_wsgi_request_object(request, method, url, headers, body)
+    wsgi_request = get_wsgi_request_object(request, method, url, headers, body)
+    # Sub requests act as the user of the batch, skipping authentication
+    if request.user.is_authenticated:
+        force_authenticate(wsgi_request, user=request.user, token=request.auth)
+    return wsgi_request
 
 
 def convert_batch_request_to_wsgi(parent_request, batch_request_data):
@@ -99,6 +182,77 @@ def convert_batch_request_to_wsgi(parent_request, batch_request_data):
     ]
 
 
+def dependency_waves(requests):
+    """
+    Group requests into waves where every request only depends on requests of
+    earlier waves, raises ValueError for unknown references and cycles
+    """
+    indexes = {request.reference_id: index for index, request in enumerate(requests)}
+    pending = {}
+    for index, request in enumerate(requests):
+        unknown = set(request.depends_on) - indexes.keys()
+        if unknown:
+            msg = f"Unknown dependencies {', '.join(sorted(unknown))} for {request.reference_id}"
+            raise ValueError(msg)
+        pending[index] = {indexes[reference] for reference in request.depends_on}
+    waves = []
+    done = set()
+    while pending:
+        wave = [index for index, depends_on in pending.items() if depends_on <= done]
+        if not wave:
+            msg = "Circular dependency between requests"
+            raise ValueError(msg)
+        for index in wave:
+            del pending[index]
+        done.update(wave)
+        waves.append(wave)
+    return waves
+
+
+def execute_in_dependency_order(requests, wsgi_requests, parallel=False):
+    """
+    Executes requests wave by wave, in the order they were sent within a wave.
+    In parallel mode GET requests of a wave run concurrently on worker threads while
+    writes run one after the other on the current thread, inside the batch transaction.
+    Worker threads cannot see uncommitted writes, so a request depending on a write
+    (directly or transitively) also runs on the current thread.
+    Requests whose dependencies failed are not executed.
+    """
+    responses = [None] * len(requests)
+    in_transaction = set()
+    for wave in dependency_waves(requests):
+        futures = {}
+        for index in wave:
+            depends_on = {
+                other
+                for other, request in enumerate(requests)
+                if request.reference_id in requests[index].depends_on
+            }
+            if any(responses[other]["status_code"] > 299 for other in depends_on):  # noqa PLR2004
+                responses[index] = {
+                    "status_code": 424,
+                    "headers": {},
+                    "data": {"detail": "Dependent request failed"},
+                }
+            elif (
+                parallel
+                and requests[index].method.lower() in CONCURRENT_METHODS
+                and not depends_on & in_transaction
+            ):
+                futures[index] = batch_executor.submit(
+                    get_isolated_response, wsgi_requests[index]
+                )
+            else:
+                in_transaction.add(index)
+        for index in sorted(in_transaction.intersection(wave)):
+            responses[index] = get_response(wsgi_requests[index])
+        for index, future in futures.items():
+            responses[index] = future.result()
+    return responses
+
+
 def execute_batch_requests(parent_request, batch_request_data):
     wsgi_requests = convert_batch_request_to_wsgi(parent_request, batch_request_data)
-    return execute_serially(wsgi_requests, get_response)
+    return execute_in_dependency_order(
+        batch_request_data.requests, wsgi_requests, parallel=batch_request_data.parallel
+    )
@@ -1,6 +1,9 @@
-import boto3
-
-from care.utils.csp.config import get_client_config
+from care.utils.csp.client import (
+    get_client,
+    get_transfer_config,
+    iter_body,
+    read_body,
+)
 
 
 class FileManger:
@@ -16,8 +19,7 @@ class S3FilesManager(FileManger):
         self.bucket_type = bucket_type
 
     def signed_url(self, file_obj, duration=60 * 60, mime_type=None):
-        config, bucket_name = get_client_config(self.bucket_type, external=True)
-        s3 = boto3.client("s3", **config)
+        s3, bucket_name = get_client(self.bucket_type, external=True)
         params = {
             "Bucket": bucket_name,
             "Key": f"{file_obj.file_type}/{file_obj.internal_name}",
@@ -31,8 +33,7 @@ class S3FilesManager(FileManger):
         )
 
     def read_signed_url(self, file_obj, duration=60 * 60):
-        config, bucket_name = get_client_config(self.bucket_type, external=True)
-        s3 = boto3.client("s3", **config)
+        s3, bucket_name = get_client(self.bucket_type, external=True)
         return s3.generate_presigned_url(
             "get_object",
             Params={
@@ -42,9 +43,25 @@ class S3FilesManager(FileManger):
             ExpiresIn=duration,  # seconds
         )
 
+    def read_signed_urls(self, file_objs, duration=60 * 60):
+        """
+        Read urls of many files, signed with one client
+        """
+        s3, bucket_name = get_client(self.bucket_type, external=True)
+        return [
+            s3.generate_presigned_url(
+                "get_object",
+                Params={
+                    "Bucket": bucket_name,
+                    "Key": f"{file_obj.file_type}/{file_obj.internal_name}",
+                },
+                ExpiresIn=duration,  # seconds
+            )
+            for file_obj in file_objs
+        ]
+
     def put_object(self, file_obj, file, **kwargs):
-        config, bucket_name = get_client_config(self.bucket_type)
-        s3 = boto3.client("s3", **config)
+        s3, bucket_name = get_client(self.bucket_type)
         return s3.put_object(
             Body=file,
             Bucket=bucket_name,
@@ -53,16 +70,32 @@ class S3FilesManager(FileManger):
         )
 
     def get_object(self, file_obj, **kwargs):
-        config, bucket_name = get_client_config(self.bucket_type)
-        s3 = boto3.client("s3", **config)
+        s3, bucket_name = get_client(self.bucket_type)
         return s3.get_object(
             Bucket=bucket_name,
             Key=f"{file_obj.file_type}/{file_obj.internal_name}",
             **kwargs,
         )
 
+    def upload_fileobj(self, file_obj, file, **kwargs):
+        """
+        Streams a file like object to the bucket, in parts when it is large
+        """
+        s3, bucket_name = get_client(self.bucket_type)
+        return s3.upload_fileobj(
+            file,
+            bucket_name,
+            f"{file_obj.file_type}/{file_obj.internal_name}",
+            ExtraArgs=kwargs,
+            Config=get_transfer_config(),
+        )
+
     def file_contents(self, file_obj):
         response = self.get_object(file_obj)
         content_type = response["ContentType"]
-        content = response["Body"].read()
+        content = read_body(response)
         return content_type, content
+
+    def stream_contents(self, file_obj, chunk_size=None):
+        response = self.get_object(file_obj)
+        return response["ContentType"], iter_body(response["Body"], chunk_size)
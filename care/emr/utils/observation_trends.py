@@ -0,0 +1,111 @@
+from collections import defaultdict
+from enum import Enum
+
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    F,
+    FloatField,
+    Max,
+    Min,
+    Q,
+    When,
+    Window,
+)
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, RowNumber, Trunc
+
+from care.emr.resources.questionnaire.spec import QuestionType
+
+NUMBER_PATTERN = r"^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$"
+
+
+class ObservationBucket(str, Enum):
+    hour = "hour"
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+def annotate_code(queryset, codes):
+    """
+    Observations of any of the codes, filtered on the same expressions as the
+    patient and encounter code indexes
+    """
+    code_filter = Q()
+    for code in codes:
+        code_filter |= Q(code_system=code.system, code_value=code.code)
+    return queryset.annotate(
+        code_system=KT("main_code__system"), code_value=KT("main_code__code")
+    ).filter(code_filter)
+
+
+def numeric_value():
+    """
+    Value of numeric observations as a float, null for the other observations or
+    when the answer is not a number
+    """
+    return Case(
+        When(
+            value_type__in=[QuestionType.integer.value, QuestionType.decimal.value],
+            value__value__regex=NUMBER_PATTERN,
+            then=Cast(KT("value__value"), FloatField()),
+        ),
+        When(
+            value_type=QuestionType.quantity.value,
+            value__value_quantity__value__isnull=False,
+            then=Cast(KT("value__value_quantity__value"), FloatField()),
+        ),
+        default=None,
+        output_field=FloatField(),
+    )
+
+
+def get_latest_observations(queryset, codes, limit):
+    """
+    The latest `limit` observations of each code in a single query, as a mapping
+    of (system, code) to observations latest first
+    """
+    ranked = (
+        annotate_code(queryset, codes)
+        .annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F("code_system"), F("code_value")],
+                order_by=[F("effective_datetime").desc(), F("id").desc()],
+            )
+        )
+        .filter(rank__lte=limit)
+        .order_by("code_system", "code_value", "rank")
+    )
+    results = defaultdict(list)
+    for observation in ranked:
+        results[(observation.code_system, observation.code_value)].append(observation)
+    return results
+
+
+def get_observation_buckets(queryset, codes, bucket):
+    """
+    Count, minimum, maximum and average of the numeric values of each code per
+    `bucket` of effective time, as a mapping of (system, code) to buckets oldest
+    first
+    """
+    value = numeric_value()
+    rows = (
+        annotate_code(queryset, codes)
+        .annotate(start=Trunc("effective_datetime", bucket))
+        .order_by()
+        .values("code_system", "code_value", "start")
+        .annotate(
+            count=Count("id"),
+            min=Min(value),
+            max=Max(value),
+            avg=Avg(value),
+        )
+        .order_by("code_system", "code_value", "start")
+    )
+    results = defaultdict(list)
+    for row in rows:
+        results[(row.pop("code_system"), row.pop("code_value"))].append(row)
+    return results
@@ -0,0 +1,217 @@
+import datetime
+import math
+from datetime import timedelta
+
+from dateutil.parser import parse
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from care.emr.models.scheduling.booking import TokenSlot
+from care.emr.models.scheduling.schedule import Availability, AvailabilityException
+from care.emr.resources.scheduling.schedule.spec import SlotTypeOptions
+from care.utils.lock import Lock
+
+SLOT_HORIZON_CACHE_KEY = "slots:materialized:{resource_id}"
+# Seconds to wait for another materialization of the same resource to finish
+SLOT_MATERIALIZATION_LOCK_WAIT = 10
+# Sanity cap, a window cannot have more slots than there are minutes in a day
+MAX_SLOTS_PER_WINDOW = 24 * 60
+
+
+def convert_availability_to_slots(availabilities):
+    slots = {}
+    for availability in availabilities:
+        start_time = parse(availability["availability"]["start_time"])
+        end_time = parse(availability["availability"]["end_time"])
+        slot_size_in_minutes = availability["slot_size_in_minutes"]
+        availability_id = availability["availability_id"]
+        if slot_size_in_minutes <= 0:
+            continue
+        slot_size = datetime.timedelta(minutes=slot_size_in_minutes)
+        slot_count = min(
+            max(math.ceil((end_time - start_time) / slot_size), 0),
+            MAX_SLOTS_PER_WINDOW,
+        )
+        for index in range(slot_count):
+            current_time = start_time + index * slot_size
+            slots[f"{current_time.time()}-{(current_time + slot_size).time()}"] = {
+                "start_time": current_time.time(),
+                "end_time": (current_time + slot_size).time(),
+                "availability_id": availability_id,
+            }
+    return slots
+
+
+def get_day_range(from_date, to_date):
+    """
+    Bounds of the slots starting in [from_date, to_date], slots are stored in UTC
+    """
+    return (
+        datetime.datetime.combine(from_date, datetime.time.min, tzinfo=datetime.UTC),
+        datetime.datetime.combine(
+            to_date + timedelta(days=1), datetime.time.min, tzinfo=datetime.UTC
+        ),
+    )
+
+
+def get_materialization_window():
+    today = timezone.localdate()
+    return today, today + timedelta(days=settings.SLOT_MATERIALIZATION_DAYS)
+
+
+def is_excluded(slot, exceptions):
+    return any(
+        exception.start_time < slot["end_time"]
+        and exception.end_time > slot["start_time"]
+        for exception in exceptions
+    )
+
+
+def compute_slots(resource, from_date, to_date):
+    """
+    Slots the resource should have between from_date and to_date (inclusive), as
+    a set of (start_datetime, end_datetime, availability_id)
+    """
+    availabilities = list(
+        Availability.objects.filter(
+            slot_type=SlotTypeOptions.appointment.value,
+            schedule__resource=resource,
+            schedule__valid_from__lte=to_date,
+            schedule__valid_to__gte=from_date,
+        ).select_related("schedule")
+    )
+    exceptions = list(
+        AvailabilityException.objects.filter(
+            resource=resource, valid_from__lte=to_date, valid_to__gte=from_date
+        )
+    )
+
+    slots = set()
+    day = from_date
+    while day <= to_date:
+        # Schedules are matched against the start of the day like the date lookups
+        day_start = timezone.make_aware(
+            datetime.datetime.combine(day, datetime.time.min)
+        )
+        day_availabilities = [
+            {
+                "availability": day_availability,
+                "slot_size_in_minutes": availability.slot_size_in_minutes,
+                "availability_id": availability.id,
+            }
+            for availability in availabilities
+            if availability.schedule.valid_from
+            <= day_start
+            <= availability.schedule.valid_to
+            for day_availability in availability.availability
+            if day_availability["day_of_week"] == day.weekday()
+        ]
+        day_exceptions = [
+            exception
+            for exception in exceptions
+            if exception.valid_from <= day <= exception.valid_to
+        ]
+        for slot in convert_availability_to_slots(day_availabilities).values():
+            if is_excluded(slot, day_exceptions):
+                continue
+            slots.add(
+                (
+                    datetime.datetime.combine(
+                        day, slot["start_time"], tzinfo=datetime.UTC
+                    ),
+                    datetime.datetime.combine(
+                        day, slot["end_time"], tzinfo=datetime.UTC
+                    ),
+                    slot["availability_id"],
+                )
+            )
+        day += timedelta(days=1)
+    return slots
+
+
+def materialize_slots(resource, from_date, to_date):
+    """
+    Creates the missing slots of the resource between from_date and to_date and
+    removes the ones that are no longer available, booked slots are always kept
+    """
+    range_start, range_end = get_day_range(from_date, to_date)
+    with (
+        Lock(
+            f"slots:resource:{resource.id}",
+            blocking_timeout=SLOT_MATERIALIZATION_LOCK_WAIT,
+        ),
+        transaction.atomic(),
+    ):
+        expected = compute_slots(resource, from_date, to_date)
+        present = set()
+        stale = []
+        for slot_id, start, end, availability_id, allocated in TokenSlot.objects.filter(
+            resource=resource,
+            start_datetime__gte=range_start,
+            start_datetime__lt=range_end,
+        ).values_list(
+            "id", "start_datetime", "end_datetime", "availability_id", "allocated"
+        ):
+            key = (start, end, availability_id)
+            if key in expected:
+                present.add(key)
+            elif not allocated:
+                stale.append(slot_id)
+        # A slot booked since it was read is kept, bookings do not take the lock
+        TokenSlot.objects.filter(id__in=stale, allocated=0).update(deleted=True)
+        TokenSlot.objects.bulk_create(
+            [
+                TokenSlot(
+                    resource=resource,
+                    start_datetime=start,
+                    end_datetime=end,
+                    availability_id=availability_id,
+                )
+                for start, end, availability_id in sorted(expected - present)
+            ],
+            batch_size=1000,
+        )
+
+
+def materialize_resource_window(resource):
+    """
+    Materializes the rolling window of the resource and records how far it goes
+    """
+    from_date, to_date = get_materialization_window()
+    materialize_slots(resource, from_date, to_date)
+    cache.set(
+        SLOT_HORIZON_CACHE_KEY.format(resource_id=resource.id),
+        to_date.isoformat(),
+        timeout=settings.SLOT_MATERIALIZATION_DAYS * 24 * 60 * 60,
+    )
+
+
+def ensure_slots_materialized(resource, day):
+    """
+    Slots are materialized ahead of time, this only does work when the window of
+    the resource has not been materialized yet or the day is beyond it
+    """
+    from_date, to_date = get_materialization_window()
+    if day < from_date:
+        return
+    if day > to_date:
+        materialize_slots(resource, day, day)
+        return
+    horizon = cache.get(SLOT_HORIZON_CACHE_KEY.format(resource_id=resource.id))
+    if horizon is None or datetime.date.fromisoformat(horizon) < day:
+        materialize_resource_window(resource)
+
+
+def get_slots_for_day(resource, day):
+    range_start, range_end = get_day_range(day, day)
+    return (
+        TokenSlot.objects.filter(
+            resource=resource,
+            start_datetime__gte=range_start,
+            start_datetime__lt=range_end,
+        )
+        .select_related("availability")
+        .order_by("start_datetime")
+    )
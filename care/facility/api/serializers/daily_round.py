@@ -1,6 +1,7 @@
 from datetime import timedelta
 from typing import TYPE_CHECKING
 
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 from django.utils.timezone import localtime, now
@@ -20,6 +21,7 @@ from care.users.api.serializers.user import UserBaseMinimumSerializer
 from care.utils.notification_handler import NotificationGenerator
 from care.utils.queryset.facility import get_home_facility_queryset
 from care.utils.serializers.fields import ChoiceField
+from care.utils.timeseries import DOWNSAMPLE_METHODS, LTTB
 
 if TYPE_CHECKING:
     from care.facility.models.patient_consultation import PatientConsultation
@@ -312,3 +314,47 @@ class DailyRoundSerializer(serializers.ModelSerializer):
             msg = "Cannot create an update in the future"
             raise serializers.ValidationError(msg)
         return value
+
+
+class DailyRoundSeriesSerializer(serializers.Serializer):
+    ROUND_FIELDS = {
+        field.name
+        for field in DailyRound._meta.get_fields()  # noqa: SLF001
+        if field.name not in ("id", "external_id", "taken_at")
+    }
+
+    fields = serializers.CharField(
+        help_text="Comma separated fields, `bp.systolic` reads a key of a json field"
+    )
+    taken_at_after = serializers.DateTimeField(required=False)
+    taken_at_before = serializers.DateTimeField(required=False)
+    cursor = serializers.CharField(required=False)
+    points = serializers.IntegerField(
+        required=False,
+        min_value=3,
+        help_text="Downsample each field to about this many points",
+    )
+    downsample = serializers.ChoiceField(choices=DOWNSAMPLE_METHODS, default=LTTB)
+
+    def validate_fields(self, value):
+        fields = list(dict.fromkeys(field for field in value.split(",") if field))
+        if not fields:
+            msg = "Field not present"
+            raise serializers.ValidationError(msg)
+        if len(fields) >= self.context["max_fields"]:
+            msg = f"Must be smaller than {self.context['max_fields']}"
+            raise serializers.ValidationError(msg)
+        invalid = [
+            field for field in fields if field.split(".")[0] not in self.ROUND_FIELDS
+        ]
+        if invalid:
+            msg = f"Not a valid field: {', '.join(invalid)}"
+            raise serializers.ValidationError(msg)
+        return fields
+
+    def validate(self, attrs):
+        if attrs.get("points", 0) > settings.DAILY_ROUND_SERIES_MAX_ROWS:
+            raise ValidationError(
+                {"points": f"Must be at most {settings.DAILY_ROUND_SERIES_MAX_ROWS}"}
+            )
+        return attrs
@@ -1,7 +1,10 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags, quote_etag
 from django_filters import rest_framework as filters
 from drf_spectacular.utils import extend_schema
 from dry_rest_permissions.generics import DRYPermissions
-from rest_framework import mixins
+from rest_framework import mixins, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
@@ -9,9 +12,19 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from care.facility.api.serializers.daily_round import DailyRoundSerializer
+from care.facility.api.serializers.daily_round import (
+    DailyRoundSerializer,
+    DailyRoundSeriesSerializer,
+)
 from care.facility.api.viewsets.mixins.access import AssetUserAccessMixin
 from care.facility.models.daily_round import DailyRound
+from care.facility.utils.daily_round.series import (
+    SERIES_CACHE_KEY,
+    InvalidCursorError,
+    get_series,
+    get_series_etag,
+    get_series_queryset,
+)
 from care.utils.queryset.consultation import get_consultation_queryset
 
 DailyRoundAttributes = [f.name for f in DailyRound._meta.get_fields()]  # noqa: SLF001
@@ -128,3 +141,48 @@ class DailyRoundsViewSet(
             "page_size": self.PAGE_SIZE,
         }
         return Response(final_data)
+
+    @extend_schema(tags=["daily_rounds"], parameters=[DailyRoundSeriesSerializer])
+    @action(methods=["GET"], detail=False)
+    def series(self, request, **kwargs):
+        """
+        Columnar alternative to analyse for charting, the rounds of the window
+        are returned in the order they were taken as one array per field.
+        Responses carry an ETag, windows that did not change since are answered
+        with a 304 or from the cache.
+        """
+        serializer = DailyRoundSeriesSerializer(
+            data=request.query_params, context={"max_fields": self.MAX_FIELDS}
+        )
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        consultation = get_object_or_404(
+            get_consultation_queryset(request.user).filter(
+                external_id=self.kwargs["consultation_external_id"]
+            )
+        )
+        queryset = get_series_queryset(
+            consultation, params.get("taken_at_after"), params.get("taken_at_before")
+        )
+        etag = get_series_etag(queryset, {"consultation": consultation.id, **params})
+        headers = {"ETag": quote_etag(etag), "Cache-Control": "private, no-cache"}
+        if quote_etag(etag) in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cache_key = SERIES_CACHE_KEY.format(etag=etag)
+        data = cache.get(cache_key)
+        if data is None:
+            try:
+                data = get_series(
+                    queryset,
+                    params["fields"],
+                    settings.DAILY_ROUND_SERIES_MAX_ROWS,
+                    cursor=params.get("cursor"),
+                    points=params.get("points"),
+                    method=params["downsample"],
+                )
+            except InvalidCursorError as e:
+                raise ValidationError({"cursor": "Invalid cursor"}) from e
+            cache.set(cache_key, data, timeout=settings.DAILY_ROUND_SERIES_CACHE_TTL)
+        return Response(data, headers=headers)
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from care.utils.jwks.token_generator import generate_jwt, get_cached_jwt, token_cache
+
+
+class Command(BaseCommand):
+    """
+    Compare signing a fresh RS256 token for every middleware call against
+    reusing a cached token
+    """
+
+    help = "Benchmark middleware JWT generation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000)
+
+    def measure(self, label, func, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label}: {elapsed / iterations * 1_000_000:.1f}us per token, "
+            f"{iterations / elapsed:.0f} tokens/s"
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        token_cache.clear()
+        self.measure("RS256 sign", generate_jwt, iterations)
+        self.measure("cached", get_cached_jwt, iterations)
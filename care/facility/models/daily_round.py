@@ -609,6 +609,10 @@ class DailyRound(PatientBaseModel):
     def has_analyse_permission(request):
         return DailyRound.has_read_permission(request)
 
+    @staticmethod
+    def has_series_permission(request):
+        return DailyRound.has_read_permission(request)
+
     def has_object_read_permission(self, request):
         if request.user.user_type < User.TYPE_VALUE_MAP["NurseReadOnly"]:
             return False
@@ -2,11 +2,16 @@ import time
 import uuid
 from uuid import uuid4
 
-import boto3
 from django.contrib.auth import get_user_model
 from django.db import models
 
-from care.utils.csp.config import BucketType, get_client_config
+from care.utils.csp.client import (
+    get_client,
+    get_transfer_config,
+    iter_body,
+    read_body,
+)
+from care.utils.csp.config import BucketType
 from care.utils.models.base import BaseManager
 
 User = get_user_model()
@@ -67,8 +72,7 @@ class BaseFileUpload(models.Model):
     def signed_url(
         self, duration=60 * 60, mime_type=None, bucket_type=BucketType.PATIENT
     ):
-        config, bucket_name = get_client_config(bucket_type, external=True)
-        s3 = boto3.client("s3", **config)
+        s3, bucket_name = get_client(bucket_type, external=True)
         params = {
             "Bucket": bucket_name,
             "Key": f"{self.FileType(self.file_type).name}/{self.internal_name}",
@@ -82,8 +86,7 @@ class BaseFileUpload(models.Model):
         )
 
     def read_signed_url(self, duration=60 * 60, bucket_type=BucketType.PATIENT):
-        config, bucket_name = get_client_config(bucket_type, external=True)
-        s3 = boto3.client("s3", **config)
+        s3, bucket_name = get_client(bucket_type, external=True)
         return s3.generate_presigned_url(
             "get_object",
             Params={
@@ -94,8 +97,7 @@ class BaseFileUpload(models.Model):
         )
 
     def put_object(self, file, bucket_type=BucketType.PATIENT, **kwargs):
-        config, bucket_name = get_client_config(bucket_type)
-        s3 = boto3.client("s3", **config)
+        s3, bucket_name = get_client(bucket_type)
         return s3.put_object(
             Body=file,
             Bucket=bucket_name,
@@ -104,20 +106,36 @@ class BaseFileUpload(models.Model):
         )
 
     def get_object(self, bucket_type=BucketType.PATIENT, **kwargs):
-        config, bucket_name = get_client_config(bucket_type)
-        s3 = boto3.client("s3", **config)
+        s3, bucket_name = get_client(bucket_type)
         return s3.get_object(
             Bucket=bucket_name,
             Key=f"{self.FileType(self.file_type).name}/{self.internal_name}",
             **kwargs,
         )
 
+    def upload_fileobj(self, file, bucket_type=BucketType.PATIENT, **kwargs):
+        """
+        Streams a file like object to the bucket, in parts when it is large
+        """
+        s3, bucket_name = get_client(bucket_type)
+        return s3.upload_fileobj(
+            file,
+            bucket_name,
+            f"{self.FileType(self.file_type).name}/{self.internal_name}",
+            ExtraArgs=kwargs,
+            Config=get_transfer_config(),
+        )
+
     def file_contents(self):
         response = self.get_object()
         content_type = response["ContentType"]
-        content = response["Body"].read()
+        content = read_body(response)
         return content_type, content
 
+    def stream_contents(self, chunk_size=None):
+        response = self.get_object()
+        return response["ContentType"], iter_body(response["Body"], chunk_size)
+
 
 class FileUpload(BaseFileUpload):
     """
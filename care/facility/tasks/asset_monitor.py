@@ -1,6 +1,7 @@
 import logging
 from datetime import datetime
-from typing import TYPE_CHECKING, Any
+from functools import partial
+from typing import TYPE_CHECKING
 
 from celery import shared_task
 from django.contrib.contenttypes.models import ContentType
@@ -9,6 +10,7 @@ from django.utils import timezone
 
 from care.facility.models.asset import Asset, AvailabilityRecord, AvailabilityStatus
 from care.utils.assetintegration.asset_classes import AssetClasses
+from care.utils.assetintegration.middleware_status import probe_middlewares
 
 if TYPE_CHECKING:
     from care.utils.assetintegration.base import BaseAssetIntegration
@@ -16,8 +18,144 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+def resolve_middleware(asset):
+    return (
+        asset.meta.get("middleware_hostname")  # From asset configuration
+        or asset.current_location.middleware_address  # From location configuration
+        or asset.current_location.facility.middleware_address  # From facility configuration
+    )
+
+
+def group_assets_by_middleware(assets):
+    """
+    Groups assets by the status endpoint they are polled from, every middleware
+    reports the status of all the devices it manages in a single response
+    """
+    groups = {}
+    for asset in assets:
+        # Skipping if local IP address is not present
+        if not asset.meta.get("local_ip_address", None):
+            continue
+        resolved_middleware = resolve_middleware(asset)
+        if not resolved_middleware:
+            logger.warning(
+                "Asset %s does not have a middleware hostname", asset.external_id
+            )
+            continue
+        try:
+            # Creating an instance of the asset class
+            asset_class: BaseAssetIntegration = AssetClasses[asset.asset_class].value(
+                {
+                    **asset.meta,
+                    "id": str(asset.external_id),
+                    "middleware_hostname": resolved_middleware,
+                }
+            )
+        except Exception as e:
+            logger.warning(
+                "Invalid configuration for asset %s: %s", asset.external_id, e
+            )
+            continue
+        is_camera = asset.asset_class == "ONVIF"
+        url = asset_class.get_url("cameras/status" if is_camera else "devices/status")
+        group = groups.setdefault(
+            (url, is_camera), {"client": asset_class, "assets": []}
+        )
+        group["assets"].append(asset)
+    return groups
+
+
+def camera_config(asset):
+    # TODO: Remove this block after all assets are migrated to the new middleware
+    asset_config = asset.meta["camera_access_key"].split(":")
+    return {
+        "hostname": asset.meta.get("local_ip_address"),
+        "port": 80,
+        "username": asset_config[0],
+        "password": asset_config[1],
+    }
+
+
+def fetch_camera_status(url, group):
+    asset_class = group["client"]
+    try:
+        return asset_class.api_post(
+            url, data=[camera_config(asset) for asset in group["assets"]]
+        )
+    except Exception:
+        return asset_class.api_get(url)
+
+
+def fetch_statuses(groups):
+    """
+    Status of every group, device statuses are shared with the location monitor
+    """
+    device_probes = {}
+    camera_probes = {}
+    for (url, is_camera), group in groups.items():
+        if is_camera:
+            camera_probes[url] = partial(fetch_camera_status, url, group)
+        else:
+            device_probes[url] = partial(group["client"].api_get, url)
+    device_statuses = probe_middlewares(device_probes)
+    camera_statuses = probe_middlewares(camera_probes, shared=False)
+    return {
+        (url, is_camera): (camera_statuses if is_camera else device_statuses)[url]
+        for url, is_camera in groups
+    }
+
+
+def get_last_records(content_type, external_ids):
+    """
+    Latest availability record of every asset, in a single query
+    """
+    return {
+        record.object_external_id: record
+        for record in AvailabilityRecord.objects.filter(
+            content_type=content_type, object_external_id__in=external_ids
+        )
+        .order_by("object_external_id", "-timestamp")
+        .distinct("object_external_id")
+    }
+
+
+def get_status_changes(asset, result, last_record, content_type):
+    # If no status is returned, setting default status as down
+    if not result or "error" in result:
+        result = [{"time": timezone.now().isoformat(), "status": []}]
+
+    local_ip_address = asset.meta.get("local_ip_address")
+    records = []
+    last_status = last_record.status if last_record else None
+    last_timestamp = last_record.timestamp if last_record else None
+    for status_record in result:
+        asset_status = (status_record.get("status") or {}).get(local_ip_address, "down")
+        # Setting new status based on the status returned by the device
+        new_status = AvailabilityStatus.DOWN
+        if asset_status == "up":
+            new_status = AvailabilityStatus.OPERATIONAL
+        elif asset_status == "maintenance":
+            new_status = AvailabilityStatus.UNDER_MAINTENANCE
+
+        timestamp = datetime.fromisoformat(status_record.get("time"))
+        # Creating a new record if the status has changed
+        if last_timestamp is None or (
+            timestamp > last_timestamp and last_status != new_status.value
+        ):
+            records.append(
+                AvailabilityRecord(
+                    content_type=content_type,
+                    object_external_id=asset.external_id,
+                    status=new_status.value,
+                    timestamp=timestamp,
+                )
+            )
+            last_status, last_timestamp = new_status.value, timestamp
+    return records
+
+
 @shared_task
-def check_asset_status():  # noqa: PLR0912
+def check_asset_status():
     logger.info("Checking Asset Status: %s", timezone.now())
 
     assets = (
@@ -35,109 +173,27 @@ def check_asset_status():  # noqa: PLR0912
         )
     )
     asset_content_type = ContentType.objects.get_for_model(Asset)
+    groups = group_assets_by_middleware(assets)
 
-    for asset in assets:
-        # Skipping if local IP address is not present
-        if not asset.meta.get("local_ip_address", None):
-            continue
-        try:
-            # Fetching middleware hostname
-            resolved_middleware = (
-                asset.meta.get(
-                    "middleware_hostname",
-                )  # From asset configuration
-                or asset.current_location.middleware_address  # From location configuration
-                or asset.current_location.facility.middleware_address  # From facility configuration
-            )
-
-            if not resolved_middleware:
-                logger.warning(
-                    "Asset %s does not have a middleware hostname", asset.external_id
-                )
-                continue
-
-            result: Any = None
+    results = fetch_statuses(groups)
 
+    last_records = get_last_records(
+        asset_content_type,
+        [asset.external_id for group in groups.values() for asset in group["assets"]],
+    )
+    records = []
+    for key, group in groups.items():
+        for asset in group["assets"]:
             try:
-                # Creating an instance of the asset class
-                asset_class: BaseAssetIntegration = AssetClasses[
-                    asset.asset_class
-                ].value(
-                    {
-                        **asset.meta,
-                        "id": str(asset.external_id),
-                        "middleware_hostname": resolved_middleware,
-                    }
-                )
-                # Fetching the status of the device
-                if asset.asset_class == "ONVIF":
-                    try:
-                        # TODO: Remove this block after all assets are migrated to the new middleware
-                        asset_config = asset.meta["camera_access_key"].split(":")
-                        assets_config = [
-                            {
-                                "hostname": asset.meta.get("local_ip_address"),
-                                "port": 80,
-                                "username": asset_config[0],
-                                "password": asset_config[1],
-                            }
-                        ]
-
-                        result = asset_class.api_post(
-                            asset_class.get_url("cameras/status"), data=assets_config
-                        )
-                    except Exception:
-                        result = asset_class.api_get(
-                            asset_class.get_url("cameras/status")
-                        )
-                else:
-                    result = asset_class.api_get(asset_class.get_url("devices/status"))
-            except Exception as e:
-                logger.warning("Middleware %s is down: %s", resolved_middleware, e)
-
-            # If no status is returned, setting default status as down
-            if not result or "error" in result:
-                result = [{"time": timezone.now().isoformat(), "status": []}]
-
-            # Setting new status as down by default
-            new_status = AvailabilityStatus.DOWN
-            for status_record in result:
-                if asset.meta.get("local_ip_address") in status_record.get(
-                    "status", {}
-                ):
-                    asset_status = status_record["status"][
-                        asset.meta.get("local_ip_address")
-                    ]
-                else:
-                    asset_status = "down"
-
-                # Fetching the last record of the asset
-                last_record = (
-                    AvailabilityRecord.objects.filter(
-                        content_type=asset_content_type,
-                        object_external_id=asset.external_id,
+                records.extend(
+                    get_status_changes(
+                        asset,
+                        results[key],
+                        last_records.get(asset.external_id),
+                        asset_content_type,
                     )
-                    .order_by("-timestamp")
-                    .first()
                 )
-
-                # Setting new status based on the status returned by the device
-                if asset_status == "up":
-                    new_status = AvailabilityStatus.OPERATIONAL
-                elif asset_status == "maintenance":
-                    new_status = AvailabilityStatus.UNDER_MAINTENANCE
-
-                # Creating a new record if the status has changed
-                if not last_record or (
-                    datetime.fromisoformat(status_record.get("time"))
-                    > last_record.timestamp
-                    and last_record.status != new_status.value
-                ):
-                    AvailabilityRecord.objects.create(
-                        content_type=asset_content_type,
-                        object_external_id=asset.external_id,
-                        status=new_status.value,
-                        timestamp=status_record.get("time", timezone.now()),
-                    )
-        except Exception as e:
-            logger.error("Error in Asset Status Check: %s", e)
+            except Exception as e:
+                logger.error("Error in Asset Status Check: %s", e)
+    AvailabilityRecord.objects.bulk_create(records, ignore_conflicts=True)
+    logger.info("Checked %s middlewares, %s status changes", len(groups), len(records))
@@ -1,82 +1,106 @@
 import logging
-from typing import Any
+from functools import partial
 
 from celery import shared_task
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 
 from care.facility.models.asset import (
+    Asset,
     AssetLocation,
     AvailabilityRecord,
     AvailabilityStatus,
 )
-from care.utils.assetintegration.base import BaseAssetIntegration
+from care.utils.assetintegration.middleware_status import (
+    fetch_device_status,
+    get_device_status_url,
+    probe_middlewares,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def get_insecure_middlewares():
+    """
+    (location id, middleware hostname) of the middlewares that assets reach over
+    an insecure connection, the hostname is None when the asset uses the one of
+    its location
+    """
+    return {
+        (location_id, hostname or None)
+        for location_id, hostname in Asset.objects.filter(
+            meta__insecure_connection=True
+        ).values_list("current_location_id", "meta__middleware_hostname")
+    }
+
+
 @shared_task
 def check_location_status():
     location_content_type = ContentType.objects.get_for_model(AssetLocation)
     logger.info("Checking Location Status: %s", timezone.now())
-    locations = AssetLocation.objects.all()
+    locations = AssetLocation.objects.select_related("facility").only(
+        "external_id", "middleware_address", "facility__middleware_address"
+    )
+    insecure_middlewares = get_insecure_middlewares()
 
+    # Locations behind the same middleware share a single probe
+    location_urls = {}
     for location in locations:
-        try:
-            # Resolving the middleware hostname from location or facility configuration [ in that order ]
-            resolved_middleware = (
-                location.middleware_address or location.facility.middleware_address
+        # Resolving the middleware hostname from location or facility configuration [ in that order ]
+        resolved_middleware = (
+            location.middleware_address or location.facility.middleware_address
+        )
+        if not resolved_middleware:
+            logger.warning(
+                "No middleware hostname resolved for location %s",
+                location.external_id,
             )
+            continue
+        # Probed the way the assets behind the middleware reach it
+        insecure_connection = bool(
+            insecure_middlewares
+            & {(location.id, resolved_middleware), (location.id, None)}
+        )
+        location_urls[location.external_id] = get_device_status_url(
+            resolved_middleware, insecure_connection
+        )
 
-            if not resolved_middleware:
-                logger.warning(
-                    "No middleware hostname resolved for location %s",
-                    location.external_id,
-                )
-                continue
-
-            result: Any = None
-
-            # Setting new status as down by default
-            new_status = AvailabilityStatus.DOWN
-
-            try:
-                # To check for uptime of just the middleware, we do not require a specific asset class
-                location_class = BaseAssetIntegration(
-                    {"middleware_hostname": resolved_middleware, "local_ip_address": ""}
-                )
-                # Fetching this endpoint to check if the middleware is up
-                result = location_class.api_get(
-                    location_class.get_url("devices/status")
-                )
-
-                # Setting new status as operational if the middleware is up
-                if result:
-                    new_status = AvailabilityStatus.OPERATIONAL
-
-            except Exception as e:
-                logger.warning("Middleware %s is down: %s", resolved_middleware, e)
+    # Fetching this endpoint to check if the middleware is up
+    results = probe_middlewares(
+        {url: partial(fetch_device_status, url) for url in set(location_urls.values())}
+    )
 
-            # Fetching the last record of the location
-            last_record = (
-                AvailabilityRecord.objects.filter(
-                    content_type=location_content_type,
-                    object_external_id=location.external_id,
-                )
-                .order_by("-timestamp")
-                .first()
-            )
+    last_statuses = dict(
+        AvailabilityRecord.objects.filter(
+            content_type=location_content_type,
+            object_external_id__in=location_urls.keys(),
+        )
+        .order_by("object_external_id", "-timestamp")
+        .distinct("object_external_id")
+        .values_list("object_external_id", "status")
+    )
 
-            # Creating a new record if the status has changed
-            if not last_record or last_record.status != new_status.value:
-                AvailabilityRecord.objects.create(
+    now = timezone.now()
+    records = []
+    for external_id, url in location_urls.items():
+        # Setting new status as operational if the middleware is up
+        new_status = (
+            AvailabilityStatus.OPERATIONAL if results[url] else AvailabilityStatus.DOWN
+        )
+        # Creating a new record if the status has changed
+        if last_statuses.get(external_id) != new_status.value:
+            records.append(
+                AvailabilityRecord(
                     content_type=location_content_type,
-                    object_external_id=location.external_id,
+                    object_external_id=external_id,
                     status=new_status.value,
-                    timestamp=timezone.now(),
+                    timestamp=now,
                 )
-            logger.info(
-                "Location %s status: %s", location.external_id, new_status.value
             )
-        except Exception as e:
-            logger.error("Error in Location Status Check: %s", e)
+    AvailabilityRecord.objects.bulk_create(records, ignore_conflicts=True)
+    logger.info(
+        "Checked %s locations behind %s middlewares, %s status changes",
+        len(location_urls),
+        len(results),
+        len(records),
+    )
@@ -8,14 +8,14 @@ import requests
 from celery import shared_task
 from celery.utils.log import get_task_logger
 
-from care.utils.jwks.token_generator import generate_jwt
+from care.utils.jwks.token_generator import get_cached_jwt
 
 logger: Logger = get_task_logger(__name__)
 
 
 def _get_headers() -> dict:
     return {
-        "Authorization": "Care_Bearer " + generate_jwt(),
+        "Authorization": "Care_Bearer " + get_cached_jwt(),
         "Content-Type": "application/json",
     }
 
@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from care.facility.models.asset import Asset
+from care.facility.tasks.asset_monitor import group_assets_by_middleware
+from care.facility.tasks.location_monitor import check_location_status
+from care.utils.tests.test_utils import TestUtils
+
+
+@override_settings(IS_PRODUCTION=False)
+class LocationMonitorTestCase(TestUtils, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.state = cls.create_state()
+        cls.district = cls.create_district(cls.state)
+        cls.local_body = cls.create_local_body(cls.district)
+        cls.user = cls.create_super_user("su", cls.district)
+        cls.facility = cls.create_facility(cls.user, cls.district, cls.local_body)
+        cls.insecure_location = cls.create_asset_location(
+            cls.facility, middleware_address="insecure.middleware.local"
+        )
+        cls.secure_location = cls.create_asset_location(
+            cls.facility, middleware_address="secure.middleware.local"
+        )
+        cls.create_asset(
+            cls.insecure_location,
+            asset_class="HL7MONITOR",
+            meta={"local_ip_address": "192.168.1.10", "insecure_connection": True},
+        )
+        cls.create_asset(
+            cls.secure_location,
+            asset_class="HL7MONITOR",
+            meta={"local_ip_address": "192.168.1.11"},
+        )
+
+    def probed_location_urls(self):
+        with patch(
+            "care.facility.tasks.location_monitor.probe_middlewares",
+            side_effect=lambda probes: dict.fromkeys(probes, True),
+        ) as probe_middlewares:
+            check_location_status()
+        return set(probe_middlewares.call_args.args[0])
+
+    def test_locations_are_probed_like_their_assets(self):
+        asset_urls = {
+            url
+            for url, _ in group_assets_by_middleware(
+                Asset.objects.select_related("current_location__facility")
+            )
+        }
+        self.assertEqual(
+            asset_urls,
+            {
+                "http://insecure.middleware.local/devices/status",
+                "https://secure.middleware.local/devices/status",
+            },
+        )
+        self.assertEqual(self.probed_location_urls(), asset_urls)
+
+    @override_settings(IS_PRODUCTION=True)
+    def test_production_is_always_secure(self):
+        self.assertEqual(
+            self.probed_location_urls(),
+            {
+                "https://insecure.middleware.local/devices/status",
+                "https://secure.middleware.local/devices/status",
+            },
+        )
@@ -14,7 +14,10 @@ from care.facility.models.patient_consultation import (
     CATEGORY_CHOICES,
     PatientConsultation,
 )
-from care.utils.tests.test_utils import TestUtils
+from care.facility.utils.reports.discharge_summary import (
+    generate_and_upload_discharge_summary,
+)
+from care.utils.tests.test_utils import OverrideCache, TestUtils
 
 
 class TestPatientConsultation(TestUtils, APITestCase):
@@ -247,7 +250,7 @@ class TestPatientConsultation(TestUtils, APITestCase):
             suggestion=SuggestionChoices.A,
             encounter_date=make_aware(datetime.datetime(2020, 4, 1, 15, 30, 00)),
         )
-        with patch.object(FileUpload, "put_object"):
+        with patch.object(FileUpload, "upload_fileobj"):
             self.discharge_summary(
                 consultation,
                 new_discharge_reason=NewDischargeReasonEnum.RECOVERED,
@@ -263,6 +266,42 @@ class TestPatientConsultation(TestUtils, APITestCase):
         uploaded_file = file_res[0]
         self.assertFalse(uploaded_file.name.endswith(".pdf"))
 
+    def generate_summary(self, consultation):
+        with (
+            patch(
+                "care.facility.utils.reports.discharge_summary.compile_source",
+                return_value=True,
+            ),
+            patch.object(FileUpload, "upload_fileobj") as upload_fileobj,
+        ):
+            summary_file = generate_and_upload_discharge_summary(consultation)
+        return summary_file, upload_fileobj
+
+    def test_unchanged_discharge_summary_is_reused(self):
+        consultation = self.create_consultation(
+            self.patient1, self.facility, self.doctor, discharge_notes="Recovered"
+        )
+        with OverrideCache(self):
+            summary_file, upload_fileobj = self.generate_summary(consultation)
+            upload_fileobj.assert_called_once()
+
+            reused_file, upload_fileobj = self.generate_summary(consultation)
+        upload_fileobj.assert_not_called()
+        self.assertEqual(reused_file.id, summary_file.id)
+
+    def test_changed_discharge_summary_is_regenerated(self):
+        consultation = self.create_consultation(
+            self.patient1, self.facility, self.doctor, discharge_notes="Recovered"
+        )
+        with OverrideCache(self):
+            summary_file, _ = self.generate_summary(consultation)
+
+            consultation.discharge_notes = "Recovered, follow up in a week"
+            consultation.save()
+            changed_file, upload_fileobj = self.generate_summary(consultation)
+        upload_fileobj.assert_called_once()
+        self.assertNotEqual(changed_file.id, summary_file.id)
+
     def test_referred_to_external_null(self):
         consultation = self.create_admission_consultation(
             suggestion=SuggestionChoices.A,
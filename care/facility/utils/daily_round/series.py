@@ -0,0 +1,117 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+from django.db.models import Count, Max, Q
+
+from care.facility.models.daily_round import DailyRound
+from care.utils.timeseries import downsample_columns
+
+SERIES_CACHE_KEY = "daily_round_series:{etag}"
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(taken_at, round_id):
+    return base64.urlsafe_b64encode(
+        f"{taken_at.isoformat()}|{round_id}".encode()
+    ).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        taken_at, round_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(taken_at), int(round_id)
+    except ValueError as e:
+        raise InvalidCursorError from e
+
+
+def get_field_value(row, path):
+    """
+    Value of a field of a round, `bp.systolic` reads systolic of the bp field
+    """
+    value = row
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def get_series_queryset(consultation, taken_at_after=None, taken_at_before=None):
+    queryset = DailyRound.objects.filter(
+        consultation=consultation, taken_at__isnull=False
+    )
+    if taken_at_after:
+        queryset = queryset.filter(taken_at__gte=taken_at_after)
+    if taken_at_before:
+        queryset = queryset.filter(taken_at__lte=taken_at_before)
+    return queryset
+
+
+def get_series_etag(queryset, params):
+    """
+    Fingerprint of the rounds in the window, any round added, edited or deleted
+    in it changes the fingerprint
+    """
+    state = queryset.aggregate(
+        count=Count("id"), last_id=Max("id"), last_modified=Max("modified_date")
+    )
+    return hashlib.sha256(
+        json.dumps([params, state], sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def get_series(queryset, fields, limit, cursor=None, points=None, method=None):
+    """
+    Rounds of the queryset in the order they were taken as one array per field,
+    `taken_at` as epoch milliseconds. Up to `limit` rounds are read in a single
+    query, `next` is the cursor of the rounds after them.
+    With `points`, rows are downsampled so that each field keeps that many points.
+    """
+    if cursor:
+        taken_at, round_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(taken_at__gt=taken_at) | Q(taken_at=taken_at, id__gt=round_id)
+        )
+    base_fields = {field.split(".")[0] for field in fields} - {
+        "id",
+        "external_id",
+        "taken_at",
+    }
+    rows = list(
+        queryset.order_by("taken_at", "id").values(
+            "id", "external_id", "taken_at", *sorted(base_fields)
+        )[: limit + 1]
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["taken_at"], rows[-1]["id"])
+
+    count = len(rows)
+    timestamps = [int(row["taken_at"].timestamp() * 1000) for row in rows]
+    columns = {
+        field: [get_field_value(row, field.split(".")) for row in rows]
+        for field in fields
+    }
+    if points:
+        kept = downsample_columns(timestamps, columns.values(), points, method)
+        if len(kept) < len(rows):
+            rows = [rows[index] for index in kept]
+            timestamps = [timestamps[index] for index in kept]
+            columns = {
+                field: [values[index] for index in kept]
+                for field, values in columns.items()
+            }
+
+    return {
+        "taken_at": timestamps,
+        "id": [row["external_id"] for row in rows],
+        "fields": columns,
+        "count": count,
+        "next": next_cursor,
+    }
@@ -1,7 +1,10 @@
+import hashlib
 import logging
 import subprocess
 import tempfile
+import time
 from collections.abc import Iterable
+from contextlib import contextmanager
 from pathlib import Path
 from uuid import uuid4
 
@@ -9,6 +12,8 @@ from django.conf import settings
 from django.core.cache import cache
 from django.core.mail import EmailMessage
 from django.db.models import Case, IntegerField, Q, Value, When
+from django.template import Context
+from django.template.base import render_value_in_context
 from django.template.loader import render_to_string
 from django.utils import timezone
 
@@ -34,12 +39,19 @@ from care.facility.models.icd11_diagnosis import (
 logger = logging.getLogger(__name__)
 
 LOCK_DURATION = 2 * 60  # 2 minutes
+SUMMARY_HASH_DURATION = 30 * 24 * 60 * 60  # 30 days
+SUMMARY_TEMPLATE = "reports/patient_discharge_summary_pdf_template.typ"
+SUMMARY_DATE_PLACEHOLDER = "__DISCHARGE_SUMMARY_DATE__"
 
 
 def lock_key(consultation_ext_id: str):
     return f"discharge_summary_{consultation_ext_id}"
 
 
+def summary_hash_key(consultation_ext_id: str):
+    return f"discharge_summary_hash_{consultation_ext_id}"
+
+
 def set_lock(consultation_ext_id: str, progress: int):
     cache.set(lock_key(consultation_ext_id), progress, timeout=LOCK_DURATION)
 
@@ -195,22 +207,16 @@ def get_discharge_summary_data(consultation: PatientConsultation):
     }
 
 
-def compile_typ(output_file, data):
-    try:
-        logo_path = (
-            Path(settings.BASE_DIR)
-            / "staticfiles"
-            / "images"
-            / "logos"
-            / "black-logo.svg"
-        )
-
-        data["logo_path"] = str(logo_path)
+def render_summary_source(data):
+    logo_path = (
+        Path(settings.BASE_DIR) / "staticfiles" / "images" / "logos" / "black-logo.svg"
+    )
+    data["logo_path"] = str(logo_path)
+    return render_to_string(SUMMARY_TEMPLATE, data)
 
-        content = render_to_string(
-            "reports/patient_discharge_summary_pdf_template.typ", context=data
-        )
 
+def compile_source(content, output_file, consultation_ext_id):
+    try:
         subprocess.run(  # noqa: S603
             [  # noqa: S607
                 "typst",
@@ -224,20 +230,23 @@ def compile_typ(output_file, data):
             cwd="/",
         )
 
-        logging.info(
-            "Successfully Compiled Summary pdf for %s", data["consultation"].external_id
-        )
+        logging.info("Successfully Compiled Summary pdf for %s", consultation_ext_id)
         return True
 
     except subprocess.CalledProcessError as e:
         logging.error(
             "Error compiling summary pdf for %s: %s",
-            data["consultation"].external_id,
+            consultation_ext_id,
             e.stderr.decode("utf-8"),
         )
         return False
 
 
+def compile_typ(output_file, data):
+    content = render_summary_source(data)
+    return compile_source(content, output_file, data["consultation"].external_id)
+
+
 def generate_discharge_summary_pdf(data, file):
     logger.info(
         "Generating Discharge Summary pdf for %s", data["consultation"].external_id
@@ -249,12 +258,61 @@ def generate_discharge_summary_pdf(data, file):
     )
 
 
+@contextmanager
+def measure_stage(timings, stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
+def get_content_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def get_unchanged_summary(consultation_ext_id, content_hash):
+    """
+    The last generated summary of the consultation if it was generated from the
+    same content, ignoring the date it was created on
+    """
+    last_summary = cache.get(summary_hash_key(consultation_ext_id))
+    if not last_summary or last_summary["hash"] != content_hash:
+        return None
+    return FileUpload.objects.filter(
+        id=last_summary["file_id"], upload_completed=True, is_archived=False
+    ).first()
+
+
 def generate_and_upload_discharge_summary(consultation: PatientConsultation):
     logger.info("Generating Discharge Summary for %s", consultation.external_id)
 
+    timings = {}
     set_lock(consultation.external_id, 5)
     try:
         current_date = timezone.now()
+
+        set_lock(consultation.external_id, 10)
+        with measure_stage(timings, "fetch"):
+            data = get_discharge_summary_data(consultation)
+        # Rendered with a placeholder so that the hash only changes with the data
+        data["date"] = SUMMARY_DATE_PLACEHOLDER
+        with measure_stage(timings, "render"):
+            content = render_summary_source(data)
+        content_hash = get_content_hash(content)
+
+        summary_file = get_unchanged_summary(consultation.external_id, content_hash)
+        if summary_file:
+            logger.info(
+                "Discharge Summary for %s is unchanged, reusing file id: %s",
+                consultation.external_id,
+                summary_file.id,
+            )
+            return summary_file
+
+        content = content.replace(
+            SUMMARY_DATE_PLACEHOLDER, render_value_in_context(current_date, Context())
+        )
         summary_file = FileUpload(
             name=f"discharge_summary-{consultation.patient.name}-{current_date}",
             internal_name=f"{uuid4()}.pdf",
@@ -262,24 +320,33 @@ def generate_and_upload_discharge_summary(consultation: PatientConsultation):
             associating_id=consultation.external_id,
         )
 
-        set_lock(consultation.external_id, 10)
-        data = get_discharge_summary_data(consultation)
-        data["date"] = current_date
-
         set_lock(consultation.external_id, 50)
         with tempfile.NamedTemporaryFile(suffix=".pdf") as file:
-            generate_discharge_summary_pdf(data, file)
+            with measure_stage(timings, "compile"):
+                compiled = compile_source(content, file.name, consultation.external_id)
             logger.info("Uploading Discharge Summary for %s", consultation.external_id)
-            summary_file.put_object(file, ContentType="application/pdf")
-            summary_file.upload_completed = True
-            summary_file.save()
+            with measure_stage(timings, "upload"):
+                summary_file.upload_fileobj(file, ContentType="application/pdf")
+                summary_file.upload_completed = True
+                summary_file.save()
             logger.info(
                 "Uploaded Discharge Summary for %s, file id: %s",
                 consultation.external_id,
                 summary_file.id,
             )
+        if compiled:
+            cache.set(
+                summary_hash_key(consultation.external_id),
+                {"hash": content_hash, "file_id": summary_file.id},
+                timeout=SUMMARY_HASH_DURATION,
+            )
     finally:
         clear_lock(consultation.external_id)
+        logger.info(
+            "Discharge Summary timings for %s: %s",
+            consultation.external_id,
+            ", ".join(f"{stage} {elapsed:.3f}s" for stage, elapsed in timings.items()),
+        )
 
     return summary_file
 
@@ -1,7 +1,10 @@
 import inspect
 
 from care.emr.models.organization import FacilityOrganizationUser, OrganizationUser
-from care.security.models import RolePermission
+from care.security.authorization.cache import (
+    RequestRoleMemo,
+    get_roles_for_permissions,
+)
 
 
 class PermissionDeniedError(Exception):
@@ -19,41 +22,131 @@ class AuthorizationHandler:
     as the logic can handle the type.
 
     Queries are actions that return a queryset as the response.
+
+    Actions ending with `_batch` take a list (or queryset) of objects instead of a single
+    object and return a mapping of object pk to the result, in a constant number of queries.
     """
 
     actions = []
     queries = []
 
+    def find_roles_in_organization(self, user, orgs=None):
+        """
+        Roles the user holds in the given organizations, memoized for the request
+        """
+
+        def fetch():
+            filters = {"user": user}
+            if orgs:
+                filters["organization_id__in"] = orgs
+            return frozenset(
+                OrganizationUser.objects.filter(**filters).values_list(
+                    "role_id", flat=True
+                )
+            )
+
+        key = ("organization", user.id, tuple(sorted(orgs)) if orgs else None)
+        return RequestRoleMemo.get_or_set(key, fetch)
+
+    def find_roles_in_facility_organization(self, user, orgs=None, facility=None):
+        """
+        Roles the user holds in the given facility organizations, memoized for the request
+        """
+
+        def fetch():
+            filters = {"user": user}
+            if orgs:
+                filters["organization_id__in"] = orgs
+            if facility:
+                filters["organization__facility"] = facility
+            return frozenset(
+                FacilityOrganizationUser.objects.filter(**filters).values_list(
+                    "role_id", flat=True
+                )
+            )
+
+        key = (
+            "facility_organization",
+            user.id,
+            tuple(sorted(orgs)) if orgs else None,
+            getattr(facility, "id", facility),
+        )
+        return RequestRoleMemo.get_or_set(key, fetch)
+
+    def check_permission_in_roles(self, permissions, roles):
+        return not get_roles_for_permissions(permissions).isdisjoint(roles)
+
     def check_permission_in_organization(self, permissions, user, orgs=None):
         if user.is_superuser:
             return True
-        roles = self.get_role_from_permissions(permissions)
-        filters = {"role_id__in": roles, "user": user}
-        if orgs:
-            filters["organization_id__in"] = orgs
-        return OrganizationUser.objects.filter(**filters).exists()
+        return self.check_permission_in_roles(
+            permissions, self.find_roles_in_organization(user, orgs)
+        )
 
     def check_permission_in_facility_organization(
         self, permissions, user, orgs=None, facility=None
     ):
         if user.is_superuser:
             return True
-        roles = self.get_role_from_permissions(permissions)
-        filters = {"role_id__in": roles, "user": user}
-        if orgs:
-            filters["organization_id__in"] = orgs
-        if facility:
-            filters["organization__facility"] = facility
-        return FacilityOrganizationUser.objects.filter(**filters).exists()
+        return self.check_permission_in_roles(
+            permissions,
+            self.find_roles_in_facility_organization(user, orgs, facility),
+        )
 
     def get_role_from_permissions(self, permissions):
-        # TODO Cache this endpoint
-        return list(
-            set(
-                RolePermission.objects.filter(
-                    permission__slug__in=permissions
-                ).values_list("role_id", flat=True)
-            )
+        return list(get_roles_for_permissions(permissions))
+
+    def fetch_role_index(self, model, user, orgs):
+        """
+        Roles held by the user in each of the given organizations, in a single query
+        """
+        index = {}
+        for organization_id, role_id in model.objects.filter(
+            user=user, organization_id__in=set(orgs)
+        ).values_list("organization_id", "role_id"):
+            index.setdefault(organization_id, set()).add(role_id)
+        return index
+
+    def check_permission_in_organization_batch(
+        self, permissions, user, objects, organizations, model=OrganizationUser
+    ):
+        """
+        Batch variant of check_permission_in_organization, `organizations` returns
+        the organization ids (usually a cache array) for each object.
+        Returns a mapping of object pk to the permission check result.
+        Like the single check, objects without organizations are checked against
+        the roles of the user in any organization.
+        """
+        objects = list(objects)
+        if user.is_superuser:
+            return dict.fromkeys((obj.pk for obj in objects), True)
+        allowed_roles = get_roles_for_permissions(permissions)
+        object_orgs = {obj.pk: organizations(obj) or [] for obj in objects}
+        index = self.fetch_role_index(
+            model, user, [org for orgs in object_orgs.values() for org in orgs]
+        )
+        unscoped_roles = None
+        results = {}
+        for pk, orgs in object_orgs.items():
+            if orgs:
+                results[pk] = any(
+                    not allowed_roles.isdisjoint(index.get(org, ())) for org in orgs
+                )
+                continue
+            if unscoped_roles is None:
+                unscoped_roles = (
+                    self.find_roles_in_facility_organization(user)
+                    if model is FacilityOrganizationUser
+                    else self.find_roles_in_organization(user)
+                )
+            results[pk] = not allowed_roles.isdisjoint(unscoped_roles)
+        return results
+
+    def check_permission_in_facility_organization_batch(
+        self, permissions, user, objects, organizations
+    ):
+        return self.check_permission_in_organization_batch(
+            permissions, user, objects, organizations, model=FacilityOrganizationUser
         )
 
 
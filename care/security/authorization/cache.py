@@ -0,0 +1,75 @@
+import threading
+
+from django.conf import settings
+
+from care.security.models import RolePermission
+from care.utils.cache.tiered_cache import TieredCache
+
+PERMISSION_ROLES_CACHE_KEY = "all"
+
+permission_roles_cache = TieredCache(
+    "authz:permission_roles",
+    maxsize=1,
+    local_ttl=settings.AUTHZ_ROLE_CACHE_LOCAL_TTL,
+    shared_ttl=settings.AUTHZ_ROLE_CACHE_TTL,
+)
+
+
+def build_permission_roles():
+    """
+    Mapping of permission slug to the roles that grant it, the table is small
+    enough to be loaded as a whole
+    """
+    permission_roles = {}
+    for slug, role_id in RolePermission.objects.values_list(
+        "permission__slug", "role_id"
+    ):
+        permission_roles.setdefault(slug, set()).add(role_id)
+    return permission_roles
+
+
+def get_roles_for_permissions(permissions):
+    permission_roles = permission_roles_cache.get_or_set(
+        PERMISSION_ROLES_CACHE_KEY, build_permission_roles
+    )
+    roles = set()
+    for permission in permissions:
+        roles |= permission_roles.get(permission, set())
+    return roles
+
+
+def clear_permission_roles_cache():
+    permission_roles_cache.delete(PERMISSION_ROLES_CACHE_KEY)
+
+
+class RequestRoleMemo:
+    """
+    Memo of the roles a user holds on an object (patient, organizations of an
+    encounter..) for the lifetime of a single request.
+    The memo is only active between request_started and request_finished so that
+    long running workers never serve stale roles.
+    """
+
+    _local = threading.local()
+
+    @classmethod
+    def start(cls, **kwargs):
+        cls._local.memo = {}
+
+    @classmethod
+    def stop(cls, **kwargs):
+        cls._local.memo = None
+
+    @classmethod
+    def clear(cls, **kwargs):
+        if getattr(cls._local, "memo", None) is not None:
+            cls._local.memo = {}
+
+    @classmethod
+    def get_or_set(cls, key, default):
+        memo = getattr(cls._local, "memo", None)
+        if memo is None:
+            return default()
+        if key not in memo:
+            memo[key] = default()
+        return memo[key]
@@ -49,6 +49,27 @@ class EncounterAccess(AuthorizationHandler):
             orgs=encounter.facility_organization_cache,
         )
 
+    def can_view_encounter_obj_batch(self, user, encounters):
+        return self.check_permission_in_facility_organization_batch(
+            [EncounterPermissions.can_read_encounter.name],
+            user,
+            encounters,
+            lambda encounter: encounter.facility_organization_cache,
+        )
+
+    def can_update_encounter_obj_batch(self, user, encounters):
+        encounters = list(encounters)
+        permissions = self.check_permission_in_facility_organization_batch(
+            [EncounterPermissions.can_write_encounter.name],
+            user,
+            encounters,
+            lambda encounter: encounter.facility_organization_cache,
+        )
+        for encounter in encounters:
+            if encounter.status in COMPLETED_CHOICES:
+                permissions[encounter.pk] = False
+        return permissions
+
     def get_filtered_encounters(self, qs, user, facility):
         if user.is_superuser:
             return qs
@@ -6,12 +6,21 @@ from care.security.authorization.base import (
     AuthorizationController,
     AuthorizationHandler,
 )
-from care.security.models import RolePermission
+from care.security.authorization.cache import (
+    RequestRoleMemo,
+    get_roles_for_permissions,
+)
 from care.security.permissions.patient import PatientPermissions
 
 
 class PatientAccess(AuthorizationHandler):
     def find_roles_on_patient(self, user, patient):
+        return RequestRoleMemo.get_or_set(
+            ("patient", user.id, patient.id),
+            lambda: frozenset(self.fetch_roles_on_patient(user, patient)),
+        )
+
+    def fetch_roles_on_patient(self, user, patient):
         role_ids = set()
         # Through Encounter
         encounters = Encounter.objects.filter(patient=patient).values_list(
@@ -35,34 +44,77 @@ class PatientAccess(AuthorizationHandler):
         )
         return role_ids.union(set(roles))
 
+    def find_roles_on_patients(self, user, patients):
+        """
+        Batch variant of find_roles_on_patient, three queries for any number of patients
+        """
+        patients = list(patients)
+        encounter_orgs = {}
+        for patient_id, organizations in Encounter.objects.filter(
+            patient__in=patients
+        ).values_list("patient_id", "facility_organization_cache"):
+            encounter_orgs.setdefault(patient_id, set()).update(organizations)
+        facility_org_roles = self.fetch_role_index(
+            FacilityOrganizationUser,
+            user,
+            [org for orgs in encounter_orgs.values() for org in orgs],
+        )
+        org_roles = self.fetch_role_index(
+            OrganizationUser,
+            user,
+            [org for patient in patients for org in patient.organization_cache],
+        )
+        direct_roles = {}
+        for patient_id, role_id in PatientUser.objects.filter(
+            patient__in=patients, user=user
+        ).values_list("patient_id", "role_id"):
+            direct_roles.setdefault(patient_id, set()).add(role_id)
+
+        patient_roles = {}
+        for patient in patients:
+            roles = set(direct_roles.get(patient.id, ()))
+            for org in encounter_orgs.get(patient.id, ()):
+                roles |= facility_org_roles.get(org, set())
+            for org in patient.organization_cache:
+                roles |= org_roles.get(org, set())
+            patient_roles[patient.pk] = frozenset(roles)
+        return patient_roles
+
+    def check_permission_on_patients(self, permissions, user, patients):
+        patients = list(patients)
+        if user.is_superuser:
+            return {patient.pk: True for patient in patients}
+        allowed_roles = get_roles_for_permissions(permissions)
+        return {
+            pk: not allowed_roles.isdisjoint(roles)
+            for pk, roles in self.find_roles_on_patients(user, patients).items()
+        }
+
+    def check_permission_on_patient(self, permissions, user, patient):
+        return self.check_permission_in_roles(
+            permissions, self.find_roles_on_patient(user, patient)
+        )
+
     def can_view_patient_obj(self, user, patient):
         if user.is_superuser:
             return True
-        user_roles = self.find_roles_on_patient(user, patient)
-        return RolePermission.objects.filter(
-            permission__slug__in=[PatientPermissions.can_list_patients.name],
-            role__in=user_roles,
-        ).exists()
+        return self.check_permission_on_patient(
+            [PatientPermissions.can_list_patients.name], user, patient
+        )
 
     def can_write_patient_obj(self, user, patient):
         if user.is_superuser:
             return True
-        user_roles = self.find_roles_on_patient(user, patient)
-        return RolePermission.objects.filter(
-            permission__slug__in=[PatientPermissions.can_write_patient.name],
-            role__in=user_roles,
-        ).exists()
+        return self.check_permission_on_patient(
+            [PatientPermissions.can_write_patient.name], user, patient
+        )
 
     def can_submit_questionnaire_patient_obj(self, user, patient):
         if user.is_superuser:
             return True
-        user_roles = self.find_roles_on_patient(user, patient)
-        return RolePermission.objects.filter(
-            permission__slug__in=[
-                PatientPermissions.can_submit_patient_questionnaire.name
-            ],
-            role__in=user_roles,
-        ).exists()
+        return self.check_permission_on_patient(
+            [PatientPermissions.can_submit_patient_questionnaire.name], user, patient
+        )
 
     def can_create_patient(self, user):
         return self.check_permission_in_facility_organization(
@@ -72,22 +124,31 @@ class PatientAccess(AuthorizationHandler):
     def can_view_clinical_data(self, user, patient):
         if user.is_superuser:
             return True
-        user_roles = self.find_roles_on_patient(user, patient)
-        return RolePermission.objects.filter(
-            permission__slug__in=[PatientPermissions.can_view_clinical_data.name],
-            role__in=user_roles,
-        ).exists()
+        return self.check_permission_on_patient(
+            [PatientPermissions.can_view_clinical_data.name], user, patient
+        )
 
     def can_view_patient_questionnaire_responses(self, user, patient):
         if user.is_superuser:
             return True
-        user_roles = self.find_roles_on_patient(user, patient)
-        return RolePermission.objects.filter(
-            permission__slug__in=[
-                PatientPermissions.can_view_questionnaire_responses.name
-            ],
-            role__in=user_roles,
-        ).exists()
+        return self.check_permission_on_patient(
+            [PatientPermissions.can_view_questionnaire_responses.name], user, patient
+        )
+
+    def can_view_patient_obj_batch(self, user, patients):
+        return self.check_permission_on_patients(
+            [PatientPermissions.can_list_patients.name], user, patients
+        )
+
+    def can_write_patient_obj_batch(self, user, patients):
+        return self.check_permission_on_patients(
+            [PatientPermissions.can_write_patient.name], user, patients
+        )
+
+    def can_view_clinical_data_batch(self, user, patients):
+        return self.check_permission_on_patients(
+            [PatientPermissions.can_view_clinical_data.name], user, patients
+        )
 
     def get_filtered_patients(self, qs, user):
         if user.is_superuser:
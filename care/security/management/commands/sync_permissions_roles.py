@@ -1,6 +1,7 @@
 from django.core.management import BaseCommand
 from django.db import transaction
 
+from care.security.authorization.cache import clear_permission_roles_cache
 from care.security.models import PermissionModel, RoleModel, RolePermission
 from care.security.permissions.base import PermissionController
 from care.security.roles.role import RoleController
@@ -61,3 +62,5 @@ class Command(BaseCommand):
                     obj.temp_deleted = False
                     obj.save()
             RolePermission.objects.filter(temp_deleted=True).delete()
+        # Once committed, the bulk updates above do not send signals
+        clear_permission_roles_cache()
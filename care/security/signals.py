@@ -0,0 +1,29 @@
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from care.emr.models import PatientUser
+from care.emr.models.organization import FacilityOrganizationUser, OrganizationUser
+from care.security.authorization.cache import (
+    RequestRoleMemo,
+    clear_permission_roles_cache,
+)
+from care.security.models import RolePermission
+
+request_started.connect(RequestRoleMemo.start, dispatch_uid="authz_role_memo_start")
+request_finished.connect(RequestRoleMemo.stop, dispatch_uid="authz_role_memo_stop")
+
+
+@receiver([post_save, post_delete], sender=RolePermission)
+def invalidate_permission_roles(sender, instance, **kwargs):
+    # Cleared once the change is visible, a request reading the mapping before
+    # the commit would otherwise cache the old one again
+    transaction.on_commit(clear_permission_roles_cache)
+
+
+@receiver([post_save, post_delete], sender=OrganizationUser)
+@receiver([post_save, post_delete], sender=FacilityOrganizationUser)
+@receiver([post_save, post_delete], sender=PatientUser)
+def invalidate_user_roles(sender, instance, **kwargs):
+    RequestRoleMemo.clear()
@@ -2,12 +2,14 @@ import contextlib
 
 from django.conf import settings
 from django.core.mail import EmailMessage
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.template.loader import render_to_string
 from django.utils.timezone import now
 from django_rest_passwordreset.signals import reset_password_token_created
 
+from care.utils.cache.auth_user_cache import invalidate_user
+
 from .models import UserFacilityAllocation
 
 
@@ -84,3 +86,11 @@ def track_user_facility_allocation(
         UserFacilityAllocation.objects.create(
             user=instance, facility=instance.home_facility
         )
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    """
+    Covers updates, deactivation and password changes of the user
+    """
+    invalidate_user(instance.id)
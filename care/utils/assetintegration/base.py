@@ -5,13 +5,30 @@ import jsonschema
 import requests
 from django.conf import settings
 from jsonschema import ValidationError as JSONValidationError
+from requests.adapters import HTTPAdapter
 from rest_framework import status
 from rest_framework.exceptions import APIException, ValidationError
 
-from care.utils.jwks.token_generator import generate_jwt
+from care.utils.jwks.token_generator import get_cached_jwt
 
 from .schema import meta_object_schema
 
+# Connections to middlewares are kept alive and shared by all asset integrations
+middleware_session = requests.Session()
+middleware_adapter = HTTPAdapter(
+    pool_connections=settings.MIDDLEWARE_POOL_CONNECTIONS,
+    pool_maxsize=settings.MIDDLEWARE_POOL_SIZE,
+)
+middleware_session.mount("http://", middleware_adapter)
+middleware_session.mount("https://", middleware_adapter)
+
+
+def get_middleware_url(hostname, endpoint, insecure_connection=False):
+    protocol = "http"
+    if not insecure_connection or settings.IS_PRODUCTION:
+        protocol += "s"
+    return f"{protocol}://{hostname}/{endpoint}"
+
 
 class ActionParams(TypedDict, total=False):
     type: str
@@ -41,14 +58,13 @@ class BaseAssetIntegration:
         """Handle actions using kwargs instead of dict."""
 
     def get_url(self, endpoint):
-        protocol = "http"
-        if not self.insecure_connection or settings.IS_PRODUCTION:
-            protocol += "s"
-        return f"{protocol}://{self.middleware_hostname}/{endpoint}"
+        return get_middleware_url(
+            self.middleware_hostname, endpoint, self.insecure_connection
+        )
 
     def get_headers(self):
         return {
-            "Authorization": (self.auth_header_type + generate_jwt()),
+            "Authorization": (self.auth_header_type + get_cached_jwt()),
             "Accept": "application/json",
         }
 
@@ -69,11 +85,15 @@ class BaseAssetIntegration:
     def api_post(self, url, data=None, timeout=None):
         timeout = timeout or self.timeout
         return self._validate_response(
-            requests.post(url, json=data, headers=self.get_headers(), timeout=timeout)
+            middleware_session.post(
+                url, json=data, headers=self.get_headers(), timeout=timeout
+            )
         )
 
     def api_get(self, url, data=None, timeout=None):
         timeout = timeout or self.timeout
         return self._validate_response(
-            requests.get(url, params=data, headers=self.get_headers(), timeout=timeout)
+            middleware_session.get(
+                url, params=data, headers=self.get_headers(), timeout=timeout
+            )
         )
@@ -0,0 +1,88 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+
+from care.utils.assetintegration.base import (
+    BaseAssetIntegration,
+    get_middleware_url,
+    middleware_session,
+)
+from care.utils.jwks.token_generator import get_cached_jwt
+
+logger = logging.getLogger(__name__)
+
+MIDDLEWARE_STATUS_CACHE_KEY = "middleware_status:{url}"
+
+_missing = object()
+
+
+def get_device_status_url(hostname, insecure_connection=False):
+    """
+    Same url as BaseAssetIntegration.get_url, so that the asset and location
+    monitors share the probe of a middleware
+    """
+    return get_middleware_url(hostname, "devices/status", insecure_connection)
+
+
+def fetch_device_status(url):
+    response = middleware_session.get(
+        url,
+        headers={
+            "Authorization": BaseAssetIntegration.auth_header_type + get_cached_jwt(),
+            "Accept": "application/json",
+        },
+        timeout=settings.MIDDLEWARE_REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def run_probe(key, probe):
+    try:
+        return probe()
+    except Exception as e:
+        logger.warning("Middleware %s is down: %s", key, e)
+    # Not None, so that an unreachable middleware is cached as well
+    return False
+
+
+def probe_middlewares(probes, shared=True):
+    """
+    Runs every probe (a mapping of key to a callable returning the middleware
+    response) concurrently, failed probes result in False.
+    With `shared`, keys are the status urls and results are cached for the current
+    monitoring cycle so that the asset and location monitors probe a middleware once.
+    """
+    results = {}
+    pending = {}
+    for key, probe in probes.items():
+        cached = (
+            cache.get(MIDDLEWARE_STATUS_CACHE_KEY.format(url=key), _missing)
+            if shared
+            else _missing
+        )
+        if cached is _missing:
+            pending[key] = probe
+        else:
+            results[key] = cached
+    if not pending:
+        return results
+
+    with ThreadPoolExecutor(
+        max_workers=settings.MIDDLEWARE_STATUS_MAX_CONCURRENCY
+    ) as executor:
+        futures = {
+            key: executor.submit(run_probe, key, probe)
+            for key, probe in pending.items()
+        }
+        for key, future in futures.items():
+            results[key] = future.result()
+            if shared:
+                cache.set(
+                    MIDDLEWARE_STATUS_CACHE_KEY.format(url=key),
+                    results[key],
+                    timeout=settings.MIDDLEWARE_STATUS_CACHE_TTL,
+                )
+    return results
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from care.users.models import User
+from care.utils.cache.tiered_cache import LRUCache, TieredCache
+
+USER_TOKENS_CACHE_KEY = "auth_user_tokens:{user_id}"
+# Tokens remembered per user for invalidation, older ones expire on their own
+MAX_TOKENS_PER_USER = 50
+# Credentials are never cached, they are deferred on cached users and loaded
+# from the database if read
+UNCACHED_FIELDS = frozenset({"password", "pf_endpoint", "pf_p256dh", "pf_auth"})
+
+auth_user_cache = TieredCache(
+    "auth_user",
+    maxsize=settings.AUTH_USER_CACHE_SIZE,
+    local_ttl=settings.AUTH_USER_CACHE_LOCAL_TTL,
+    shared_ttl=settings.AUTH_USER_CACHE_TTL,
+)
+# Tokens cached by this process, so that invalidation also works without redis
+local_user_tokens = LRUCache(
+    maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL
+)
+
+
+def user_to_values(user):
+    return {
+        field.attname: getattr(user, field.attname)
+        for field in User._meta.concrete_fields  # noqa SLF001
+        if field.attname not in UNCACHED_FIELDS
+    }
+
+
+def user_from_values(values):
+    """
+    Builds a fresh instance for every request so that nothing set on a user
+    during one request leaks into another
+    """
+    return User.from_db(DEFAULT_DB_ALIAS, list(values), list(values.values()))
+
+
+def get_cached_user(jti, loader):
+    """
+    User authenticated by the token `jti`, `loader` fetches the user on a miss
+    """
+    if not settings.AUTH_USER_CACHE_ENABLED or not jti:
+        return loader()
+    values = auth_user_cache.get(jti)
+    if values is not None:
+        return user_from_values(values)
+    user = loader()
+    auth_user_cache.set(jti, user_to_values(user))
+    tokens = local_user_tokens.get(user.id, set())
+    local_user_tokens.set(user.id, tokens | {jti})
+    key = USER_TOKENS_CACHE_KEY.format(user_id=user.id)
+    shared_tokens = cache.get(key, [])
+    cache.set(
+        key,
+        [*shared_tokens[-MAX_TOKENS_PER_USER + 1 :], jti],
+        timeout=settings.AUTH_USER_CACHE_TTL,
+    )
+    return user
+
+
+def invalidate_user(user_id):
+    """
+    Drops every cached token of the user. Other processes may keep serving their
+    local copy for up to AUTH_USER_CACHE_LOCAL_TTL seconds.
+    """
+    key = USER_TOKENS_CACHE_KEY.format(user_id=user_id)
+    tokens = local_user_tokens.get(user_id, set()).union(cache.get(key, []))
+    for jti in tokens:
+        auth_user_cache.delete(jti)
+    local_user_tokens.delete(user_id)
+    cache.delete(key)
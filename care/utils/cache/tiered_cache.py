@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+_missing = object()
+
+
+class CacheStats:
+    """
+    Thread safe hit/miss counters for a cache, kept per process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.local_hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+
+    def record(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            hits = self.local_hits + self.shared_hits
+            total = hits + self.misses
+            return {
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+            }
+
+
+class LRUCache:
+    """
+    In process LRU cache where every entry also expires after `ttl` seconds
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _missing)
+            if entry is _missing:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Two level cache, a small in process LRU in front of the shared (redis) cache.
+    Deleting a key only clears the local copy in the current process, so the local
+    ttl should be kept short for data that is invalidated explicitly.
+    """
+
+    def __init__(
+        self, prefix, maxsize=1024, local_ttl=60, shared_ttl=60 * 10, use_shared=True
+    ):
+        self.prefix = prefix
+        self.shared_ttl = shared_ttl
+        self.use_shared = use_shared
+        self.local = LRUCache(maxsize=maxsize, ttl=local_ttl)
+        self.stats = CacheStats()
+
+    def make_key(self, key):
+        return f"{self.prefix}:{key}"
+
+    def get(self, key, default=None):
+        key = self.make_key(key)
+        value = self.local.get(key, _missing)
+        if value is not _missing:
+            self.stats.record("local_hits")
+            return value
+        if self.use_shared:
+            value = cache.get(key, _missing)
+            if value is not _missing:
+                self.stats.record("shared_hits")
+                self.local.set(key, value)
+                return value
+        self.stats.record("misses")
+        return default
+
+    def set(self, key, value):
+        key = self.make_key(key)
+        self.local.set(key, value)
+        if self.use_shared:
+            cache.set(key, value, timeout=self.shared_ttl)
+
+    def get_or_set(self, key, default):
+        """
+        `default` is a callable evaluated on a miss, None results are not cached
+        """
+        value = self.get(key, _missing)
+        if value is _missing:
+            value = default()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def delete(self, key):
+        key = self.make_key(key)
+        self.local.delete(key)
+        if self.use_shared:
+            cache.delete(key)
+
+    def clear_local(self):
+        self.local.clear()
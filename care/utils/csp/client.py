@@ -0,0 +1,83 @@
+import threading
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from django.conf import settings
+
+from care.utils.csp.config import BucketType, get_client_config
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_s3_client(config):
+    """
+    S3 client for a client config, shared by the whole process. Clients are safe
+    to use across threads but creating them is not, and is slow.
+    """
+    key = tuple(sorted(config.items()))
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = boto3.session.Session().client(
+                    "s3",
+                    config=Config(
+                        max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS
+                    ),
+                    **config,
+                )
+                _clients[key] = client
+    return client
+
+
+def get_client(bucket_type: BucketType, external=False):
+    config, bucket_name = get_client_config(bucket_type, external=external)
+    return get_s3_client(config), bucket_name
+
+
+def clear_clients():
+    with _clients_lock:
+        _clients.clear()
+
+
+class ObjectTooLargeError(ValueError):
+    pass
+
+
+def get_transfer_config():
+    """
+    Uploads larger than the threshold are sent as multipart uploads, holding at
+    most FILE_UPLOAD_PART_SIZE * FILE_UPLOAD_MAX_CONCURRENCY bytes in memory
+    """
+    return TransferConfig(
+        multipart_threshold=settings.FILE_UPLOAD_MULTIPART_THRESHOLD,
+        multipart_chunksize=settings.FILE_UPLOAD_PART_SIZE,
+        max_concurrency=settings.FILE_UPLOAD_MAX_CONCURRENCY,
+    )
+
+
+def iter_body(body, chunk_size=None):
+    """
+    Yields the body of an object in chunks, closing it when done, can be passed
+    directly to a StreamingHttpResponse
+    """
+    try:
+        yield from body.iter_chunks(chunk_size or settings.FILE_STREAM_CHUNK_SIZE)
+    finally:
+        body.close()
+
+
+def read_body(response):
+    """
+    Reads a whole object into memory, objects larger than FILE_CONTENTS_MAX_SIZE
+    have to be streamed instead
+    """
+    size = response.get("ContentLength") or 0
+    if size > settings.FILE_CONTENTS_MAX_SIZE:
+        response["Body"].close()
+        msg = f"Object of {size} bytes is too large to be read into memory"
+        raise ObjectTooLargeError(msg)
+    return response["Body"].read()
@@ -1,7 +1,16 @@
+import json
+
 from authlib.jose import jwt
 from django.conf import settings
 from django.utils.timezone import now
 
+from care.utils.cache.tiered_cache import LRUCache
+
+# Minimum validity left on a cached token when it is handed out
+TOKEN_REUSE_MARGIN = 15
+
+token_cache = LRUCache(maxsize=256, ttl=0)
+
 
 def generate_jwt(claims=None, exp=60, jwks=None):
     if claims is None:
@@ -16,3 +25,19 @@ def generate_jwt(claims=None, exp=60, jwks=None):
         **claims,
     }
     return jwt.encode(header, payload, jwks).decode("utf-8")
+
+
+def get_cached_jwt(claims=None, exp=60):
+    """
+    Same as generate_jwt with the default keys, but a signed token is reused for
+    the same claims until it has less than TOKEN_REUSE_MARGIN seconds left
+    """
+    reuse_for = exp - TOKEN_REUSE_MARGIN
+    if reuse_for <= 0:
+        return generate_jwt(claims, exp)
+    key = (json.dumps(claims or {}, sort_keys=True), exp, id(settings.JWKS))
+    token = token_cache.get(key)
+    if token is None:
+        token = generate_jwt(claims, exp)
+        token_cache.set(key, token, ttl=reuse_for)
+    return token
@@ -1,7 +1,67 @@
+import logging
+import random
+import threading
+import time
+from uuid import uuid4
+
 from django.conf import settings
 from django.core.cache import cache
 from rest_framework.exceptions import APIException
 
+logger = logging.getLogger(__name__)
+
+# Waiters take the lock in arrival order, a waiter may only take it when no one
+# is queued ahead of it. Waiters refresh their heartbeat on every attempt, heads
+# whose heartbeat is older than the heartbeat timeout died and are dropped.
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[3])
+if redis.call("zscore", KEYS[2], ARGV[1]) then
+    redis.call("hset", KEYS[3], ARGV[1], now)
+end
+while true do
+    local head = redis.call("zrange", KEYS[2], 0, 0)[1]
+    if not head or head == ARGV[1] then
+        break
+    end
+    local seen = tonumber(redis.call("hget", KEYS[3], head))
+    if seen and now - seen <= tonumber(ARGV[4]) then
+        return 0
+    end
+    redis.call("zrem", KEYS[2], head)
+    redis.call("hdel", KEYS[3], head)
+end
+if redis.call("set", KEYS[1], ARGV[1], "NX", "PX", ARGV[2]) then
+    redis.call("zrem", KEYS[2], ARGV[1])
+    redis.call("hdel", KEYS[3], ARGV[1])
+    return 1
+end
+return 0
+"""
+ENQUEUE_SCRIPT = """
+redis.call("zadd", KEYS[1], "NX", ARGV[2], ARGV[1])
+redis.call("hset", KEYS[2], ARGV[1], ARGV[2])
+redis.call("pexpire", KEYS[1], ARGV[3])
+redis.call("pexpire", KEYS[2], ARGV[3])
+return 1
+"""
+DEQUEUE_SCRIPT = """
+redis.call("zrem", KEYS[1], ARGV[1])
+redis.call("hdel", KEYS[2], ARGV[1])
+return 1
+"""
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
 
 class ObjectLocked(APIException):
     status_code = 423
@@ -9,17 +69,224 @@ class ObjectLocked(APIException):
     default_code = "object_locked"
 
 
+class LockStats:
+    """
+    Thread safe counters of lock acquisitions, kept per process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.acquired = 0
+            self.contended = 0
+            self.timeouts = 0
+            self.lost = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record_wait(self, wait, *, acquired, contended):
+        with self._lock:
+            if acquired:
+                self.acquired += 1
+            else:
+                self.timeouts += 1
+            self.contended += contended
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_lost(self):
+        with self._lock:
+            self.lost += 1
+
+    def snapshot(self):
+        with self._lock:
+            attempts = self.acquired + self.timeouts
+            return {
+                "acquired": self.acquired,
+                "contended": self.contended,
+                "timeouts": self.timeouts,
+                "lost": self.lost,
+                "mean_wait": self.total_wait / attempts if attempts else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+lock_stats = LockStats()
+
+
+def get_redis_client():
+    """
+    Raw client of the default cache when it is backed by django-redis, other
+    backends fall back to the cache api
+    """
+    client = getattr(cache, "client", None)
+    if client is None or not hasattr(client, "get_client"):
+        return None
+    return client.get_client(write=True)
+
+
 class Lock:
-    def __init__(self, key, timeout=settings.LOCK_TIMEOUT):
+    """
+    Distributed lock owned by a unique token.
+
+    By default acquiring fails immediately with ObjectLocked when the lock is
+    held, with `blocking_timeout` it waits up to that many seconds with
+    exponential backoff, in arrival order when backed by redis.
+    The lock expires after `timeout` seconds unless renewed, `auto_renew` keeps
+    renewing it in the background until it is released. Releasing only deletes
+    the lock while it is still owned.
+    """
+
+    def __init__(
+        self,
+        key,
+        timeout=settings.LOCK_TIMEOUT,
+        blocking_timeout=0,
+        auto_renew=False,
+    ):
         self.key = f"lock:{key}"
         self.timeout = timeout
+        self.blocking_timeout = min(blocking_timeout, settings.LOCK_MAX_WAIT)
+        self.auto_renew = auto_renew
+        self.token = None
+        self._lost = False
+        self._renewer = None
+        self._stop_renewing = threading.Event()
+
+    @property
+    def redis_key(self):
+        return cache.make_key(self.key)
+
+    @property
+    def queue_key(self):
+        return cache.make_key(f"{self.key}:queue")
+
+    @property
+    def heartbeat_key(self):
+        return cache.make_key(f"{self.key}:heartbeat")
+
+    def _try_acquire(self, client):
+        if client is None:
+            return cache.add(self.key, self.token, timeout=self.timeout)
+        return bool(
+            client.eval(
+                ACQUIRE_SCRIPT,
+                3,
+                self.redis_key,
+                self.queue_key,
+                self.heartbeat_key,
+                self.token,
+                int(self.timeout * 1000),
+                int(time.time() * 1000),
+                int(settings.LOCK_QUEUE_HEARTBEAT_TIMEOUT * 1000),
+            )
+        )
+
+    def _enqueue(self, client):
+        if client is not None:
+            client.eval(
+                ENQUEUE_SCRIPT,
+                2,
+                self.queue_key,
+                self.heartbeat_key,
+                self.token,
+                int(time.time() * 1000),
+                int((settings.LOCK_MAX_WAIT + 1) * 1000),
+            )
+
+    def _dequeue(self, client):
+        if client is not None:
+            client.eval(
+                DEQUEUE_SCRIPT, 2, self.queue_key, self.heartbeat_key, self.token
+            )
 
     def acquire(self):
-        if not cache.set(self.key, value=True, timeout=self.timeout, nx=True):
-            raise ObjectLocked
+        self.token = uuid4().hex
+        self._lost = False
+        client = get_redis_client()
+        start = time.monotonic()
+        deadline = start + self.blocking_timeout
+        delay = settings.LOCK_RETRY_DELAY
+        contended = False
+        try:
+            while not self._try_acquire(client):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    lock_stats.record_wait(
+                        time.monotonic() - start, acquired=False, contended=True
+                    )
+                    self.token = None
+                    raise ObjectLocked
+                if not contended:
+                    contended = True
+                    self._enqueue(client)
+                # Jitter keeps waiters from retrying in lockstep
+                time.sleep(min(remaining, delay * random.uniform(0.5, 1.5)))  # noqa S311
+                delay = min(delay * 2, settings.LOCK_MAX_RETRY_DELAY)
+        finally:
+            if contended:
+                self._dequeue(client)
+        lock_stats.record_wait(
+            time.monotonic() - start, acquired=True, contended=contended
+        )
+        if self.auto_renew:
+            self._start_renewing()
+        return True
+
+    def renew(self, timeout=None):
+        """
+        Extends the lease to `timeout` seconds from now, returns False when the
+        lock is no longer owned
+        """
+        if self.token is None:
+            return False
+        timeout = timeout or self.timeout
+        client = get_redis_client()
+        if client is None:
+            renewed = cache.get(self.key) == self.token and cache.touch(
+                self.key, timeout
+            )
+        else:
+            renewed = client.eval(
+                RENEW_SCRIPT, 1, self.redis_key, self.token, int(timeout * 1000)
+            )
+        if not renewed:
+            self._lost = True
+            lock_stats.record_lost()
+            logger.warning("Lock %s was lost before it was renewed", self.key)
+        return bool(renewed)
+
+    def _renew_until_released(self):
+        while not self._stop_renewing.wait(self.timeout / 3):
+            if not self.renew():
+                return
+
+    def _start_renewing(self):
+        self._stop_renewing.clear()
+        self._renewer = threading.Thread(target=self._renew_until_released, daemon=True)
+        self._renewer.start()
 
     def release(self):
-        return cache.delete(self.key)
+        if self._renewer is not None:
+            self._stop_renewing.set()
+            self._renewer.join()
+            self._renewer = None
+        if self.token is None:
+            return False
+        client = get_redis_client()
+        if client is None:
+            released = cache.get(self.key) == self.token and cache.delete(self.key)
+        else:
+            released = client.eval(RELEASE_SCRIPT, 1, self.redis_key, self.token)
+        if not released and not self._lost:
+            # Expired and possibly taken by someone else, which is left alone
+            lock_stats.record_lost()
+            logger.warning("Lock %s expired before it was released", self.key)
+        self.token = None
+        return bool(released)
 
     def __enter__(self):
         self.acquire()
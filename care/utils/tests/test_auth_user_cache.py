@@ -0,0 +1,48 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from care.users.models import User
+from care.utils.cache.auth_user_cache import (
+    auth_user_cache,
+    get_cached_user,
+    invalidate_user,
+    user_to_values,
+)
+
+
+class AuthUserCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        auth_user_cache.clear_local()
+        auth_user_cache.stats.reset()
+        self.user = User(
+            id=42, username="cached-user", first_name="Cached", password="hash"
+        )
+        self.loader = mock.Mock(return_value=self.user)
+
+    def test_user_is_loaded_once_per_token(self):
+        self.assertEqual(get_cached_user("jti-1", self.loader), self.user)
+        cached = get_cached_user("jti-1", self.loader)
+        self.assertEqual(self.loader.call_count, 1)
+        self.assertEqual(cached.username, "cached-user")
+        self.assertIsNot(cached, get_cached_user("jti-1", self.loader))
+        self.assertEqual(auth_user_cache.stats.snapshot()["local_hits"], 2)
+
+    def test_invalidate_user_drops_all_tokens(self):
+        get_cached_user("jti-1", self.loader)
+        get_cached_user("jti-2", self.loader)
+        invalidate_user(self.user.id)
+        get_cached_user("jti-1", self.loader)
+        get_cached_user("jti-2", self.loader)
+        self.assertEqual(self.loader.call_count, 4)
+
+    def test_tokens_without_jti_are_not_cached(self):
+        get_cached_user(None, self.loader)
+        get_cached_user(None, self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_credentials_are_not_cached(self):
+        self.assertNotIn("password", user_to_values(self.user))
+        get_cached_user("jti-1", self.loader)
+        cached = get_cached_user("jti-1", self.loader)
+        self.assertIn("password", cached.get_deferred_fields())
@@ -0,0 +1,144 @@
+from django.test import TestCase
+
+from care.emr.models import Encounter, Patient, PatientUser
+from care.emr.models.organization import (
+    FacilityOrganization,
+    FacilityOrganizationUser,
+    Organization,
+    OrganizationUser,
+)
+from care.emr.resources.encounter.constants import StatusChoices
+from care.security.authorization.base import AuthorizationController
+from care.security.authorization.cache import clear_permission_roles_cache
+from care.security.models import PermissionModel, RoleModel, RolePermission
+from care.security.permissions.encounter import EncounterPermissions
+from care.security.permissions.patient import PatientPermissions
+from care.utils.tests.test_utils import TestUtils
+
+
+class AuthorizationBatchTestCase(TestUtils, TestCase):
+    """
+    The batch checks must agree with the checks of a single object
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.state = cls.create_state()
+        cls.district = cls.create_district(cls.state)
+        cls.local_body = cls.create_local_body(cls.district)
+        cls.super_user = cls.create_super_user("su", cls.district)
+        cls.facility = cls.create_facility(cls.super_user, cls.district, cls.local_body)
+        cls.user = cls.create_user("staff1", cls.district, home_facility=cls.facility)
+
+        cls.allowed_role = RoleModel.objects.create(name="Batch Allowed")
+        cls.other_role = RoleModel.objects.create(name="Batch Other")
+        for slug in [
+            EncounterPermissions.can_read_encounter.name,
+            EncounterPermissions.can_write_encounter.name,
+            PatientPermissions.can_list_patients.name,
+            PatientPermissions.can_write_patient.name,
+            PatientPermissions.can_view_clinical_data.name,
+        ]:
+            permission, _ = PermissionModel.objects.get_or_create(
+                slug=slug, defaults={"name": slug, "context": "FACILITY"}
+            )
+            RolePermission.objects.create(role=cls.allowed_role, permission=permission)
+
+        facility_orgs = [
+            FacilityOrganization.objects.create(
+                name=f"Department {index}", org_type="dept", facility=cls.facility
+            )
+            for index in range(3)
+        ]
+        FacilityOrganizationUser.objects.create(
+            organization=facility_orgs[0], user=cls.user, role=cls.allowed_role
+        )
+        FacilityOrganizationUser.objects.create(
+            organization=facility_orgs[1], user=cls.user, role=cls.other_role
+        )
+        orgs = [
+            Organization.objects.create(name=f"Ward {index}", org_type="govt")
+            for index in range(2)
+        ]
+        OrganizationUser.objects.create(
+            organization=orgs[0], user=cls.user, role=cls.allowed_role
+        )
+
+        cls.patients = [
+            Patient.objects.create(name=f"Patient {index}", blood_group="A+")
+            for index in range(5)
+        ]
+        cls.patients[0].geo_organization = orgs[0]
+        cls.patients[0].save()
+        cls.patients[1].geo_organization = orgs[1]
+        cls.patients[1].save()
+        PatientUser.objects.create(
+            patient=cls.patients[2], user=cls.user, role=cls.allowed_role
+        )
+
+        cls.encounters = [
+            Encounter.objects.create(
+                patient=cls.patients[3 if index < 3 else 4],  # noqa PLR2004
+                facility=cls.facility,
+                status=status.value,
+                facility_organization_cache=organization_ids,
+            )
+            for index, (status, organization_ids) in enumerate(
+                [
+                    (StatusChoices.in_progress, [facility_orgs[0].id]),
+                    (StatusChoices.in_progress, [facility_orgs[1].id]),
+                    (StatusChoices.completed, [facility_orgs[0].id]),
+                    (StatusChoices.in_progress, [facility_orgs[2].id]),
+                    (StatusChoices.in_progress, []),
+                ]
+            )
+        ]
+
+    def setUp(self):
+        super().setUp()
+        clear_permission_roles_cache()
+
+    def assert_batch_matches(self, action, objects):
+        batch = AuthorizationController.call(f"{action}_batch", self.user, objects)
+        single = {
+            obj.pk: AuthorizationController.call(action, self.user, obj)
+            for obj in objects
+        }
+        self.assertEqual(batch, single)
+        return batch
+
+    def test_encounter_batches_match_single_checks(self):
+        for action in ["can_view_encounter_obj", "can_update_encounter_obj"]:
+            with self.subTest(action=action):
+                batch = self.assert_batch_matches(action, self.encounters)
+                self.assertEqual(set(batch.values()), {True, False})
+
+    def test_patient_batches_match_single_checks(self):
+        for action in [
+            "can_view_patient_obj",
+            "can_write_patient_obj",
+            "can_view_clinical_data",
+        ]:
+            with self.subTest(action=action):
+                batch = self.assert_batch_matches(action, self.patients)
+                self.assertEqual(set(batch.values()), {True, False})
+
+    def test_objects_without_organizations_match_single_checks(self):
+        encounters = self.encounters[-1:]
+        self.assertEqual(
+            self.assert_batch_matches("can_view_encounter_obj", encounters),
+            {encounters[0].pk: True},
+        )
+        FacilityOrganizationUser.objects.filter(
+            user=self.user, role=self.allowed_role
+        ).delete()
+        self.assertEqual(
+            self.assert_batch_matches("can_view_encounter_obj", encounters),
+            {encounters[0].pk: False},
+        )
+
+    def test_superuser_is_allowed_everything(self):
+        batch = AuthorizationController.call(
+            "can_view_encounter_obj_batch", self.super_user, self.encounters
+        )
+        self.assertTrue(all(batch.values()))
@@ -0,0 +1,62 @@
+import datetime
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from care.emr.utils.availability_stats import count_slots, merge_intervals, to_minutes
+from care.emr.utils.slot_materializer import convert_availability_to_slots, is_excluded
+
+
+class CountSlotsTestCase(SimpleTestCase):
+    def materialized_count(self, start, end, slot_size, exceptions):
+        slots = convert_availability_to_slots(
+            [
+                {
+                    "availability": {"start_time": start, "end_time": end},
+                    "slot_size_in_minutes": slot_size,
+                    "availability_id": 1,
+                }
+            ]
+        )
+        exceptions = [
+            SimpleNamespace(
+                start_time=datetime.time.fromisoformat(exception_start),
+                end_time=datetime.time.fromisoformat(exception_end),
+            )
+            for exception_start, exception_end in exceptions
+        ]
+        return sum(not is_excluded(slot, exceptions) for slot in slots.values())
+
+    def counted(self, start, end, slot_size, exceptions):
+        return count_slots(
+            to_minutes(start),
+            to_minutes(end),
+            slot_size,
+            merge_intervals(
+                (to_minutes(exception_start), to_minutes(exception_end))
+                for exception_start, exception_end in exceptions
+            ),
+        )
+
+    def test_matches_materialized_slots(self):
+        cases = [
+            ("09:00", "17:00", 15, []),
+            ("09:00", "12:00", 15, []),
+            ("09:00", "12:00", 20, [("10:00", "10:30")]),
+            ("09:00", "12:10", 30, [("09:10", "09:20"), ("11:50", "13:00")]),
+            ("08:00", "18:00", 10, [("08:00", "08:45"), ("08:30", "09:05")]),
+            ("14:00", "16:00", 45, [("16:00", "17:00")]),
+        ]
+        for case in cases:
+            with self.subTest(case=case):
+                self.assertEqual(self.counted(*case), self.materialized_count(*case))
+
+    def test_long_window_keeps_every_slot(self):
+        self.assertEqual(self.counted("09:00", "17:00", 15, []), 32)
+        self.assertEqual(self.materialized_count("09:00", "17:00", 15, []), 32)
+        self.assertEqual(self.counted("00:00", "23:59", 1, []), 1439)
+
+    def test_invalid_windows_have_no_slots(self):
+        self.assertEqual(self.counted("12:00", "09:00", 15, []), 0)
+        self.assertEqual(self.materialized_count("12:00", "09:00", 15, []), 0)
+        self.assertEqual(self.materialized_count("09:00", "12:00", 0, []), 0)
@@ -0,0 +1,30 @@
+from django.test import SimpleTestCase
+
+from care.emr.models.allergy_intolerance import AllergyIntolerance
+from care.emr.resources.allergy_intolerance.spec import AllergyIntrolanceSpecRead
+
+
+class EMRResourceSerializationTestCase(SimpleTestCase):
+    def setUp(self):
+        self.allergy = AllergyIntolerance(
+            clinical_status="active",
+            verification_status="confirmed",
+            category="food",
+            criticality="low",
+            code={"system": "http://snomed.info/sct", "code": "91935009"},
+        )
+
+    def test_unset_required_field_is_left_out(self):
+        # encounter is required, excluded and never set on read
+        (result,) = AllergyIntrolanceSpecRead.serialize_many([self.allergy])
+        self.assertNotIn("encounter", result)
+        self.assertEqual(result["clinical_status"], "active")
+        self.assertEqual(result["id"], str(self.allergy.external_id))
+
+    def test_matches_model_dump(self):
+        expected = AllergyIntrolanceSpecRead.serialize(self.allergy).model_dump(
+            mode="json", exclude=["meta"]
+        )
+        self.assertEqual(
+            AllergyIntrolanceSpecRead.serialize_json(self.allergy), expected
+        )
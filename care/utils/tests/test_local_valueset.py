@@ -0,0 +1,130 @@
+from django.test import TestCase, override_settings
+
+from care.emr.fhir.exceptions import TerminologyIndexMissError
+from care.emr.fhir.resources.local_valueset import LocalValueSetResource
+from care.emr.models.terminology import TerminologyConcept
+from care.emr.models.valueset import ValueSet
+from care.utils.tests.test_utils import OverrideCache
+
+SNOMED = "http://snomed.info/sct"
+LOINC = "http://loinc.org"
+
+
+def is_a(code, op="is-a"):
+    return {
+        "system": SNOMED,
+        "filter": [{"property": "concept", "op": op, "value": code}],
+    }
+
+
+class LocalValueSetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TerminologyConcept.objects.bulk_create(
+            [
+                TerminologyConcept(system=SNOMED, code="100", display="Fever"),
+                TerminologyConcept(
+                    system=SNOMED, code="101", display="High fever", ancestors=["100"]
+                ),
+                TerminologyConcept(
+                    system=SNOMED, code="102", display="Low fever", ancestors=["100"]
+                ),
+                TerminologyConcept(
+                    system=SNOMED,
+                    code="103",
+                    display="Fever of unknown origin",
+                    ancestors=["100"],
+                    active=False,
+                ),
+                TerminologyConcept(system=SNOMED, code="200", display="Cough"),
+            ]
+        )
+
+    def expand(self, **filters):
+        return [
+            concept.code
+            for concept in LocalValueSetResource().filter(**filters).search()
+        ]
+
+    def test_expand_filters_hierarchy(self):
+        self.assertEqual(self.expand(include=[is_a("100")]), ["100", "101", "102"])
+        self.assertEqual(
+            self.expand(include=[is_a("100", "descendent-of")]), ["101", "102"]
+        )
+        self.assertEqual(
+            self.expand(
+                include=[is_a("100")],
+                exclude=[{"system": SNOMED, "concept": [{"code": "102"}]}],
+            ),
+            ["100", "101"],
+        )
+
+    def test_expand_search_ranks_prefix_matches_first(self):
+        # Then by similarity, the shorter display is closer to the search
+        self.assertEqual(
+            self.expand(include=[is_a("100")], search="fever"), ["100", "102", "101"]
+        )
+        self.assertEqual(self.expand(include=[is_a("100")], search="high"), ["101"])
+        self.assertEqual(
+            self.expand(include=[is_a("100")], search="fever", count=1), ["100"]
+        )
+
+    def test_expand_misses_fall_back(self):
+        for filters in [
+            {"include": [{"system": LOINC}]},
+            {"include": [is_a("100")], "search": "cough"},
+            {
+                "include": [
+                    {
+                        "system": SNOMED,
+                        "filter": [{"property": "parent", "op": "=", "value": "1"}],
+                    }
+                ]
+            },
+        ]:
+            with (
+                self.subTest(filters=filters),
+                self.assertRaises(TerminologyIndexMissError),
+            ):
+                self.expand(**filters)
+
+    def test_validate_code_hits_and_misses(self):
+        resource = LocalValueSetResource().filter(include=[is_a("100")])
+        self.assertTrue(resource.lookup({"system": SNOMED, "code": "101"}))
+        # Known locally but outside the valueset
+        self.assertFalse(resource.lookup({"system": SNOMED, "code": "200"}))
+        self.assertFalse(resource.lookup({"system": SNOMED, "code": "103"}))
+        # Unknown locally, left to the terminology server
+        with self.assertRaises(TerminologyIndexMissError):
+            resource.lookup({"system": SNOMED, "code": "999"})
+        self.assertEqual(
+            resource.lookup_many(SNOMED, ["101", "200", "999"]),
+            {"101": True, "200": False},
+        )
+
+    @override_settings(TERMINOLOGY_LOCAL_INDEX_ENABLED=False)
+    def test_disabled_index_answers_nothing(self):
+        resource = LocalValueSetResource().filter(include=[is_a("100")])
+        self.assertEqual(resource.lookup_many(SNOMED, ["101"]), {})
+        with self.assertRaises(TerminologyIndexMissError):
+            resource.search()
+
+    def test_membership_cache_follows_saved_composition(self):
+        with OverrideCache(self):
+            ValueSet.objects.create(
+                slug="fevers", name="Fevers", compose={"include": [is_a("100")]}
+            )
+            valueset = ValueSet.get_cached("fevers")
+            fever = {"system": SNOMED, "code": "101"}
+            cough = {"system": SNOMED, "code": "200"}
+            self.assertEqual(valueset.lookup_many([fever, cough]), [True, False])
+            with self.assertNumQueries(0):
+                self.assertEqual(valueset.lookup_many([fever, cough]), [True, False])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                valueset.compose = {
+                    "include": [{"system": SNOMED, "concept": [{"code": "200"}]}]
+                }
+                valueset.save()
+            valueset = ValueSet.get_cached("fevers")
+            self.assertEqual(valueset.lookup_many([fever, cough]), [False, True])
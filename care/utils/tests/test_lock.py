@@ -0,0 +1,172 @@
+import threading
+import time
+import uuid
+from unittest import SkipTest
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from care.utils.lock import Lock, ObjectLocked, get_redis_client, lock_stats
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "config.caches.LocMemCache",
+            "LOCATION": f"care-test-{uuid.uuid4()}",
+        }
+    },
+    LOCK_RETRY_DELAY=0.01,
+)
+class LockTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        lock_stats.reset()
+
+    def test_held_lock_fails_immediately(self):
+        with Lock("resource"), self.assertRaises(ObjectLocked):
+            Lock("resource").acquire()
+        self.assertEqual(lock_stats.snapshot()["timeouts"], 1)
+
+    def test_blocking_acquire_waits_for_release(self):
+        holder = Lock("resource")
+        holder.acquire()
+        timer = threading.Timer(0.1, holder.release)
+        timer.start()
+        with Lock("resource", blocking_timeout=5):
+            pass
+        timer.join()
+        stats = lock_stats.snapshot()
+        self.assertEqual(stats["acquired"], 2)
+        self.assertEqual(stats["contended"], 1)
+        self.assertGreater(stats["max_wait"], 0)
+
+    def test_blocking_acquire_gives_up(self):
+        with Lock("resource"):
+            start = time.monotonic()
+            with self.assertRaises(ObjectLocked):
+                Lock("resource", blocking_timeout=0.1).acquire()
+            self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+    def test_release_leaves_lock_of_another_owner(self):
+        lock = Lock("resource")
+        lock.acquire()
+        # The lease expired and someone else took the lock
+        cache.set(lock.key, "another-owner")
+        self.assertFalse(lock.release())
+        self.assertEqual(cache.get(lock.key), "another-owner")
+        self.assertEqual(lock_stats.snapshot()["lost"], 1)
+
+    def test_renew_only_while_owned(self):
+        lock = Lock("resource", timeout=5)
+        lock.acquire()
+        self.assertTrue(lock.renew())
+        cache.delete(lock.key)
+        self.assertFalse(lock.renew())
+        self.assertFalse(lock.release())
+        self.assertEqual(lock_stats.snapshot()["lost"], 1)
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": settings.REDIS_URL,
+            "KEY_PREFIX": f"care-test-{uuid.uuid4()}",
+        }
+    },
+    LOCK_RETRY_DELAY=0.01,
+    LOCK_MAX_RETRY_DELAY=0.05,
+    LOCK_QUEUE_HEARTBEAT_TIMEOUT=0.2,
+)
+class RedisLockTestCase(SimpleTestCase):
+    """
+    Runs the lua scripts of the lock, skipped when redis is not reachable
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            redis.Redis.from_url(settings.REDIS_URL).ping()
+        except redis.ConnectionError as e:
+            msg = "Redis is not available"
+            raise SkipTest(msg) from e
+        super().setUpClass()
+
+    def setUp(self):
+        lock_stats.reset()
+        self.client = get_redis_client()
+        self.key = uuid.uuid4().hex
+
+    def queue_waiter(self, key):
+        waiter = Lock(key)
+        waiter.token = uuid.uuid4().hex
+        waiter._enqueue(self.client)  # noqa SLF001
+        return waiter
+
+    def test_held_lock_fails_and_is_released_by_owner_only(self):
+        lock = Lock(self.key)
+        lock.acquire()
+        with self.assertRaises(ObjectLocked):
+            Lock(self.key).acquire()
+        self.client.set(lock.redis_key, "another-owner")
+        self.assertFalse(lock.release())
+        self.assertEqual(self.client.get(lock.redis_key), b"another-owner")
+        self.client.delete(lock.redis_key)
+
+    def test_blocking_acquire_waits_for_release(self):
+        holder = Lock(self.key)
+        holder.acquire()
+        timer = threading.Timer(0.1, holder.release)
+        timer.start()
+        with Lock(self.key, blocking_timeout=5) as lock:
+            self.assertEqual(self.client.get(lock.redis_key), lock.token.encode())
+        timer.join()
+        self.assertEqual(lock_stats.snapshot()["contended"], 1)
+        self.assertFalse(self.client.exists(lock.queue_key, lock.heartbeat_key))
+
+    def test_live_waiter_goes_first(self):
+        waiter = self.queue_waiter(self.key)
+        with self.assertRaises(ObjectLocked):
+            Lock(self.key).acquire()
+        self.assertTrue(waiter._try_acquire(self.client))  # noqa SLF001
+        waiter.release()
+
+    def test_dead_waiter_is_dropped(self):
+        self.queue_waiter(self.key)
+        time.sleep(0.3)
+        with Lock(self.key):
+            pass
+
+    def test_waiters_acquire_in_arrival_order(self):
+        holder = Lock(self.key)
+        holder.acquire()
+        order = []
+
+        def wait(name):
+            with Lock(self.key, blocking_timeout=5):
+                order.append(name)
+
+        first = threading.Thread(target=wait, args=("first",))
+        first.start()
+        time.sleep(0.1)
+        second = threading.Thread(target=wait, args=("second",))
+        second.start()
+        time.sleep(0.1)
+        holder.release()
+        first.join()
+        second.join()
+        self.assertEqual(order, ["first", "second"])
+
+    def test_renew_extends_lease_while_owned(self):
+        lock = Lock(self.key, timeout=1)
+        lock.acquire()
+        self.assertTrue(lock.renew(timeout=30))
+        self.assertGreater(self.client.pttl(lock.redis_key), 1000)
+        self.client.set(lock.redis_key, "another-owner")
+        self.assertFalse(lock.renew())
+        self.assertFalse(lock.release())
+        self.assertEqual(lock_stats.snapshot()["lost"], 1)
+        self.client.delete(lock.redis_key)
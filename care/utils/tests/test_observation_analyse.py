@@ -0,0 +1,178 @@
+from datetime import UTC, datetime, timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from care.emr.models import Encounter, Patient
+from care.emr.models.observation import Observation
+from care.emr.resources.encounter.constants import StatusChoices
+from care.emr.resources.questionnaire.spec import QuestionType
+from care.utils.tests.test_utils import TestUtils
+
+LOINC = "http://loinc.org"
+HEART_RATE = {"system": LOINC, "code": "8867-4"}
+BODY_WEIGHT = {"system": LOINC, "code": "29463-7"}
+NOTES = {"system": LOINC, "code": "48767-8"}
+
+
+class ObservationAnalyseTestCase(TestUtils, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.state = cls.create_state()
+        cls.district = cls.create_district(cls.state)
+        cls.local_body = cls.create_local_body(cls.district)
+        cls.user = cls.create_super_user("su", cls.district)
+        cls.facility = cls.create_facility(cls.user, cls.district, cls.local_body)
+        cls.patient = Patient.objects.create(name="Patient", blood_group="A+")
+        cls.encounter, cls.next_encounter = [
+            Encounter.objects.create(
+                patient=cls.patient,
+                facility=cls.facility,
+                status=StatusChoices.in_progress.value,
+            )
+            for _ in range(2)
+        ]
+        cls.start = datetime(2024, 1, 1, tzinfo=UTC)
+        cls.next_day = cls.start + timedelta(days=1)
+
+        for hour in range(12):
+            cls.create_observation(
+                HEART_RATE,
+                cls.start + timedelta(hours=hour),
+                QuestionType.integer,
+                {"value": str(60 + hour)},
+            )
+        # Not a number, counted but left out of the aggregates
+        cls.create_observation(
+            HEART_RATE,
+            cls.start + timedelta(hours=12),
+            QuestionType.integer,
+            {"value": "unknown"},
+        )
+        for hour in range(3):
+            cls.create_observation(
+                HEART_RATE,
+                cls.next_day + timedelta(hours=hour),
+                QuestionType.integer,
+                {"value": str(90 + hour)},
+                encounter=cls.next_encounter,
+            )
+        for hour in range(5):
+            cls.create_observation(
+                BODY_WEIGHT,
+                cls.start + timedelta(hours=hour),
+                QuestionType.quantity,
+                {"value_quantity": {"value": 50.5 + hour}},
+            )
+        for hour in range(2):
+            cls.create_observation(
+                NOTES,
+                cls.start + timedelta(hours=hour),
+                QuestionType.string,
+                {"value": "Stable"},
+            )
+
+    @classmethod
+    def create_observation(cls, code, effective_datetime, value_type, value, **kwargs):
+        data = {
+            "status": "final",
+            "main_code": code,
+            "subject_type": "patient",
+            "subject_id": cls.patient.external_id,
+            "patient": cls.patient,
+            "encounter": cls.encounter,
+            "effective_datetime": effective_datetime,
+            "data_entered_by": cls.user,
+            "created_by": cls.user,
+            "updated_by": cls.user,
+            "value_type": value_type.value,
+            "value": value,
+            "note": "",
+            "interpretation": "",
+        }
+        data.update(kwargs)
+        return Observation.objects.create(**data)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def analyse(self, **data):
+        response = self.client.post(
+            f"/api/v1/patient/{self.patient.external_id}/observation/analyse/",
+            data,
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {
+            result["code"]["code"]: result.get("results", result.get("buckets"))
+            for result in response.json()["results"]
+        }
+
+    def effective_times(self, results):
+        return [
+            datetime.fromisoformat(result["effective_datetime"]) for result in results
+        ]
+
+    def test_page_size_applies_to_each_code(self):
+        results = self.analyse(codes=[HEART_RATE, BODY_WEIGHT, NOTES], page_size=4)
+        self.assertEqual(
+            self.effective_times(results[HEART_RATE["code"]]),
+            [
+                self.next_day + timedelta(hours=2),
+                self.next_day + timedelta(hours=1),
+                self.next_day,
+                self.start + timedelta(hours=12),
+            ],
+        )
+        self.assertEqual(
+            [
+                result["value"]["value_quantity"]["value"]
+                for result in results[BODY_WEIGHT["code"]]
+            ],
+            [54.5, 53.5, 52.5, 51.5],
+        )
+        self.assertEqual(len(results[NOTES["code"]]), 2)
+
+    def test_codes_are_fetched_in_one_query(self):
+        with CaptureQueriesContext(connection) as single_code:
+            self.analyse(codes=[HEART_RATE])
+        with CaptureQueriesContext(connection) as several_codes:
+            self.analyse(codes=[HEART_RATE, BODY_WEIGHT, NOTES])
+        self.assertEqual(len(several_codes), len(single_code))
+
+    def test_encounter_and_time_window_filters(self):
+        results = self.analyse(
+            codes=[HEART_RATE],
+            encounter=str(self.encounter.external_id),
+            effective_datetime_after=(self.start + timedelta(hours=2)).isoformat(),
+            effective_datetime_before=(self.start + timedelta(hours=5)).isoformat(),
+        )
+        self.assertEqual(
+            self.effective_times(results[HEART_RATE["code"]]),
+            [self.start + timedelta(hours=hour) for hour in (5, 4, 3, 2)],
+        )
+
+        results = self.analyse(
+            codes=[HEART_RATE], encounter=str(self.next_encounter.external_id)
+        )
+        self.assertEqual(len(results[HEART_RATE["code"]]), 3)
+
+    def test_bucket_aggregates_numeric_values(self):
+        results = self.analyse(codes=[HEART_RATE, BODY_WEIGHT, NOTES], bucket="day")
+        aggregates = {
+            code: [
+                (bucket["count"], bucket["min"], bucket["max"], bucket["avg"])
+                for bucket in buckets
+            ]
+            for code, buckets in results.items()
+        }
+        self.assertEqual(
+            aggregates,
+            {
+                HEART_RATE["code"]: [(13, 60.0, 71.0, 65.5), (3, 90.0, 92.0, 91.0)],
+                BODY_WEIGHT["code"]: [(5, 50.5, 54.5, 52.5)],
+                NOTES["code"]: [(2, None, None, None)],
+            },
+        )
@@ -0,0 +1,117 @@
+import io
+from types import SimpleNamespace
+from unittest import mock
+
+import boto3
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+from django.test import SimpleTestCase, override_settings
+
+from care.emr.utils.file_manager import S3FilesManager
+from care.utils.csp.client import (
+    ObjectTooLargeError,
+    clear_clients,
+    get_s3_client,
+)
+from care.utils.csp.config import BucketType
+
+CONFIG = {
+    "region_name": "ap-south-1",
+    "aws_access_key_id": "key",
+    "aws_secret_access_key": "secret",
+    "endpoint_url": "http://localhost:4566",
+}
+
+
+class S3ClientTestCase(SimpleTestCase):
+    def setUp(self):
+        clear_clients()
+
+    def test_clients_are_shared_per_config(self):
+        client = get_s3_client(CONFIG)
+        self.assertIs(get_s3_client(dict(CONFIG)), client)
+        self.assertIsNot(
+            get_s3_client({**CONFIG, "endpoint_url": "http://localhost:9000"}),
+            client,
+        )
+
+    def test_read_signed_urls_build_one_client(self):
+        files = [
+            SimpleNamespace(file_type="patient", internal_name=f"{index}.pdf")
+            for index in range(3)
+        ]
+        with (
+            mock.patch(
+                "care.utils.csp.client.get_client_config",
+                return_value=(CONFIG, "bucket"),
+            ),
+            mock.patch(
+                "care.utils.csp.client.boto3.session.Session",
+                wraps=boto3.session.Session,
+            ) as session,
+        ):
+            urls = S3FilesManager(BucketType.PATIENT).read_signed_urls(files)
+        session.assert_called_once()
+        self.assertEqual(len(urls), 3)
+        self.assertIn("/bucket/patient/2.pdf", urls[2])
+
+
+@override_settings(
+    FILE_STREAM_CHUNK_SIZE=4,
+    FILE_CONTENTS_MAX_SIZE=8,
+    FILE_UPLOAD_MULTIPART_THRESHOLD=1024,
+    FILE_UPLOAD_PART_SIZE=5 * 1024 * 1024,
+    FILE_UPLOAD_MAX_CONCURRENCY=1,
+)
+class S3TransferTestCase(SimpleTestCase):
+    def setUp(self):
+        clear_clients()
+        self.patcher = mock.patch(
+            "care.utils.csp.client.get_client_config",
+            return_value=(CONFIG, "bucket"),
+        )
+        self.patcher.start()
+        self.addCleanup(self.patcher.stop)
+        self.manager = S3FilesManager(BucketType.PATIENT)
+        self.file = SimpleNamespace(file_type="patient", internal_name="file.pdf")
+        self.stubber = Stubber(get_s3_client(CONFIG))
+        self.stubber.activate()
+        self.addCleanup(self.stubber.deactivate)
+
+    def stub_get_object(self, content):
+        self.stubber.add_response(
+            "get_object",
+            {
+                "Body": StreamingBody(io.BytesIO(content), len(content)),
+                "ContentLength": len(content),
+                "ContentType": "application/pdf",
+            },
+            {"Bucket": "bucket", "Key": "patient/file.pdf"},
+        )
+
+    def test_stream_contents_in_chunks(self):
+        self.stub_get_object(b"0123456789")
+        content_type, chunks = self.manager.stream_contents(self.file)
+        self.assertEqual(content_type, "application/pdf")
+        self.assertEqual(list(chunks), [b"0123", b"4567", b"89"])
+
+    def test_file_contents_refuses_large_objects(self):
+        self.stub_get_object(b"0123456789")
+        with self.assertRaises(ObjectTooLargeError):
+            self.manager.file_contents(self.file)
+        self.stub_get_object(b"01234567")
+        self.assertEqual(self.manager.file_contents(self.file)[1], b"01234567")
+
+    def test_large_uploads_are_multipart(self):
+        # Parts are at least 5MB in S3, this is sent as two of them
+        content = b"0" * (6 * 1024 * 1024)
+        self.stubber.add_response(
+            "create_multipart_upload", {"UploadId": "upload"}, None
+        )
+        self.stubber.add_response("upload_part", {"ETag": "1"}, None)
+        self.stubber.add_response("upload_part", {"ETag": "2"}, None)
+        self.stubber.add_response("complete_multipart_upload", {}, None)
+        self.manager.upload_fileobj(
+            self.file, io.BytesIO(content), ContentType="application/pdf"
+        )
+        self.stubber.assert_no_pending_responses()
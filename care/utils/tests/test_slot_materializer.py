@@ -0,0 +1,123 @@
+import datetime
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from care.emr.models.scheduling.booking import TokenSlot
+from care.emr.models.scheduling.schedule import (
+    Availability,
+    AvailabilityException,
+    SchedulableUserResource,
+    Schedule,
+)
+from care.emr.resources.scheduling.schedule.spec import SlotTypeOptions
+from care.emr.utils.slot_materializer import (
+    compute_slots,
+    ensure_slots_materialized,
+    get_materialization_window,
+    get_slots_for_day,
+    materialize_slots,
+)
+from care.utils.tests.test_utils import OverrideCache, TestUtils
+
+
+class SlotMaterializerTestCase(TestUtils, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.state = cls.create_state()
+        cls.district = cls.create_district(cls.state)
+        cls.local_body = cls.create_local_body(cls.district)
+        cls.user = cls.create_super_user("su", cls.district)
+        cls.facility = cls.create_facility(cls.user, cls.district, cls.local_body)
+        cls.resource = SchedulableUserResource.objects.create(
+            facility=cls.facility, resource=cls.user
+        )
+        cls.day = timezone.localdate() + timedelta(days=2)
+        schedule = Schedule.objects.create(
+            resource=cls.resource,
+            name="Schedule",
+            valid_from=timezone.now() - timedelta(days=1),
+            valid_to=timezone.now() + timedelta(days=365),
+        )
+        cls.availability = Availability.objects.create(
+            schedule=schedule,
+            name="Morning",
+            slot_type=SlotTypeOptions.appointment.value,
+            slot_size_in_minutes=30,
+            tokens_per_slot=1,
+            availability=[
+                {
+                    "day_of_week": day_of_week,
+                    "start_time": "09:00:00",
+                    "end_time": "11:00:00",
+                }
+                for day_of_week in range(7)
+            ],
+        )
+
+    def at(self, day, time):
+        return datetime.datetime.combine(
+            day, datetime.time.fromisoformat(time), tzinfo=datetime.UTC
+        )
+
+    def slot_starts(self, day):
+        return [slot.start_datetime for slot in get_slots_for_day(self.resource, day)]
+
+    def test_compute_slots_skips_exceptions(self):
+        AvailabilityException.objects.create(
+            resource=self.resource,
+            name="Meeting",
+            valid_from=self.day,
+            valid_to=self.day,
+            start_time=datetime.time(9, 45),
+            end_time=datetime.time(10, 15),
+        )
+        slots = compute_slots(self.resource, self.day, self.day)
+        self.assertEqual(
+            sorted(start for start, _, _ in slots),
+            [self.at(self.day, "09:00"), self.at(self.day, "10:30")],
+        )
+        next_day = self.day + timedelta(days=1)
+        self.assertEqual(len(compute_slots(self.resource, next_day, next_day)), 4)
+
+    def test_materialize_keeps_booked_stale_slots(self):
+        booked = TokenSlot.objects.create(
+            resource=self.resource,
+            availability=self.availability,
+            start_datetime=self.at(self.day, "13:00"),
+            end_datetime=self.at(self.day, "13:30"),
+            allocated=1,
+        )
+        unbooked = TokenSlot.objects.create(
+            resource=self.resource,
+            availability=self.availability,
+            start_datetime=self.at(self.day, "14:00"),
+            end_datetime=self.at(self.day, "14:30"),
+        )
+        with OverrideCache(self):
+            materialize_slots(self.resource, self.day, self.day)
+            materialize_slots(self.resource, self.day, self.day)
+
+        booked.refresh_from_db()
+        unbooked.refresh_from_db()
+        self.assertFalse(booked.deleted)
+        self.assertTrue(unbooked.deleted)
+        self.assertEqual(
+            self.slot_starts(self.day),
+            [
+                self.at(self.day, time)
+                for time in ("09:00", "09:30", "10:00", "10:30", "13:00")
+            ],
+        )
+
+    def test_ensure_slots_materialized_beyond_window(self):
+        from_date, to_date = get_materialization_window()
+        day = to_date + timedelta(days=5)
+        with OverrideCache(self):
+            ensure_slots_materialized(self.resource, day)
+
+        self.assertEqual(len(self.slot_starts(day)), 4)
+        # Only the requested day is materialized, not the rolling window
+        self.assertFalse(self.slot_starts(from_date))
+        self.assertFalse(self.slot_starts(to_date))
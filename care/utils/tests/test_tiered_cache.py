@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from care.utils.cache.tiered_cache import LRUCache, TieredCache
+
+
+class LRUCacheTestCase(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(maxsize=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        self.assertEqual(lru.get("a"), 1)
+        lru.set("c", 3)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("a"), 1)
+        self.assertEqual(lru.get("c"), 3)
+
+    def test_entries_expire(self):
+        lru = LRUCache(maxsize=2, ttl=10)
+        with mock.patch("care.utils.cache.tiered_cache.time.monotonic") as monotonic:
+            monotonic.return_value = 100
+            lru.set("a", 1)
+            monotonic.return_value = 105
+            self.assertEqual(lru.get("a"), 1)
+            monotonic.return_value = 111
+            self.assertIsNone(lru.get("a"))
+        self.assertEqual(len(lru), 0)
+
+
+class TieredCacheTestCase(SimpleTestCase):
+    def test_get_or_set_records_stats(self):
+        tiered = TieredCache("test", use_shared=False)
+        loader = mock.Mock(return_value="value")
+        self.assertEqual(tiered.get_or_set("key", loader), "value")
+        self.assertEqual(tiered.get_or_set("key", loader), "value")
+        loader.assert_called_once()
+        stats = tiered.stats.snapshot()
+        self.assertEqual(stats["local_hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_none_is_not_cached(self):
+        tiered = TieredCache("test", use_shared=False)
+        loader = mock.Mock(return_value=None)
+        tiered.get_or_set("key", loader)
+        tiered.get_or_set("key", loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_delete(self):
+        tiered = TieredCache("test", use_shared=False)
+        tiered.set("key", 1)
+        tiered.delete("key")
+        self.assertIsNone(tiered.get("key"))
@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from care.utils.timeseries import MIN_MAX, downsample, downsample_columns, lttb
+
+
+class DownsampleTestCase(SimpleTestCase):
+    def setUp(self):
+        self.xs = list(range(100))
+        self.ys = [(x * 37) % 23 for x in self.xs]
+
+    def test_lttb_keeps_threshold_points_with_endpoints(self):
+        kept = lttb(self.xs, self.ys, 10)
+        self.assertEqual(len(kept), 10)
+        self.assertEqual(kept[0], 0)
+        self.assertEqual(kept[-1], 99)
+        self.assertEqual(kept, sorted(kept))
+
+    def test_lttb_keeps_short_series(self):
+        self.assertEqual(lttb(self.xs[:5], self.ys[:5], 10), list(range(5)))
+
+    def test_lttb_keeps_spike(self):
+        ys = [1] * 100
+        ys[42] = 50
+        self.assertIn(42, lttb(self.xs, ys, 10))
+
+    def test_min_max_keeps_extremes_of_each_bucket(self):
+        ys = [1] * 100
+        ys[13] = -5
+        ys[87] = 50
+        kept = downsample(self.xs, ys, 10, MIN_MAX)
+        self.assertLessEqual(len(kept), 10)
+        self.assertIn(13, kept)
+        self.assertIn(87, kept)
+
+    def test_missing_values_are_skipped(self):
+        ys = [None if x % 2 else Decimal(x) for x in self.xs]
+        kept = downsample(self.xs, ys, 10)
+        self.assertEqual(len(kept), 10)
+        self.assertTrue(all(ys[index] is not None for index in kept))
+
+    def test_columns_share_rows(self):
+        kept = downsample_columns(self.xs, [self.ys, ["text"] * 100], 10)
+        self.assertEqual(kept, lttb(self.xs, self.ys, 10))
+        self.assertEqual(len(downsample_columns(self.xs, [["text"] * 100], 10)), 10)
@@ -0,0 +1,32 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from care.utils.jwks.token_generator import get_cached_jwt, token_cache
+
+
+class CachedJWTTestCase(SimpleTestCase):
+    def setUp(self):
+        token_cache.clear()
+
+    def test_token_is_reused_for_same_claims(self):
+        token = get_cached_jwt()
+        self.assertEqual(get_cached_jwt(), token)
+        self.assertNotEqual(get_cached_jwt({"asset_id": "1"}), token)
+        self.assertEqual(
+            get_cached_jwt({"asset_id": "1"}), get_cached_jwt({"asset_id": "1"})
+        )
+
+    def test_token_is_regenerated_close_to_expiry(self):
+        with (
+            mock.patch("care.utils.cache.tiered_cache.time.monotonic") as monotonic,
+            mock.patch(
+                "care.utils.jwks.token_generator.generate_jwt", side_effect=["a", "b"]
+            ),
+        ):
+            monotonic.return_value = 100
+            self.assertEqual(get_cached_jwt(exp=60), "a")
+            monotonic.return_value = 140
+            self.assertEqual(get_cached_jwt(exp=60), "a")
+            monotonic.return_value = 150
+            self.assertEqual(get_cached_jwt(exp=60), "b")
@@ -0,0 +1,98 @@
+from decimal import Decimal
+
+LTTB = "lttb"
+MIN_MAX = "minmax"
+DOWNSAMPLE_METHODS = (LTTB, MIN_MAX)
+
+
+def is_numeric(value):
+    return isinstance(value, int | float | Decimal) and not isinstance(value, bool)
+
+
+def lttb(xs, ys, threshold):
+    """
+    Largest triangle three buckets downsampling of the points (xs[i], ys[i])
+    sorted by x, returns the indices of at most `threshold` points to keep
+    """
+    length = len(xs)
+    if threshold >= length or threshold < 3:  # noqa PLR2004
+        return list(range(length))
+    xs = [float(x) for x in xs]
+    ys = [float(y) for y in ys]
+    # The first and last points are always kept, the rest is split in buckets
+    bucket_size = (length - 2) / (threshold - 2)
+    selected = [0]
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, length)
+        next_count = next_end - next_start
+        average_x = sum(xs[next_start:next_end]) / next_count
+        average_y = sum(ys[next_start:next_end]) / next_count
+
+        best = start
+        best_area = -1.0
+        for index in range(start, end):
+            area = abs(
+                (xs[previous] - average_x) * (ys[index] - ys[previous])
+                - (xs[previous] - xs[index]) * (average_y - ys[previous])
+            )
+            if area > best_area:
+                best, best_area = index, area
+        selected.append(best)
+        previous = best
+    selected.append(length - 1)
+    return selected
+
+
+def min_max(ys, threshold):
+    """
+    Indices of the lowest and highest point of each of `threshold` / 2 equally
+    sized buckets, keeps the peaks that averaging methods smooth out
+    """
+    length = len(ys)
+    buckets = threshold // 2
+    if threshold >= length or buckets < 1:
+        return list(range(length))
+    selected = set()
+    for bucket in range(buckets):
+        start = bucket * length // buckets
+        end = (bucket + 1) * length // buckets
+        indices = range(start, end)
+        selected.add(min(indices, key=ys.__getitem__))
+        selected.add(max(indices, key=ys.__getitem__))
+    return sorted(selected)
+
+
+def downsample(xs, ys, threshold, method=LTTB):
+    """
+    Indices of the points of the series to keep, points without a numeric value
+    are ignored
+    """
+    indices = [index for index, y in enumerate(ys) if is_numeric(y)]
+    values = [ys[index] for index in indices]
+    if method == MIN_MAX:
+        kept = min_max(values, threshold)
+    else:
+        kept = lttb([xs[index] for index in indices], values, threshold)
+    return [indices[index] for index in kept]
+
+
+def downsample_columns(xs, columns, threshold, method=LTTB):
+    """
+    Indices of the rows to keep so that each numeric column keeps at most
+    `threshold` of its points, the columns share their rows so the kept rows are
+    the union of the rows kept for each column
+    """
+    if len(xs) <= threshold:
+        return list(range(len(xs)))
+    selected = set()
+    for values in columns:
+        selected.update(downsample(xs, values, threshold, method))
+    if not selected:
+        # Nothing to chart, rows are thinned out evenly instead
+        step = len(xs) / threshold
+        selected = {int(index * step) for index in range(threshold)}
+    return sorted(selected)
@@ -13,11 +13,13 @@ from rest_framework import HTTP_HEADER_ENCODING
 from rest_framework.authentication import BasicAuthentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import Token
 
 from care.facility.models import Facility
 from care.facility.models.asset import Asset
 from care.users.models import User
+from care.utils.cache.auth_user_cache import get_cached_user
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +61,12 @@ class CustomJWTAuthentication(JWTAuthentication):
                 }
             ) from e
 
+    def get_user(self, validated_token):
+        return get_cached_user(
+            validated_token.get(api_settings.JTI_CLAIM),
+            lambda: super(CustomJWTAuthentication, self).get_user(validated_token),
+        )
+
 
 class CustomBasicAuthentication(BasicAuthentication):
     def authenticate_header(self, request):
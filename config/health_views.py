@@ -1,7 +1,11 @@
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from care.emr.fhir.resources.base import fhir_response_cache
 from care.users.api.serializers.user import UserBaseMinimumSerializer
+from care.utils.cache.auth_user_cache import auth_user_cache
+from care.utils.lock import lock_stats
 from config.authentication import (
     MiddlewareAssetAuthentication,
     MiddlewareAuthentication,
@@ -20,3 +24,36 @@ class MiddlewareAssetAuthenticationVerifyView(APIView):
 
     def get(self, request):
         return Response(UserBaseMinimumSerializer(request.user).data)
+
+
+class AuthUserCacheStatsView(APIView):
+    """
+    Hit rate of the authenticated user cache, counted per worker process
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(auth_user_cache.stats.snapshot())
+
+
+class LockStatsView(APIView):
+    """
+    Wait time and contention of distributed locks, counted per worker process
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(lock_stats.snapshot())
+
+
+class FHIRResponseCacheStatsView(APIView):
+    """
+    Hit rate of the terminology server response cache, counted per worker process
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(fhir_response_cache.stats.snapshot())
@@ -70,6 +70,13 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # timeout for setnx lock
 LOCK_TIMEOUT = env.int("LOCK_TIMEOUT", default=32)
+# upper bound of blocking lock waits and the backoff between attempts, in seconds
+LOCK_MAX_WAIT = env.int("LOCK_MAX_WAIT", default=60)
+LOCK_RETRY_DELAY = env.float("LOCK_RETRY_DELAY", default=0.01)
+LOCK_MAX_RETRY_DELAY = env.float("LOCK_MAX_RETRY_DELAY", default=0.5)
+# Queued waiters that have not retried for this long are considered dead, has to
+# be well above LOCK_MAX_RETRY_DELAY
+LOCK_QUEUE_HEARTBEAT_TIMEOUT = env.float("LOCK_QUEUE_HEARTBEAT_TIMEOUT", default=2)
 
 REDIS_URL = env("REDIS_URL", default="redis://localhost:6379")
 
@@ -366,6 +373,12 @@ REST_FRAMEWORK = {
         "config.authentication.CustomBasicAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
+    "DEFAULT_PARSER_CLASSES": [
+        "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        "care.emr.utils.batch_requests.BatchBodyParser",
+    ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
         "care.security.utils.permission_class.CareAuthentication",
@@ -644,7 +657,78 @@ PLAUSIBLE_AUTH_TOKEN = env("PLAUSIBLE_AUTH_TOKEN", default="")
 
 # Timeout for middleware request (in seconds)
 MIDDLEWARE_REQUEST_TIMEOUT = env.int("MIDDLEWARE_REQUEST_TIMEOUT", 20)
+# Keep alive connections to middlewares, number of hosts and connections per host
+MIDDLEWARE_POOL_CONNECTIONS = env.int("MIDDLEWARE_POOL_CONNECTIONS", default=64)
+MIDDLEWARE_POOL_SIZE = env.int("MIDDLEWARE_POOL_SIZE", default=4)
+# Middlewares polled concurrently by the asset and location monitors
+MIDDLEWARE_STATUS_MAX_CONCURRENCY = env.int(
+    "MIDDLEWARE_STATUS_MAX_CONCURRENCY", default=16
+)
+# Middleware status probes are shared by the monitors within a monitoring cycle
+MIDDLEWARE_STATUS_CACHE_TTL = env.int("MIDDLEWARE_STATUS_CACHE_TTL", default=60 * 5)
 
 SNOWSTORM_DEPLOYMENT_URL = env(
     "SNOWSTORM_DEPLOYMENT_URL", default="http://165.22.211.144/fhir"
 )
+
+# Answer ValueSet expand/validate from the local terminology index when possible
+TERMINOLOGY_LOCAL_INDEX_ENABLED = env.bool(
+    "TERMINOLOGY_LOCAL_INDEX_ENABLED", default=True
+)
+# Concurrent $expand calls across code systems of a ValueSet
+TERMINOLOGY_MAX_CONCURRENCY = env.int("TERMINOLOGY_MAX_CONCURRENCY", default=8)
+# Seconds to wait for all code systems before returning partial results
+TERMINOLOGY_EXPAND_DEADLINE = env.float("TERMINOLOGY_EXPAND_DEADLINE", default=5)
+
+# Terminology server client
+FHIR_CLIENT_POOL_SIZE = env.int(
+    "FHIR_CLIENT_POOL_SIZE", default=TERMINOLOGY_MAX_CONCURRENCY
+)
+FHIR_CLIENT_RETRIES = env.int("FHIR_CLIENT_RETRIES", default=2)
+FHIR_CLIENT_TIMEOUT = env.int("FHIR_CLIENT_TIMEOUT", default=60)
+FHIR_RESPONSE_CACHE_ENABLED = env.bool("FHIR_RESPONSE_CACHE_ENABLED", default=True)
+# Use redis in addition to the in process LRU
+FHIR_RESPONSE_CACHE_SHARED = env.bool("FHIR_RESPONSE_CACHE_SHARED", default=True)
+FHIR_RESPONSE_CACHE_SIZE = env.int("FHIR_RESPONSE_CACHE_SIZE", default=2048)
+FHIR_RESPONSE_CACHE_LOCAL_TTL = env.int("FHIR_RESPONSE_CACHE_LOCAL_TTL", default=60 * 5)
+FHIR_RESPONSE_CACHE_TTL = env.int("FHIR_RESPONSE_CACHE_TTL", default=60 * 60 * 6)
+
+# Permission to role mapping used by authorization checks, the local copy is not
+# invalidated across processes so it is kept short lived
+AUTHZ_ROLE_CACHE_LOCAL_TTL = env.int("AUTHZ_ROLE_CACHE_LOCAL_TTL", default=30)
+AUTHZ_ROLE_CACHE_TTL = env.int("AUTHZ_ROLE_CACHE_TTL", default=60 * 60 * 24)
+
+# Worker threads used to run GET requests of a parallel batch request
+BATCH_REQUEST_MAX_WORKERS = env.int("BATCH_REQUEST_MAX_WORKERS", default=8)
+
+# Users authenticated by a JWT are cached by the token's jti, updates to the user
+# clear the shared cache while other processes may keep their local copy for
+# AUTH_USER_CACHE_LOCAL_TTL seconds
+AUTH_USER_CACHE_ENABLED = env.bool("AUTH_USER_CACHE_ENABLED", default=True)
+AUTH_USER_CACHE_SIZE = env.int("AUTH_USER_CACHE_SIZE", default=4096)
+AUTH_USER_CACHE_LOCAL_TTL = env.int("AUTH_USER_CACHE_LOCAL_TTL", default=30)
+AUTH_USER_CACHE_TTL = env.int("AUTH_USER_CACHE_TTL", default=60 * 5)
+
+# Appointment slots are created ahead of time for this many days, changes to
+# schedules and availability exceptions recreate them in the background
+SLOT_MATERIALIZATION_DAYS = env.int("SLOT_MATERIALIZATION_DAYS", default=30)
+
+# Connections kept by each shared S3 client
+S3_MAX_POOL_CONNECTIONS = env.int("S3_MAX_POOL_CONNECTIONS", default=20)
+
+# Files are streamed in chunks of this many bytes, reading a whole file into
+# memory is refused above FILE_CONTENTS_MAX_SIZE
+FILE_STREAM_CHUNK_SIZE = env.int("FILE_STREAM_CHUNK_SIZE", default=1024 * 1024)
+FILE_CONTENTS_MAX_SIZE = env.int("FILE_CONTENTS_MAX_SIZE", default=50 * 1024 * 1024)
+# Server generated files larger than the threshold are uploaded in parts, up to
+# part size * concurrency bytes are held in memory
+FILE_UPLOAD_MULTIPART_THRESHOLD = env.int(
+    "FILE_UPLOAD_MULTIPART_THRESHOLD", default=8 * 1024 * 1024
+)
+FILE_UPLOAD_PART_SIZE = env.int("FILE_UPLOAD_PART_SIZE", default=8 * 1024 * 1024)
+FILE_UPLOAD_MAX_CONCURRENCY = env.int("FILE_UPLOAD_MAX_CONCURRENCY", default=4)
+
+# Rounds returned by one page of the daily round series, the series of a window
+# is cached by its ETag for DAILY_ROUND_SERIES_CACHE_TTL seconds
+DAILY_ROUND_SERIES_MAX_ROWS = env.int("DAILY_ROUND_SERIES_MAX_ROWS", default=5000)
+DAILY_ROUND_SERIES_CACHE_TTL = env.int("DAILY_ROUND_SERIES_CACHE_TTL", default=60 * 5)
@@ -21,6 +21,9 @@ from care.users.reset_password_views import (
 )
 from config import api_router
 from config.health_views import (
+    AuthUserCacheStatsView,
+    FHIRResponseCacheStatsView,
+    LockStatsView,
     MiddlewareAssetAuthenticationVerifyView,
     MiddlewareAuthenticationVerifyView,
 )
@@ -68,6 +71,9 @@ urlpatterns = [
     # Health check urls
     path("middleware/verify", MiddlewareAuthenticationVerifyView.as_view()),
     path("middleware/verify-asset", MiddlewareAssetAuthenticationVerifyView.as_view()),
+    path("health/auth-user-cache/", AuthUserCacheStatsView.as_view()),
+    path("health/locks/", LockStatsView.as_view()),
+    path("health/fhir-response-cache/", FHIRResponseCacheStatsView.as_view()),
     path("health/", include("healthy_django.urls", namespace="healthy_django")),
     # OpenID Connect
     path(".well-known/jwks.json", PublicJWKsView.as_view(), name="jwks-json"),